@@ -6,6 +6,8 @@ from django.db.models import Count, F, Sum
 from django.utils import timezone
 from orders.models import *
 from orders.models import Order
+from products.models import Product
+from products.sales import top_selling
 from rest_framework import status
 from rest_framework.decorators import api_view, permission_classes
 from rest_framework.permissions import AllowAny, IsAdminUser
@@ -210,24 +212,19 @@ def get_all_contacts(request):
 class TopSellingProductView(APIView):
     permission_classes = [IsAdminUser]
     def get(self, request, *args, **kwargs):
-        # Filtrer sur les produits vendus uniquement dans les commandes payées
-        top_products = (
-            OrderItem.objects.filter(order__is_paid=True)  # Filtrer par commandes payées
-            .values("product__id", "product__name")
-            .annotate(
-                total_sales=Sum("quantity"),  # Nombre total vendu
-                total_revenue=Sum(F("quantity") * F("price")),  # Revenu total généré
-            )
-            .order_by("-total_sales")[:3]  # Limiter aux 3 meilleurs produits
+        # Compteurs de ventes des commandes payées, maintenus par products.sales
+        top_products = top_selling(3)  # Limiter aux 3 meilleurs produits
+        names = dict(
+            Product.objects.filter(id__in=[row["product_id"] for row in top_products]).values_list("id", "name")
         )
 
         if top_products:
             data = [
                 {
-                    "product_id": product["product__id"],
-                    "product_name": product["product__name"],
-                    "total_sales": product["total_sales"],
-                    "total_revenue": product["total_revenue"],
+                    "product_id": product["product_id"],
+                    "product_name": names.get(product["product_id"]),
+                    "total_sales": product["units_sold"],
+                    "total_revenue": product["revenue"],
                 }
                 for product in top_products
             ]
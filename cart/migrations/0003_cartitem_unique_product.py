@@ -0,0 +1,34 @@
+# Generated by Django 5.0.4 on 2026-10-18 09:56
+
+from django.db import migrations, models
+from django.db.models import Count, Min, Sum
+
+
+def merge_duplicate_lines(apps, schema_editor):
+    CartItem = apps.get_model("cart", "CartItem")
+    duplicates = (
+        CartItem.objects.values("cart_id", "product_id")
+        .annotate(lines=Count("id"), keep=Min("id"), quantity=Sum("quantity"))
+        .filter(lines__gt=1)
+    )
+    for row in duplicates:
+        CartItem.objects.filter(pk=row["keep"]).update(quantity=row["quantity"])
+        CartItem.objects.filter(cart_id=row["cart_id"], product_id=row["product_id"]).exclude(pk=row["keep"]).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("cart", "0002_initial"),
+        ("products", "0008_productimage_variants"),
+    ]
+
+    operations = [
+        migrations.RunPython(merge_duplicate_lines, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name="cartitem",
+            constraint=models.UniqueConstraint(
+                fields=("cart", "product"), name="cartitem_cart_product_uniq"
+            ),
+        ),
+    ]
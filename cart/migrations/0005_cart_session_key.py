@@ -0,0 +1,58 @@
+# Generated by Django 5.0.4 on 2026-10-18 10:00
+
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import F
+
+
+def copy_session_keys(apps, schema_editor):
+    Cart = apps.get_model("cart", "Cart")
+    Cart.objects.filter(session__isnull=False).update(session_key=F("session_id"))
+
+
+def restore_sessions(apps, schema_editor):
+    Cart = apps.get_model("cart", "Cart")
+    Session = apps.get_model("sessions", "Session")
+    Cart.objects.filter(session_key__in=Session.objects.values("session_key")).update(session_id=F("session_key"))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("cart", "0004_cart_anonymous_session_index"),
+        ("sessions", "0001_initial"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name="cart",
+            name="cart_anonymous_session_idx",
+        ),
+        migrations.AddField(
+            model_name="cart",
+            name="session_key",
+            field=models.CharField(blank=True, max_length=40, null=True),
+        ),
+        migrations.RunPython(copy_session_keys, restore_sessions),
+        migrations.RemoveField(
+            model_name="cart",
+            name="session",
+        ),
+        migrations.AddIndex(
+            model_name="cart",
+            index=models.Index(
+                condition=models.Q(("user__isnull", True)),
+                fields=["session_key"],
+                name="cart_anonymous_session_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="cart",
+            index=models.Index(
+                condition=models.Q(("user__isnull", True)),
+                fields=["updated_at"],
+                name="cart_anonymous_updated_idx",
+            ),
+        ),
+    ]
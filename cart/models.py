@@ -1,23 +1,60 @@
 from django.conf import settings
-from django.contrib.sessions.models import Session
 from django.db import models
+from django.db.models import Count
+from products.totals import sum_of_lines
+
+
+class CartQuerySet(models.QuerySet):
+    def with_total(self):
+        """Annote chaque panier de son total (`total`), calculé par la base."""
+        return self.annotate(total=sum_of_lines("product__price", "items__"))
+
+
+class CartItemQuerySet(models.QuerySet):
+    def summary(self):
+        """{"lines": nombre de lignes, "total": somme des lignes}, en une requête."""
+        return self.aggregate(lines=Count("id"), total=sum_of_lines("product__price"))
+
+    def total(self):
+        return self.summary()["total"]
 
 
 class Cart(models.Model):
     user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, null=True, blank=True)
-    session = models.ForeignKey(Session, null=True, blank=True, on_delete=models.SET_NULL)
+    # Clé de la session anonyme, sans clé étrangère : la session peut vivre dans Redis
+    session_key = models.CharField(max_length=40, null=True, blank=True)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    objects = CartQuerySet.as_manager()
+
+    class Meta:
+        indexes = [
+            # Paniers anonymes : recherche par session et purge des paniers abandonnés (cart.reaper)
+            models.Index(fields=["session_key"], condition=models.Q(user__isnull=True), name="cart_anonymous_session_idx"),
+            models.Index(fields=["updated_at"], condition=models.Q(user__isnull=True), name="cart_anonymous_updated_idx"),
+        ]
+
     def __str__(self):
         return f"Cart {self.id} for {self.user or 'Anonymous'}"
 
+    def get_total_price(self):
+        return self.items.total()
+
 
 class CartItem(models.Model):
     cart = models.ForeignKey(Cart, related_name="items", on_delete=models.CASCADE)
     product = models.ForeignKey("products.Product", on_delete=models.CASCADE)
     quantity = models.PositiveIntegerField(default=1)
 
+    objects = CartItemQuerySet.as_manager()
+
+    class Meta:
+        constraints = [
+            # Une ligne par produit : permet les upserts groupés (cart.store)
+            models.UniqueConstraint(fields=["cart", "product"], name="cartitem_cart_product_uniq"),
+        ]
+
     def __str__(self):
         return f"{self.quantity} x {self.product.name} in cart"
 
@@ -0,0 +1,72 @@
+# reaper.py
+"""
+Purge des sessions expirées et des paniers anonymes abandonnés.
+
+Un panier anonyme est abandonné quand il n'a plus de session, et :
+- sessions en base (SESSION_STORE = "db") : quand sa session a expiré ou a
+  été supprimée. Un panier vit aussi longtemps que sa session, que
+  SessionRefreshMiddleware prolonge même si le panier n'est pas modifié ;
+- sessions Redis, qui expirent sans laisser de trace : quand il n'a pas été
+  modifié depuis SESSION_COOKIE_AGE.
+Le travail est découpé en lots bornés (une transaction courte par lot) pour
+ne pas verrouiller django_session ni les tables du panier pendant la purge.
+"""
+import logging
+from datetime import timedelta
+
+from django.conf import settings
+from django.contrib.sessions.models import Session
+from django.db import transaction
+from django.db.models import Exists, OuterRef, Q
+from django.utils import timezone
+
+from .models import Cart, CartItem
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_BATCH_SIZE = 1000
+DEFAULT_MAX_BATCHES = 100
+
+
+def _delete_carts(cart_ids, report):
+    _, deleted = Cart.objects.filter(pk__in=cart_ids).delete()
+    report["carts"] += deleted.get(Cart._meta.label, 0)
+    report["cart_items"] += deleted.get(CartItem._meta.label, 0)
+
+
+def reap_expired_carts(batch_size=DEFAULT_BATCH_SIZE, max_batches=DEFAULT_MAX_BATCHES):
+    """
+    Supprime au plus `max_batches` lots de sessions expirées avec leurs paniers
+    anonymes, puis les paniers anonymes abandonnés.
+    Retourne le nombre de lignes supprimées par table.
+    """
+    now = timezone.now()
+    report = {"sessions": 0, "carts": 0, "cart_items": 0}
+
+    for _ in range(max_batches):
+        session_keys = list(
+            Session.objects.filter(expire_date__lt=now).values_list("session_key", flat=True)[:batch_size]
+        )
+        if not session_keys:
+            break
+        with transaction.atomic():
+            _delete_carts(Cart.objects.filter(session_key__in=session_keys, user=None).values_list("id", flat=True), report)
+            report["sessions"] += Session.objects.filter(session_key__in=session_keys).delete()[0]
+
+    if getattr(settings, "SESSION_STORE", "db") == "redis":
+        inactive = Q(updated_at__lt=now - timedelta(seconds=settings.SESSION_COOKIE_AGE))
+    else:
+        inactive = ~Exists(Session.objects.filter(session_key=OuterRef("session_key")))
+    abandoned = Cart.objects.filter(Q(session_key__isnull=True) | inactive, user=None)
+    for _ in range(max_batches):
+        cart_ids = list(abandoned.values_list("id", flat=True)[:batch_size])
+        if not cart_ids:
+            break
+        with transaction.atomic():
+            _delete_carts(cart_ids, report)
+
+    logger.info(
+        "Purge : %s session(s), %s panier(s), %s ligne(s) de panier supprimés",
+        report["sessions"], report["carts"], report["cart_items"],
+    )
+    return report
@@ -0,0 +1,26 @@
+from products.models import Product
+from rest_framework import serializers
+
+from .store import OPERATIONS
+
+
+class CartOperationSerializer(serializers.Serializer):
+    op = serializers.ChoiceField(choices=OPERATIONS)
+    product_id = serializers.IntegerField()
+    quantity = serializers.IntegerField(default=1)
+
+    def validate(self, attrs):
+        if attrs["op"] == "set" and attrs["quantity"] < 0:
+            raise serializers.ValidationError({"quantity": "La quantité ne peut pas être négative."})
+        return attrs
+
+
+class CartBatchSerializer(serializers.Serializer):
+    operations = CartOperationSerializer(many=True, allow_empty=False, max_length=200)
+
+    def validate_operations(self, operations):
+        product_ids = {operation["product_id"] for operation in operations}
+        known = set(Product.objects.filter(pk__in=product_ids).values_list("id", flat=True))
+        if product_ids - known:
+            raise serializers.ValidationError(f"Produits inconnus : {sorted(product_ids - known)}")
+        return operations
@@ -0,0 +1,88 @@
+# snapshot.py
+"""
+Instantané d'un panier pour les vues de lecture.
+
+Le nombre de requêtes ne dépend pas de la taille du panier : contenu du
+panier (store), produits (avec leur image principale) et identifiant du panier
+(un panier Redis jamais recopié en base l'est au premier instantané).
+Les recommandations sont servies à part (cart_recommendations).
+"""
+from products.caching import CATALOG, cached
+from products.models import Product
+from products.recommendations import RECOMMENDATIONS, recommend_for_categories
+
+from .store import get_cart_store
+
+RECOMMENDATIONS_TTL = 60 * 5
+# Candidats mis en cache par ensemble de catégories, avant exclusion des produits du panier
+RECOMMENDATION_CANDIDATES = 12
+
+
+def first_image_urls(product):
+    """URL de l'image principale du produit et de sa miniature (champs dénormalisés sur Product)."""
+    return {"image_url": product.primary_image_url, "thumbnail_url": product.primary_thumbnail_url}
+
+
+def recommended_data(products):
+    return [
+        {
+            "id": product.id,
+            "name": product.name,
+            "price": product.price,
+            "average_rating": product.average_rating,
+            "review_count": product.review_count,
+            "description": product.description,
+            "images": [{"image": image.image.url, "variants": image.variant_urls()} for image in product.images.all()]
+        }
+        for product in products
+    ]
+
+
+def build_cart_snapshot(owner):
+    """Retourne {"items", "cart_id"} pour le panier de `owner`, ou None si le panier est vide."""
+    quantities = get_cart_store().items(owner)
+    if not quantities:
+        return None
+
+    products = Product.objects.filter(pk__in=quantities).in_bulk()
+    snapshot = {
+        "items": [
+            {
+                "product_id": product.id,
+                "product_name": product.name,
+                "quantity": quantity,
+                "price": product.price,
+                "description": product.description,
+                "total_price": quantity * product.price,
+                **first_image_urls(product),
+            }
+            for product_id, quantity in quantities.items() if (product := products.get(product_id))
+        ],
+        "cart_id": owner.carts().values_list("id", flat=True).first(),
+    }
+    if snapshot["cart_id"] is None:
+        # Panier Redis pas encore recopié : il l'est ici, une fois, pour exposer
+        # l'identifiant attendu par le paiement (payments.views.init_cart_payment)
+        snapshot["cart_id"] = get_cart_store().persist(owner).id
+    return snapshot
+
+
+def cart_recommendations(owner, limit=4):
+    """
+    Recommandations pour le panier de `owner`, mises en cache par ensemble de
+    catégories (TTL court, invalidé par le catalogue et le recalcul des voisins).
+    """
+    product_ids = set(get_cart_store().items(owner))
+    if not product_ids:
+        return []
+    category_ids = sorted(set(
+        Product.objects.filter(pk__in=product_ids).values_list("category_id", flat=True)
+    ))
+
+    candidates = cached(
+        f"cart_recommendations:{','.join(map(str, category_ids))}",
+        [CATALOG, RECOMMENDATIONS],
+        lambda: recommended_data(recommend_for_categories(category_ids, limit=RECOMMENDATION_CANDIDATES)),
+        timeout=RECOMMENDATIONS_TTL,
+    )
+    return [product for product in candidates if product["id"] not in product_ids][:limit]
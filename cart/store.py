@@ -0,0 +1,375 @@
+# store.py
+"""
+Stockage des paniers.
+
+- DatabaseCartStore : les tables Cart / CartItem, chaque modification étant
+  une mise à jour conditionnelle (pas de get_or_create + save).
+- RedisCartStore : le panier vivant est un hash Redis {product_id: quantité}
+  modifié par HINCRBY / HDEL, sans requête SQL. Les paniers modifiés sont
+  notés dans un ensemble et recopiés dans Cart / CartItem par la tâche
+  persist_dirty_carts, ou immédiatement au passage de commande (persist).
+
+Le stockage est choisi par le réglage CART_STORE ("db" par défaut, ou "redis").
+"""
+from typing import NamedTuple, Optional
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.db.models import F
+from django.utils import timezone
+
+from .models import Cart, CartItem
+
+
+class CartOwner(NamedTuple):
+    """Propriétaire d'un panier : un utilisateur connecté ou une session anonyme."""
+    user_id: Optional[int]
+    session_key: Optional[str]
+
+    @property
+    def exists(self):
+        return bool(self.user_id or self.session_key)
+
+    @property
+    def key(self):
+        return f"user:{self.user_id}" if self.user_id else f"session:{self.session_key}"
+
+    @classmethod
+    def from_key(cls, key):
+        kind, value = key.split(":", 1)
+        return cls(int(value), None) if kind == "user" else cls(None, value)
+
+    def carts(self):
+        if not self.exists:
+            return Cart.objects.none()
+        if self.user_id:
+            return Cart.objects.filter(user_id=self.user_id)
+        return Cart.objects.filter(session_key=self.session_key, user=None)
+
+
+def cart_owner(request, create_session=True):
+    """Propriétaire du panier de la requête ; crée la session anonyme si besoin."""
+    if request.user.is_authenticated:
+        return CartOwner(request.user.id, None)
+    if not request.session.session_key and create_session:
+        request.session.save()
+    return CartOwner(None, request.session.session_key)
+
+
+OPERATIONS = ("set", "increment", "remove")
+
+
+def apply_operation(current, op, quantity):
+    """Quantité après une opération de panier ; 0 ou moins = ligne supprimée."""
+    if op == "set":
+        return quantity
+    if op == "increment":
+        return current + quantity
+    return 0
+
+
+class DatabaseCartStore:
+    def items(self, owner):
+        """Contenu du panier : {product_id: quantité}."""
+        return dict(
+            CartItem.objects.filter(cart__in=owner.carts()[:1]).values_list("product_id", "quantity")
+        )
+
+    def _cart(self, owner):
+        cart = owner.carts().first()
+        if cart is None:
+            cart = Cart.objects.create(user_id=owner.user_id, session_key=owner.session_key)
+        else:
+            touch_anonymous_cart(owner)
+        return cart
+
+    def add(self, owner, product_id, quantity):
+        with transaction.atomic():
+            cart = self._cart(owner)
+            line = CartItem.objects.filter(cart=cart, product_id=product_id)
+            if line.update(quantity=F("quantity") + quantity):
+                return
+            try:
+                # Point de sauvegarde : un ajout concurrent du même produit a pu créer la ligne
+                with transaction.atomic():
+                    CartItem.objects.create(cart=cart, product_id=product_id, quantity=quantity)
+            except IntegrityError:
+                line.update(quantity=F("quantity") + quantity)
+
+    def decrease(self, owner, product_id):
+        """Retire une unité ; retourne la quantité restante, ou None si le produit n'est pas dans le panier."""
+        lines = CartItem.objects.filter(cart__in=owner.carts()[:1], product_id=product_id)
+        with transaction.atomic():
+            if lines.filter(quantity__gt=1).update(quantity=F("quantity") - 1):
+                touch_anonymous_cart(owner)
+                return lines.values_list("quantity", flat=True).first()
+            if lines.delete()[0]:
+                touch_anonymous_cart(owner)
+                return 0
+            return None
+
+    def remove(self, owner, product_id):
+        removed = bool(CartItem.objects.filter(cart__in=owner.carts()[:1], product_id=product_id).delete()[0])
+        if removed:
+            touch_anonymous_cart(owner)
+        return removed
+
+    def apply(self, owner, operations):
+        """
+        Applique des opérations (op, product_id, quantité) en une transaction :
+        lecture des lignes concernées, un upsert groupé, une suppression.
+        """
+        product_ids = {product_id for _, product_id, _ in operations}
+        with transaction.atomic():
+            cart = self._cart(owner)
+            quantities = dict(
+                CartItem.objects.select_for_update()
+                .filter(cart=cart, product_id__in=product_ids)
+                .values_list("product_id", "quantity")
+            )
+            for op, product_id, quantity in operations:
+                quantities[product_id] = apply_operation(quantities.get(product_id, 0), op, quantity)
+
+            CartItem.objects.bulk_create(
+                [CartItem(cart=cart, product_id=product_id, quantity=quantity)
+                 for product_id, quantity in quantities.items() if quantity > 0],
+                update_conflicts=True,
+                unique_fields=["cart", "product"],
+                update_fields=["quantity"],
+            )
+            removed = [product_id for product_id, quantity in quantities.items() if quantity <= 0]
+            if removed:
+                CartItem.objects.filter(cart=cart, product_id__in=removed).delete()
+
+    def clear(self, owner):
+        owner.carts().delete()
+
+    def persist(self, owner):
+        """Panier en base à jour (passage de commande) ; None si le panier n'existe pas."""
+        return owner.carts().first()
+
+    def merge(self, source, target):
+        """Fusionne le panier de `source` (session anonyme) dans celui de `target` (utilisateur)."""
+        source_cart = source.carts().first()
+        if source_cart is None:
+            return target.carts().first()
+        return merge_carts(source_cart, target.user_id)
+
+
+class RedisCartStore:
+    KEY_PREFIX = "cart"
+    DIRTY_KEY = "cart:dirty"
+    # Champ présent dans tout hash chargé, même vide : distingue « vide » de « pas encore chargé »
+    LOADED = "-"
+    TTL = 60 * 60 * 24 * 30
+
+    DECREASE_SCRIPT = """
+    local quantity = redis.call('HINCRBY', KEYS[1], ARGV[1], -1)
+    if quantity <= 0 then redis.call('HDEL', KEYS[1], ARGV[1]) end
+    return quantity
+    """
+
+    # Même sémantique que apply_operation, appliquée atomiquement dans Redis
+    APPLY_SCRIPT = """
+    for i = 1, #ARGV, 3 do
+        local op, field, quantity = ARGV[i], ARGV[i + 1], tonumber(ARGV[i + 2])
+        local current = tonumber(redis.call('HGET', KEYS[1], field) or '0')
+        if op == 'set' then current = quantity
+        elseif op == 'increment' then current = current + quantity
+        else current = 0 end
+        if current > 0 then redis.call('HSET', KEYS[1], field, current)
+        else redis.call('HDEL', KEYS[1], field) end
+    end
+    """
+
+    def __init__(self, client=None):
+        self._client = client
+
+    @property
+    def client(self):
+        if self._client is None:
+            from django_redis import get_redis_connection
+
+            self._client = get_redis_connection("default")
+        return self._client
+
+    def _key(self, owner):
+        return f"{self.KEY_PREFIX}:{owner.key}"
+
+    def _load(self, owner):
+        """Charge le panier depuis la base au premier accès (ou après expiration du hash)."""
+        key = self._key(owner)
+        if self.client.exists(key):
+            return key
+        lines = DatabaseCartStore().items(owner)
+        pipeline = self.client.pipeline()
+        pipeline.hsetnx(key, self.LOADED, 1)
+        for product_id, quantity in lines.items():
+            pipeline.hsetnx(key, product_id, quantity)
+        pipeline.expire(key, self.TTL)
+        pipeline.execute()
+        return key
+
+    def _touch(self, pipeline, owner, key):
+        pipeline.expire(key, self.TTL)
+        pipeline.sadd(self.DIRTY_KEY, owner.key)
+
+    def items(self, owner):
+        if not owner.exists:
+            return {}
+        raw = self.client.hgetall(self._load(owner))
+        return {int(field): int(value) for field, value in raw.items() if field.decode() != self.LOADED}
+
+    def add(self, owner, product_id, quantity):
+        key = self._load(owner)
+        pipeline = self.client.pipeline()
+        pipeline.hincrby(key, product_id, quantity)
+        self._touch(pipeline, owner, key)
+        pipeline.execute()
+
+    def decrease(self, owner, product_id):
+        if not owner.exists:
+            return None
+        key = self._load(owner)
+        quantity = self.client.eval(self.DECREASE_SCRIPT, 1, key, product_id)
+        pipeline = self.client.pipeline()
+        self._touch(pipeline, owner, key)
+        pipeline.execute()
+        return quantity if quantity >= 0 else None
+
+    def remove(self, owner, product_id):
+        if not owner.exists:
+            return False
+        key = self._load(owner)
+        pipeline = self.client.pipeline()
+        pipeline.hdel(key, product_id)
+        self._touch(pipeline, owner, key)
+        return bool(pipeline.execute()[0])
+
+    def apply(self, owner, operations):
+        key = self._load(owner)
+        arguments = [value for operation in operations for value in operation]
+        self.client.eval(self.APPLY_SCRIPT, 1, key, *arguments)
+        pipeline = self.client.pipeline()
+        self._touch(pipeline, owner, key)
+        pipeline.execute()
+
+    def clear(self, owner):
+        pipeline = self.client.pipeline()
+        pipeline.delete(self._key(owner))
+        pipeline.srem(self.DIRTY_KEY, owner.key)
+        pipeline.execute()
+        DatabaseCartStore().clear(owner)
+
+    def persist(self, owner):
+        """Recopie le hash dans Cart / CartItem et retourne le panier en base."""
+        self.client.srem(self.DIRTY_KEY, owner.key)
+        return write_cart(owner, self.items(owner))
+
+    def merge(self, source, target):
+        # La fusion se fait en base ; les deux hash seront rechargés au prochain accès
+        self.persist(source)
+        self.persist(target)
+        cart = DatabaseCartStore().merge(source, target)
+        self.client.delete(self._key(source), self._key(target))
+        return cart
+
+    def persist_dirty(self, batch_size=500):
+        """Recopie en base un lot de paniers modifiés ; retourne le nombre de paniers traités."""
+        keys = self.client.spop(self.DIRTY_KEY, batch_size) or []
+        for key in keys:
+            owner = CartOwner.from_key(key.decode())
+            write_cart(owner, self.items(owner))
+        return len(keys)
+
+
+def touch_anonymous_cart(owner):
+    """
+    Date de dernière activité d'un panier anonyme, à chaque modification : les
+    lignes sont modifiées sans save() du panier, et cart.reaper purge les
+    paniers anonymes inactifs.
+    """
+    if owner.user_id is None and owner.session_key:
+        owner.carts().update(updated_at=timezone.now())
+
+
+def write_cart(owner, lines):
+    """Remplace le contenu du panier en base par `lines` ({product_id: quantité})."""
+    with transaction.atomic():
+        cart = owner.carts().first()
+        if cart is None:
+            if not lines:
+                return None
+            cart = Cart.objects.create(user_id=owner.user_id, session_key=owner.session_key)
+        else:
+            touch_anonymous_cart(owner)
+        CartItem.objects.filter(cart=cart).delete()
+        CartItem.objects.bulk_create(
+            CartItem(cart=cart, product_id=product_id, quantity=quantity) for product_id, quantity in lines.items()
+        )
+    return cart
+
+
+def merge_carts(source_cart, user_id):
+    """
+    Fusionne `source_cart` dans le panier de l'utilisateur en une transaction :
+    quantités additionnées, toutes les lignes plafonnées au stock (celles
+    qui tombent à 0 sont supprimées), un upsert groupé quel que soit le nombre
+    de lignes. Sans panier utilisateur, `source_cart` lui est rattaché.
+    """
+    with transaction.atomic():
+        user_cart = Cart.objects.select_for_update().filter(user_id=user_id).first()
+        if user_cart is None:
+            Cart.objects.filter(pk=source_cart.pk).update(user_id=user_id, session_key=None)
+            source_cart.user_id, source_cart.session_key = user_id, None
+            target, carts = source_cart, [source_cart.pk]
+        else:
+            target, carts = user_cart, [source_cart.pk, user_cart.pk]
+
+        merged, stocks = {}, {}
+        for product_id, quantity, stock in (
+            CartItem.objects.filter(cart__in=carts).values_list("product_id", "quantity", "product__stock")
+        ):
+            merged[product_id] = merged.get(product_id, 0) + quantity
+            stocks[product_id] = stock
+        merged = {product_id: min(quantity, stocks[product_id]) for product_id, quantity in merged.items()}
+
+        CartItem.objects.bulk_create(
+            [CartItem(cart=target, product_id=product_id, quantity=quantity)
+             for product_id, quantity in merged.items() if quantity > 0],
+            update_conflicts=True,
+            unique_fields=["cart", "product"],
+            update_fields=["quantity"],
+        )
+        out_of_stock = [product_id for product_id, quantity in merged.items() if quantity <= 0]
+        if out_of_stock:
+            CartItem.objects.filter(cart=target, product_id__in=out_of_stock).delete()
+        if user_cart is not None:
+            source_cart.delete()
+    return target
+
+
+STORES = {"db": DatabaseCartStore, "redis": RedisCartStore}
+_stores = {}
+
+
+def persist_cart(cart_id):
+    """
+    Panier `cart_id` recopié depuis le stockage courant avant un paiement :
+    avec Redis, les lignes en base peuvent retarder sur le panier vivant.
+    Retourne None si le panier n'existe pas.
+    """
+    cart = Cart.objects.filter(pk=cart_id).first()
+    if cart is None:
+        return None
+    owner = CartOwner(cart.user_id, None) if cart.user_id else CartOwner(None, cart.session_key)
+    if not owner.exists:
+        return cart
+    return get_cart_store().persist(owner) or cart
+
+
+def get_cart_store():
+    name = getattr(settings, "CART_STORE", "db")
+    if name not in _stores:
+        _stores[name] = STORES[name]()
+    return _stores[name]
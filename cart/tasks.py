@@ -0,0 +1,19 @@
+from celery import shared_task
+
+from .reaper import reap_expired_carts
+from .store import RedisCartStore, get_cart_store
+
+
+@shared_task
+def persist_dirty_carts_task(batch_size=500):
+    """Recopie en base les paniers Redis modifiés depuis le dernier passage."""
+    store = get_cart_store()
+    if not isinstance(store, RedisCartStore):
+        return 0
+    return store.persist_dirty(batch_size=batch_size)
+
+
+@shared_task
+def reap_expired_carts_task():
+    """Supprime les sessions expirées et les paniers anonymes abandonnés."""
+    return reap_expired_carts()
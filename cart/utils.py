@@ -1,17 +1,20 @@
-from django.contrib.sessions.models import Session
-
 from .models import Cart
+from .store import CartOwner, get_cart_store, merge_carts
+
+
+def merge_session_cart(session_key, user):
+    """Fusionne le panier anonyme de la session dans celui de `user` ; retourne le panier obtenu."""
+    if not session_key:
+        return None
+    return get_cart_store().merge(CartOwner(None, session_key), CartOwner(user.id, None))
 
 
 def migrate_cart_to_user(session_cart, user):
-    session_cart.user = user
-    session_cart.session = None
-    session_cart.save()
+    if session_cart.session_key:
+        return merge_session_cart(session_cart.session_key, user)
+    return merge_carts(session_cart, user.id)
 
 def get_cart_for_anonymous_user(session_key):
-    try:
-        session = Session.objects.get(session_key=session_key)
-        cart = Cart.objects.get(session=session)
-        return cart
-    except Session.DoesNotExist:
+    if not session_key:
         return None
+    return Cart.objects.filter(session_key=session_key, user=None).first()
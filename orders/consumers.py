@@ -0,0 +1,40 @@
+# consumers.py
+"""Consommateurs des événements de commande (voir orders.outbox)."""
+from django.conf import settings
+from django.core.mail import send_mail
+
+from .models import Order
+from .outbox import ORDER_PAID, ORDER_STATUS_CHANGED, consumer
+
+
+def _order_with_email(order_id):
+    order = Order.objects.select_related("user").filter(pk=order_id).first()
+    return order if order and order.user.email else None
+
+
+@consumer(ORDER_PAID)
+def send_payment_confirmation(event):
+    order = _order_with_email(event.aggregate_id)
+    if order is None:
+        return
+    send_mail(
+        f"Confirmation de votre commande {order.reference or order.id}",
+        f"Nous avons bien reçu votre paiement de {order.total_price} €. Merci pour votre commande !",
+        settings.DEFAULT_FROM_EMAIL,
+        [order.user.email],
+    )
+
+
+@consumer(ORDER_STATUS_CHANGED)
+def send_shipping_notification(event):
+    if event.payload.get("to") != "shipped":
+        return
+    order = _order_with_email(event.aggregate_id)
+    if order is None:
+        return
+    send_mail(
+        f"Votre commande {order.reference or order.id} a été expédiée",
+        "Votre commande a été remise au service de livraison.",
+        settings.DEFAULT_FROM_EMAIL,
+        [order.user.email],
+    )
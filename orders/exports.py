@@ -0,0 +1,66 @@
+# exports.py
+"""
+Export en flux de la liste admin des commandes (NDJSON ou CSV).
+
+Les commandes sont lues par lots (.iterator(chunk_size=...)), chaque lot
+préchargeant ses lignes et adresses : la mémoire reste bornée
+par la taille d'un lot quel que soit le nombre de commandes exportées.
+Les commandes sont annotées de `items_total` (OrderQuerySet.with_items_total).
+"""
+import csv
+
+from django.http import StreamingHttpResponse
+from rest_framework.utils.encoders import JSONEncoder
+
+from .serializers import AdminOrderSerializer
+
+EXPORT_CHUNK_SIZE = 500
+
+CSV_HEADER = [
+    "order_id", "created_at", "status", "is_paid", "total_price", "items_total", "username", "email",
+    "product_id", "product_name", "quantity", "price",
+]
+
+
+class Echo:
+    """Pseudo-fichier pour csv.writer : writerow retourne la ligne au lieu de l'écrire."""
+
+    def write(self, value):
+        return value
+
+
+def ndjson_lines(orders):
+    encoder = JSONEncoder()
+    for order in orders:
+        yield encoder.encode(AdminOrderSerializer(order).data) + "\n"
+
+
+def csv_lines(orders):
+    """Une ligne CSV par ligne de commande."""
+    writer = csv.writer(Echo())
+    yield writer.writerow(CSV_HEADER)
+    for order in orders:
+        for item in order.items.all():
+            yield writer.writerow([
+                order.id, order.created_at.isoformat(), order.status, order.is_paid,
+                order.total_price, order.items_total,
+                order.user.username, order.user.email,
+                item.product_id, item.product_name, item.quantity, item.price,
+            ])
+
+
+EXPORTS = {
+    "ndjson": ("application/x-ndjson", ndjson_lines),
+    "csv": ("text/csv", csv_lines),
+}
+
+
+def export_response(queryset, export_format, chunk_size=EXPORT_CHUNK_SIZE):
+    """Réponse en flux exportant `queryset` au format `export_format` (clé de EXPORTS)."""
+    content_type, lines = EXPORTS[export_format]
+    response = StreamingHttpResponse(
+        lines(queryset.order_by("id").iterator(chunk_size=chunk_size)),
+        content_type=content_type,
+    )
+    response["Content-Disposition"] = f'attachment; filename="orders.{export_format}"'
+    return response
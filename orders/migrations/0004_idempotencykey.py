@@ -0,0 +1,80 @@
+# Generated by Django 5.0.4 on 2026-10-18 10:03
+
+from decimal import ROUND_HALF_UP, Decimal
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+def line_totals_to_unit_prices(apps, schema_editor):
+    """
+    OrderItem.price contenait le total de la ligne ; il devient le prix
+    unitaire, écrit ainsi par orders.services.place_order à partir de cette
+    migration.
+    """
+    OrderItem = apps.get_model("orders", "OrderItem")
+    items = OrderItem.objects.filter(quantity__gt=1).only("price", "quantity")
+    batch = []
+    for item in items.iterator(chunk_size=1000):
+        item.price = (item.price / item.quantity).quantize(Decimal("0.01"), rounding=ROUND_HALF_UP)
+        batch.append(item)
+        if len(batch) == 1000:
+            OrderItem.objects.bulk_update(batch, ["price"])
+            batch = []
+    OrderItem.objects.bulk_update(batch, ["price"])
+
+
+def unit_prices_to_line_totals(apps, schema_editor):
+    OrderItem = apps.get_model("orders", "OrderItem")
+    OrderItem.objects.filter(quantity__gt=1).update(price=models.F("price") * models.F("quantity"))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("orders", "0003_order_is_paid_order_reference"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="IdempotencyKey",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("key", models.CharField(max_length=255)),
+                ("created_at", models.DateTimeField(auto_now_add=True)),
+                (
+                    "order",
+                    models.ForeignKey(
+                        blank=True,
+                        null=True,
+                        on_delete=django.db.models.deletion.CASCADE,
+                        to="orders.order",
+                    ),
+                ),
+                (
+                    "user",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        to=settings.AUTH_USER_MODEL,
+                    ),
+                ),
+            ],
+        ),
+        migrations.AddConstraint(
+            model_name="idempotencykey",
+            constraint=models.UniqueConstraint(
+                fields=("user", "key"), name="idempotencykey_user_key_uniq"
+            ),
+        ),
+        migrations.RunPython(line_totals_to_unit_prices, unit_prices_to_line_totals),
+    ]
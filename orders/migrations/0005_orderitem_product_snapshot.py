@@ -0,0 +1,36 @@
+# Generated by Django 5.0.4 on 2026-10-18 10:06
+
+from django.db import migrations, models
+from django.db.models import OuterRef, Subquery
+
+
+def snapshot_products(apps, schema_editor):
+    OrderItem = apps.get_model("orders", "OrderItem")
+    Product = apps.get_model("products", "Product")
+    product = Product.objects.filter(pk=OuterRef("product_id"))
+    OrderItem.objects.update(
+        product_name=Subquery(product.values("name")[:1]),
+        thumbnail=Subquery(product.values("primary_thumbnail")[:1]),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("orders", "0004_idempotencykey"),
+        ("products", "0009_product_primary_image"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="orderitem",
+            name="product_name",
+            field=models.CharField(blank=True, default="", max_length=255),
+        ),
+        migrations.AddField(
+            model_name="orderitem",
+            name="thumbnail",
+            field=models.CharField(blank=True, default="", max_length=255),
+        ),
+        migrations.RunPython(snapshot_products, migrations.RunPython.noop),
+    ]
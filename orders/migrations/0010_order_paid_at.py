@@ -0,0 +1,18 @@
+# Generated by Django 5.0.4 on 2026-10-18 10:37
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("orders", "0009_outboxevent_retries"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="order",
+            name="paid_at",
+            field=models.DateTimeField(blank=True, editable=False, null=True),
+        ),
+    ]
@@ -1,6 +1,19 @@
 from django.conf import settings
 from django.db import models
+from django.utils import timezone
 from products.models import Product
+from products.totals import sum_of_lines
+
+
+class OrderQuerySet(models.QuerySet):
+    def with_items_total(self):
+        """Annote chaque commande du total de ses lignes (`items_total`), calculé par la base."""
+        return self.annotate(items_total=sum_of_lines("price", "items__"))
+
+
+class OrderItemQuerySet(models.QuerySet):
+    def total(self):
+        return self.aggregate(total=sum_of_lines("price"))["total"]
 
 
 class Order(models.Model):
@@ -20,27 +33,111 @@ class Order(models.Model):
         default="pending",
     )
     is_paid = models.BooleanField(default=False)  
+    # Date du paiement (orders.services.mark_orders_paid) : jour des ventes dans products.sales
+    paid_at = models.DateTimeField(null=True, blank=True, editable=False)
     reference = models.CharField(max_length=100, blank=True, null=True)  
 
+    objects = OrderQuerySet.as_manager()
+
     def __str__(self):
         return f"Order {self.id} by {self.user.username}"
 
     def get_total_price(self):
         """
-        Calcule le prix total de la commande à partir des OrderItems associés.
+        Calcule le prix total de la commande à partir des OrderItems associés, en une requête.
         """
-        return sum(item.get_total_price() for item in self.items.all())
+        return self.items.total()
     
 class OrderItem(models.Model):
     order = models.ForeignKey(Order, related_name="items", on_delete=models.CASCADE)
     product = models.ForeignKey(Product, on_delete=models.CASCADE)
     quantity = models.PositiveIntegerField(default=1)
     price = models.DecimalField(max_digits=10, decimal_places=2)
+    # Nom et miniature du produit au moment de la commande : les pages de
+    # commande s'affichent sans lire Product ni ProductImage
+    product_name = models.CharField(max_length=255, blank=True, default="")
+    # Indexé : products.images conserve les fichiers encore référencés par une commande
+    thumbnail = models.CharField(max_length=255, blank=True, default="", db_index=True)
+
+    objects = OrderItemQuerySet.as_manager()
 
     def __str__(self):
-        return f"{self.quantity} x {self.product.name} in Order {self.order.id}"
+        return f"{self.quantity} x {self.product_name} in Order {self.order_id}"
+
+    @property
+    def thumbnail_url(self):
+        return f"{settings.MEDIA_URL}{self.thumbnail}" if self.thumbnail else None
+
     def get_total_price(self):
         """
         Calcule le prix total pour cet item (prix unitaire x quantité).
         """
-        return self.price * self.quantity
\ No newline at end of file
+        return self.price * self.quantity
+
+class OrderStatusHistory(models.Model):
+    """Changement de statut d'une commande (voir orders.status)."""
+    order = models.ForeignKey(Order, related_name="status_history", on_delete=models.CASCADE)
+    from_status = models.CharField(max_length=20)
+    to_status = models.CharField(max_length=20)
+    changed_by = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.SET_NULL, null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f"Order {self.order_id}: {self.from_status} -> {self.to_status}"
+
+
+class IdempotencyKey(models.Model):
+    """
+    En-tête Idempotency-Key d'un passage de commande : une requête rejouée avec
+    la même clé retourne la commande d'origine (voir orders.services.place_order).
+    """
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE)
+    key = models.CharField(max_length=255)
+    order = models.ForeignKey(Order, on_delete=models.CASCADE, null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["user", "key"], name="idempotencykey_user_key_uniq"),
+        ]
+
+    def __str__(self):
+        return f"{self.key} -> Order {self.order_id}"
+
+
+
+class OutboxEvent(models.Model):
+    """
+    Événement de commande ou de paiement, écrit dans la même transaction que
+    la commande, puis livré aux consommateurs par orders.outbox.relay_outbox.
+    """
+    topic = models.CharField(max_length=100)
+    # Identifiant de la commande concernée ; sans clé étrangère, l'événement survit à la commande
+    aggregate_id = models.BigIntegerField()
+    payload = models.JSONField(default=dict, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    processed_at = models.DateTimeField(null=True, blank=True)
+    # Prochaine livraison possible : repoussée pendant qu'un relais livre
+    # l'événement, puis après chaque échec (attente exponentielle)
+    available_at = models.DateTimeField(default=timezone.now)
+    # Abandonné après MAX_ATTEMPTS échecs : n'est plus livré ni ne bloque sa commande
+    failed_at = models.DateTimeField(null=True, blank=True)
+    attempts = models.PositiveIntegerField(default=0)
+    last_error = models.TextField(blank=True, default="")
+
+    class Meta:
+        indexes = [
+            # Événements en attente, lus dans l'ordre d'écriture par le relais
+            models.Index(
+                fields=["id"],
+                condition=models.Q(processed_at__isnull=True, failed_at__isnull=True),
+                name="outbox_pending_idx",
+            ),
+            # Événements livrés, supprimés par orders.outbox.purge_outbox
+            models.Index(
+                fields=["processed_at"], condition=models.Q(processed_at__isnull=False), name="outbox_processed_idx"
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.topic} #{self.aggregate_id}"
@@ -0,0 +1,147 @@
+# outbox.py
+"""
+Outbox transactionnelle des événements de commande et de paiement.
+
+publish() / publish_many() écrivent l'événement dans la transaction de
+l'appelant : il n'existe que si la modification de la commande est validée.
+relay_outbox(), lancé par Celery, livre les événements en attente par lots,
+dans l'ordre d'écriture, aux consommateurs enregistrés avec @consumer
+(voir orders.consumers).
+
+Le relais réserve d'abord son lot dans une transaction courte, puis appelle
+les consommateurs hors transaction et hors verrou (envoi d'e-mails...), et
+enregistre enfin le résultat. Un événement en échec est retenté avec une
+attente exponentielle et bloque les événements suivants de la même commande ;
+après MAX_ATTEMPTS échecs il est abandonné (failed_at) et ne bloque plus.
+
+Livraison « au moins une fois » : un consommateur peut recevoir deux fois le
+même événement. Les événements livrés sont supprimés par purge_outbox().
+"""
+import logging
+from collections import defaultdict
+from datetime import timedelta
+
+from django.db import transaction
+from django.db.models import Exists, F, OuterRef
+from django.utils import timezone
+
+from .models import OutboxEvent
+
+logger = logging.getLogger(__name__)
+
+ORDER_PLACED = "order.placed"
+ORDER_PAID = "order.paid"
+ORDER_STATUS_CHANGED = "order.status_changed"
+
+DEFAULT_BATCH_SIZE = 100
+MAX_ATTEMPTS = 8
+# Attente avant la 2e tentative, doublée à chaque échec et plafonnée
+RETRY_DELAY = timedelta(seconds=30)
+MAX_RETRY_DELAY = timedelta(hours=6)
+# Durée de réservation d'un lot : passé ce délai, un relais interrompu est relayé
+CLAIM_TIMEOUT = timedelta(minutes=5)
+# Conservation des événements livrés avant purge
+PURGE_AFTER = timedelta(days=7)
+
+# topic -> consommateurs, appelés avec l'événement
+HANDLERS = defaultdict(list)
+
+
+def consumer(topic):
+    """Enregistre la fonction décorée comme consommateur des événements `topic`."""
+    def register(handler):
+        HANDLERS[topic].append(handler)
+        return handler
+    return register
+
+
+def publish(topic, aggregate_id, **payload):
+    return OutboxEvent.objects.create(topic=topic, aggregate_id=aggregate_id, payload=payload)
+
+
+def publish_many(topic, events):
+    """Écrit en un INSERT les événements `events` : [(aggregate_id, payload), ...]."""
+    return OutboxEvent.objects.bulk_create(
+        OutboxEvent(topic=topic, aggregate_id=aggregate_id, payload=payload) for aggregate_id, payload in events
+    )
+
+
+def retry_delay(attempts):
+    """Attente avant la tentative suivant `attempts` échecs."""
+    return min(RETRY_DELAY * 2 ** (attempts - 1), MAX_RETRY_DELAY)
+
+
+def _pending():
+    return OutboxEvent.objects.filter(processed_at__isnull=True, failed_at__isnull=True)
+
+
+def _claim(batch_size, now):
+    """
+    Réserve jusqu'à `batch_size` événements livrables, dans l'ordre d'écriture.
+    Un événement n'est pas livrable tant qu'un événement antérieur de la même
+    commande attend une nouvelle tentative ou est réservé par un autre relais.
+    """
+    waiting = _pending().filter(aggregate_id=OuterRef("aggregate_id"), id__lt=OuterRef("id"), available_at__gt=now)
+    with transaction.atomic():
+        events = list(
+            _pending().select_for_update()
+            .filter(available_at__lte=now)
+            .exclude(Exists(waiting))
+            .order_by("id")[:batch_size]
+        )
+        OutboxEvent.objects.filter(pk__in=[event.pk for event in events]).update(available_at=now + CLAIM_TIMEOUT)
+    return events
+
+
+def relay_outbox(batch_size=DEFAULT_BATCH_SIZE):
+    """
+    Livre un lot d'événements en attente ; retourne le nombre d'événements livrés.
+    Le lot est réservé (available_at) avant la livraison : deux relais
+    simultanés ne livrent pas les mêmes événements, ni dans le désordre.
+    """
+    now = timezone.now()
+    delivered, failed, released, blocked = [], {}, [], set()
+    for event in _claim(batch_size, now):
+        if event.aggregate_id in blocked:
+            released.append(event.pk)
+            continue
+        try:
+            for handler in HANDLERS.get(event.topic, ()):
+                handler(event)
+        except Exception as exc:
+            logger.exception("Échec de livraison de l'événement %s (%s)", event.pk, event.topic)
+            blocked.add(event.aggregate_id)
+            failed[event] = repr(exc)
+        else:
+            delivered.append(event.pk)
+
+    now = timezone.now()
+    with transaction.atomic():
+        OutboxEvent.objects.filter(pk__in=delivered).update(processed_at=now, attempts=F("attempts") + 1)
+        # Bloqués par un échec antérieur de leur commande : relivrables après lui
+        OutboxEvent.objects.filter(pk__in=released).update(available_at=now)
+        for event, error in failed.items():
+            attempts = event.attempts + 1
+            if attempts >= MAX_ATTEMPTS:
+                logger.error("Événement %s (%s) abandonné après %s tentatives", event.pk, event.topic, attempts)
+                retry = {"failed_at": now}
+            else:
+                retry = {"available_at": now + retry_delay(attempts)}
+            OutboxEvent.objects.filter(pk=event.pk).update(attempts=attempts, last_error=error, **retry)
+    return len(delivered)
+
+
+def purge_outbox(older_than=PURGE_AFTER, batch_size=1000, max_batches=100):
+    """
+    Supprime, par lots bornés, les événements livrés depuis plus de `older_than`.
+    Les événements abandonnés sont conservés pour examen.
+    Retourne le nombre d'événements supprimés.
+    """
+    processed = OutboxEvent.objects.filter(processed_at__lt=timezone.now() - older_than)
+    deleted = 0
+    for _ in range(max_batches):
+        event_ids = list(processed.values_list("id", flat=True)[:batch_size])
+        if not event_ids:
+            break
+        deleted += OutboxEvent.objects.filter(pk__in=event_ids).delete()[0]
+    return deleted
@@ -10,24 +10,27 @@ class OrderStatusUpdateSerializer(serializers.ModelSerializer):
     class Meta:
         model = Order
         fields = ['status']
-class ProductImageSerializer(serializers.ModelSerializer):
-    class Meta:
-        model = ProductImage
-        fields = ['image', 'alt_text', 'is_primary']
+class OrderStatusChangeSerializer(serializers.Serializer):
+    order = serializers.IntegerField()
+    status = serializers.ChoiceField(choices=Order._meta.get_field('status').choices)
 
-class ProductSerializer(serializers.ModelSerializer):
-    first_image = ProductImageSerializer(source='images.first', read_only=True)
 
-    class Meta:
-        model = Product
-        fields = ['id','name', 'description', 'price', 'stock', 'sku', 'first_image']
+class BulkOrderStatusSerializer(serializers.Serializer):
+    changes = OrderStatusChangeSerializer(many=True, allow_empty=False, max_length=1000)
+
 
 class OrderItemSerializer(serializers.ModelSerializer):
-    product = ProductSerializer(read_only=True)
+    # Nom et miniature figés à la commande : ni Product ni ProductImage ne sont lus
+    product = serializers.SerializerMethodField()
+    thumbnail_url = serializers.CharField(read_only=True)
 
     class Meta:
         model = OrderItem
-        fields = ['product', 'quantity', 'price'] 
+        fields = ['product', 'quantity', 'price', 'product_name', 'thumbnail_url']
+
+    def get_product(self, item):
+        # Forme imbriquée conservée pour les clients existants, construite depuis l'instantané
+        return {'id': item.product_id, 'name': item.product_name, 'first_image': item.thumbnail_url}
 class OrderSerializer(serializers.ModelSerializer):
     class Meta:
         model = Order
@@ -36,6 +39,10 @@ class OrderSerializer(serializers.ModelSerializer):
     def create(self, validated_data):
         return Order.objects.create(**validated_data)
         
+class PlaceOrderSerializer(serializers.Serializer):
+    reference = serializers.CharField(max_length=100, required=False, allow_null=True, allow_blank=True)
+
+
 class OrderwithItemsSerializer(serializers.ModelSerializer):
     items = OrderItemSerializer(many=True)
     class Meta:
@@ -61,7 +68,9 @@ class ClientSerializer(serializers.ModelSerializer):
 class AdminOrderSerializer(serializers.ModelSerializer):
     user = ClientSerializer()
     items = OrderItemSerializer(many=True)
+    # Annotation OrderQuerySet.with_items_total : somme des lignes, calculée par la base
+    items_total = serializers.DecimalField(max_digits=12, decimal_places=2, read_only=True)
 
     class Meta:
         model = Order
-        fields = ['id', 'user', "is_paid",'created_at', 'updated_at', 'total_price', 'status', 'items']
\ No newline at end of file
+        fields = ['id', 'user', "is_paid",'created_at', 'updated_at', 'total_price', 'items_total', 'status', 'items']
\ No newline at end of file
@@ -0,0 +1,98 @@
+# services.py
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+from products.sales import record_order_sales
+from products.stock import reserve_stock
+
+from .models import IdempotencyKey, Order, OrderItem
+from .outbox import ORDER_PAID, ORDER_PLACED, publish, publish_many
+
+
+class EmptyCart(Exception):
+    """Levée quand le panier à commander n'a aucune ligne."""
+
+
+def mark_orders_paid(reference):
+    """
+    Marque payées les commandes portant `reference` et comptabilise leurs ventes.
+    Les notifications rejouées par Stripe ne comptent pas deux fois la même commande.
+
+    Le statut n'est pas modifié : une commande payée reste "pending" jusqu'à
+    son expédition (orders.status), et une notification rejouée ou tardive ne
+    ramène pas une commande expédiée ou annulée à "pending".
+    """
+    with transaction.atomic():
+        newly_paid = list(
+            Order.objects.select_for_update()
+            .filter(reference=reference, is_paid=False)
+            .values_list('id', flat=True)
+        )
+        if newly_paid:
+            # update() ne renseigne pas auto_now
+            now = timezone.now()
+            Order.objects.filter(pk__in=newly_paid).update(is_paid=True, paid_at=now, updated_at=now)
+            record_order_sales(newly_paid, day=timezone.localdate(now))
+            publish_many(ORDER_PAID, [(order_id, {"reference": reference}) for order_id in newly_paid])
+    return len(newly_paid)
+
+
+def _replayed_order(user, idempotency_key):
+    order_id = (
+        IdempotencyKey.objects.filter(user=user, key=idempotency_key, order__isnull=False)
+        .values_list("order_id", flat=True)
+        .first()
+    )
+    return Order.objects.get(pk=order_id) if order_id else None
+
+
+def place_order(user, cart, reference=None, idempotency_key=None):
+    """
+    Transforme `cart` (ou None) en commande en une transaction : réservation du stock,
+    total calculé par la base, lignes créées en un INSERT groupé, suppression
+    du panier. Retourne (commande, créée).
+
+    Avec `idempotency_key`, une requête rejouée retourne la commande d'origine
+    sans rien écrire ; la contrainte unique sur la clé départage deux requêtes
+    simultanées. Lève EmptyCart ou products.stock.InsufficientStock.
+    """
+    if idempotency_key and (order := _replayed_order(user, idempotency_key)):
+        return order, False
+
+    try:
+        with transaction.atomic():
+            claim = IdempotencyKey.objects.create(user=user, key=idempotency_key) if idempotency_key else None
+
+            quantities = {}
+            for product_id, quantity in (cart.items.values_list("product_id", "quantity") if cart else ()):
+                quantities[product_id] = quantities.get(product_id, 0) + quantity
+            if not quantities:
+                raise EmptyCart()
+            # Réservation conditionnelle : échoue sans rien écrire si un article manque.
+            # Elle verrouille les produits : prix des lignes et total sont lus ensuite,
+            # sans qu'un changement de prix puisse s'intercaler entre les deux lectures
+            reserve_stock(quantities)
+
+            lines = list(
+                cart.items.values_list("product_id", "quantity", "product__price", "product__name", "product__primary_thumbnail")
+            )
+            total_price = cart.items.total()
+            order = Order.objects.create(user=user, total_price=total_price, reference=reference)
+            # OrderItem.price est le prix unitaire (voir OrderItem.get_total_price) ;
+            # nom et miniature sont figés au moment de la commande
+            OrderItem.objects.bulk_create(
+                OrderItem(
+                    order=order, product_id=product_id, quantity=quantity, price=price,
+                    product_name=name, thumbnail=thumbnail,
+                )
+                for product_id, quantity, price, name, thumbnail in lines
+            )
+            cart.delete()
+            publish(ORDER_PLACED, order.id, user_id=user.id, total_price=str(total_price), reference=reference)
+            if claim:
+                IdempotencyKey.objects.filter(pk=claim.pk).update(order=order)
+    except IntegrityError:
+        # Clé déjà prise par une requête concurrente, validée entre-temps
+        if idempotency_key and (order := _replayed_order(user, idempotency_key)):
+            return order, False
+        raise
+    return order, True
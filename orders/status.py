@@ -0,0 +1,82 @@
+# status.py
+"""
+Machine à états des commandes.
+
+Les changements de statut demandés en masse sont validés contre TRANSITIONS,
+regroupés par couple (ancien statut, nouveau statut) et appliqués en un
+UPDATE par couple ; l'historique et les événements (orders.outbox) sont
+écrits en un INSERT groupé chacun. Une commande annulée remet ses articles
+en stock.
+"""
+from collections import defaultdict
+
+from django.db import transaction
+from django.utils import timezone
+from products.stock import release_stock
+
+from .models import Order, OrderItem, OrderStatusHistory
+from .outbox import ORDER_STATUS_CHANGED, publish_many
+
+# statut -> statuts atteignables
+TRANSITIONS = {
+    "pending": {"shipped", "cancelled"},
+    "shipped": {"in_transit", "completed"},
+    "in_transit": {"completed"},
+    "completed": set(),
+    "cancelled": set(),
+}
+
+UPDATED = "updated"
+UNCHANGED = "unchanged"
+INVALID_TRANSITION = "invalid_transition"
+NOT_FOUND = "not_found"
+
+
+def change_order_statuses(changes, user=None):
+    """
+    Applique {order_id: nouveau statut} en une transaction.
+    Retourne une liste [{"order", "result", "status"}] dans l'ordre de `changes`,
+    "status" étant le statut de la commande après l'opération.
+    """
+    results = []
+    groups = defaultdict(list)
+    with transaction.atomic():
+        current = dict(
+            Order.objects.select_for_update().filter(pk__in=changes).values_list("id", "status")
+        )
+        for order_id, target in changes.items():
+            source = current.get(order_id)
+            if source is None:
+                results.append({"order": order_id, "result": NOT_FOUND, "status": None})
+            elif source == target:
+                results.append({"order": order_id, "result": UNCHANGED, "status": source})
+            elif target not in TRANSITIONS[source]:
+                results.append({"order": order_id, "result": INVALID_TRANSITION, "status": source})
+            else:
+                groups[(source, target)].append(order_id)
+                results.append({"order": order_id, "result": UPDATED, "status": target})
+
+        now = timezone.now()
+        for (source, target), order_ids in groups.items():
+            # update() ne renseigne pas auto_now
+            Order.objects.filter(pk__in=order_ids, status=source).update(status=target, updated_at=now)
+
+        OrderStatusHistory.objects.bulk_create(
+            OrderStatusHistory(order_id=order_id, from_status=source, to_status=target, changed_by=user)
+            for (source, target), order_ids in groups.items()
+            for order_id in order_ids
+        )
+
+        publish_many(ORDER_STATUS_CHANGED, [
+            (order_id, {"from": source, "to": target})
+            for (source, target), order_ids in groups.items()
+            for order_id in order_ids
+        ])
+
+        cancelled = [order_id for (_, target), order_ids in groups.items() if target == "cancelled" for order_id in order_ids]
+        if cancelled:
+            quantities = defaultdict(int)
+            for product_id, quantity in OrderItem.objects.filter(order_id__in=cancelled).values_list("product_id", "quantity"):
+                quantities[product_id] += quantity
+            release_stock(quantities)
+    return results
@@ -0,0 +1,21 @@
+from celery import shared_task
+
+from .outbox import DEFAULT_BATCH_SIZE, purge_outbox, relay_outbox
+
+
+@shared_task
+def relay_outbox_task(batch_size=DEFAULT_BATCH_SIZE, max_batches=10):
+    """Livre les événements en attente, par lots, jusqu'à épuisement ou `max_batches` lots."""
+    delivered = 0
+    for _ in range(max_batches):
+        count = relay_outbox(batch_size=batch_size)
+        delivered += count
+        if count < batch_size:
+            break
+    return delivered
+
+
+@shared_task
+def purge_outbox_task():
+    """Supprime les événements d'outbox livrés depuis plus de PURGE_AFTER."""
+    return purge_outbox()
@@ -6,6 +6,7 @@ urlpatterns = [
     path('create/', CreateOrderView.as_view(), name='create-order'),
     path('', UserOrdersView.as_view(), name='user-orders'),
     path('all/', OrderListView.as_view(), name='order-list'),
+    path('status/', bulk_update_order_status, name='bulk-update-order-status'),
     path('<int:order_id>/status/', update_order_status, name='update-order-status'),
     path('<int:order_id>/', OrderDetailsView.as_view(), name='order-details'),
 ]
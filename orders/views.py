@@ -1,93 +1,144 @@
 from cart.models import Cart
+from cart.store import cart_owner, get_cart_store
 from django.contrib.sessions.models import Session
+from django.db import transaction
+from django.db.models import Prefetch
 from django.shortcuts import get_object_or_404
 from rest_framework import status
 from rest_framework.decorators import api_view, permission_classes
-from rest_framework.permissions import AllowAny, IsAdminUser, IsAuthenticated
+from rest_framework.permissions import IsAdminUser, IsAuthenticated
 from rest_framework.response import Response
+from products.pagination import KeysetPagination
+from products.stock import InsufficientStock
 from rest_framework.views import APIView
 
 from .models import *
 from .serializers import *
+from .exports import EXPORTS, export_response
+from .services import EmptyCart, place_order
+from .status import INVALID_TRANSITION, NOT_FOUND, change_order_statuses
 
 
 class CreateOrderView(APIView):
     permission_classes = [IsAuthenticated]
 
     def post(self, request):
-        # Vérifier le panier et calculer le prix total
-        cart = Cart.objects.filter(user=request.user).first()
+        serializer = PlaceOrderSerializer(data=request.data)
+        if not serializer.is_valid():
+            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+        idempotency_key = request.headers.get('Idempotency-Key')
+        if idempotency_key is not None and not 0 < len(idempotency_key) <= 255:
+            return Response({"error": "En-tête Idempotency-Key invalide."}, status=status.HTTP_400_BAD_REQUEST)
+
+        # Un panier Redis est d'abord recopié en base ; une requête rejouée n'a plus de panier
+        store = get_cart_store()
+        owner = cart_owner(request)
+        cart = store.persist(owner)
         if not cart:
             session_key = request.session.session_key
-            cart = Cart.objects.filter(session=session_key).first()
-
-        if not cart:
+            cart = Cart.objects.filter(session_key=session_key).first() if session_key else None
+
+        try:
+            order, created = place_order(
+                request.user, cart,
+                reference=serializer.validated_data.get('reference'),
+                idempotency_key=idempotency_key,
+            )
+        except EmptyCart:
             return Response({"error": "Le panier est vide."}, status=status.HTTP_400_BAD_REQUEST)
+        except InsufficientStock as exc:
+            return Response(
+                {"error": "Stock insuffisant.", "shortages": exc.shortages},
+                status=status.HTTP_409_CONFLICT,
+            )
+
+        if created:
+            transaction.on_commit(lambda: store.clear(owner))
+        return Response({'id': order.id}, status=status.HTTP_201_CREATED if created else status.HTTP_200_OK)
+    
+    
+def order_items_prefetch():
+    """Lignes de commande, affichées depuis leurs champs figés (product_name, thumbnail)."""
+    return Prefetch('items', queryset=OrderItem.objects.order_by('id'))
 
-        total_price = sum(item.get_total_price() for item in cart.items.all())
 
-        
-        reference = request.data.get('reference')  # Obtenir la référence depuis request.data
+class OrderHistoryPagination(KeysetPagination):
+    page_size = 10
+    max_page_size = 50
+    orderings = {'-created_at': ('created_at', True)}
 
-        # Créer les données de commande
-        order_data = {
-            'user': request.user.id,
-            'total_price': total_price,
-            'reference': reference  # Utiliser la référence extraite de request.data
-        }
 
-        serializer = OrderSerializer(data=order_data)
-        
-        if serializer.is_valid():
-            order = serializer.save()
-            
-            for cart_item in cart.items.all():
-                OrderItem.objects.create(
-                    order=order,
-                    product=cart_item.product,
-                    quantity=cart_item.quantity,
-                    price=cart_item.get_total_price(),
-                )
-
-            cart.delete()
-
-            return Response({'id': order.id}, status=status.HTTP_201_CREATED)
-        print(serializer.errors)
-        return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
-    
-    
 class UserOrdersView(APIView):
+    """
+    Historique des commandes, paginé par curseur (?page_size=, ?cursor=).
+    Chaque page coûte le même nombre de requêtes : commandes, lignes.
+    """
     permission_classes = [IsAuthenticated]
 
     def get(self, request):
-        orders = Order.objects.filter(user=request.user).order_by('-created_at')
-        serializer = OrderwithItemsSerializer(orders, many=True)
-        return Response(serializer.data, status=status.HTTP_200_OK)
+        paginator = OrderHistoryPagination(request)
+        orders, next_cursor = paginator.paginate_queryset(
+            Order.objects.filter(user=request.user).prefetch_related(order_items_prefetch())
+        )
+        return Response({
+            'next_cursor': next_cursor,
+            'results': OrderwithItemsSerializer(orders, many=True).data,
+        }, status=status.HTTP_200_OK)
     
     
     
 class OrderListView(APIView):
+    """Commandes payées ; ?export=ndjson|csv les exporte en flux (voir orders.exports)."""
     permission_classes = [IsAdminUser]
 
     def get(self, request):
-        orders = Order.objects.filter(is_paid=True).select_related('user').prefetch_related('items__product', 'user__shipping_addresses')
+        export_format = request.query_params.get('export')
+        if export_format and export_format not in EXPORTS:
+            return Response({"export": f"Valeurs possibles : {', '.join(EXPORTS)}."}, status=status.HTTP_400_BAD_REQUEST)
+
+        orders = (
+            Order.objects.filter(is_paid=True).with_items_total()
+            .select_related('user').prefetch_related(order_items_prefetch(), 'user__shipping_addresses')
+        )
+        if export_format:
+            return export_response(orders, export_format)
         serializer = AdminOrderSerializer(orders, many=True)
         return Response(serializer.data)
 
 
 @api_view(['PATCH'])
-@permission_classes([AllowAny])
+@permission_classes([IsAdminUser])
 def update_order_status(request, order_id):
-    try:
-        order = Order.objects.get(id=order_id)
-    except Order.DoesNotExist:
+    serializer = OrderStatusUpdateSerializer(data=request.data)
+    if not serializer.is_valid():
+        return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+    result, = change_order_statuses({order_id: serializer.validated_data['status']}, user=request.user)
+    if result['result'] == NOT_FOUND:
         return Response({"detail": "Order not found."}, status=status.HTTP_404_NOT_FOUND)
+    if result['result'] == INVALID_TRANSITION:
+        return Response(
+            {"status": [f"Transition impossible depuis le statut {result['status']}."]},
+            status=status.HTTP_400_BAD_REQUEST,
+        )
+    return Response({"status": result['status']}, status=status.HTTP_200_OK)
+
+
+@api_view(['POST'])
+@permission_classes([IsAdminUser])
+def bulk_update_order_status(request):
+    """
+    Change le statut de plusieurs commandes :
+    {"changes": [{"order": 1, "status": "shipped"}, ...]}
+    Retourne le résultat de chaque commande (voir orders.status).
+    """
+    serializer = BulkOrderStatusSerializer(data=request.data)
+    serializer.is_valid(raise_exception=True)
 
-    serializer = OrderStatusUpdateSerializer(order, data=request.data, partial=True)
-    if serializer.is_valid():
-        serializer.save()
-        return Response(serializer.data, status=status.HTTP_200_OK)
-    return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+    changes = {change['order']: change['status'] for change in serializer.validated_data['changes']}
+    results = change_order_statuses(changes, user=request.user)
+    return Response({"results": results}, status=status.HTTP_200_OK)
 
 
 
@@ -116,14 +167,11 @@ class OrderDetailsView(APIView):
         ordered_items = [
             {
                 "id": item.id,
-                "name": item.product.name,
+                "name": item.product_name,
                 "price": float(item.price),
                 "quantity": item.quantity,
-                "image": (
-                    item.product.images.first().image.url
-                    if item.product.images.exists()
-                    else "/placeholder.svg?height=80&width=80"
-                    ),    
+                # Nom et miniature figés à la commande : ni Product ni ProductImage
+                "image": item.thumbnail_url or "/placeholder.svg?height=80&width=80",
                  }
             for item in order.items.all()
         ]
@@ -1,5 +1,5 @@
 import stripe
-from cart.models import Cart
+from cart.store import persist_cart
 from celery import shared_task
 from django.conf import settings
 from orders.models import Order
@@ -11,12 +11,13 @@ from .services import create_payment_intent
 def initiate_cart_payment_task(cart_id, frontUrl):
     stripe.api_key = settings.STRIPE_SECRET_KEY
 
-    cart = Cart.objects.filter(id=cart_id).prefetch_related('items__product').first()
+    # Panier recopié depuis le stockage courant (Redis) : montant à jour
+    cart = persist_cart(cart_id)
     if not cart:
         return {'error': 'Cart not found'}
    
-    total_price = float(sum(item.get_total_price() for item in cart.items.all()))
-    user_id = cart.user.id if cart.user else 0
+    total_price = float(cart.get_total_price())
+    user_id = cart.user_id or 0
     reference = f"REF{cart.id}{user_id}T{str(total_price).replace('.', 'P')}"
 
     # Créer PaymentIntent ou Checkout
@@ -29,7 +30,7 @@ def initiate_cart_payment_task(cart_id, frontUrl):
 
 @shared_task
 def initiate_ref_payment_task(ref, frontUrl):
-    order = Order.objects.filter(reference=ref).prefetch_related('items__product').first()
+    order = Order.objects.filter(reference=ref).first()
     if not order:
         return {'error': 'Order not found'}
 
@@ -6,6 +6,7 @@ import time
 
 from asgiref.sync import sync_to_async
 from cart.models import Cart
+from cart.store import persist_cart
 from celery.result import AsyncResult
 from decouple import config
 from django.conf import settings
@@ -105,23 +106,22 @@ def init_cart_payment(request):
             if not cart_id:
                 return JsonResponse({'error': 'Cart ID is required'}, status=400)
 
-            # Essayer de récupérer le panier
-            cart = Cart.objects.filter(id=cart_id).prefetch_related('items__product').first()
+            # Panier recopié depuis le stockage courant (Redis) : montant à jour
+            cart = persist_cart(cart_id)
             print(f"Cart query took {time.time() - start_time} seconds")
 
             if cart is None:
                 return JsonResponse({'error': 'Cart not found'}, status=404)
 
-            # Récupérer les éléments du panier
-            cart_items = cart.items.all()
-            if not cart_items:
+            # Nombre de lignes et prix total du panier, calculés par la base en une requête
+            summary = cart.items.summary()
+            if not summary['lines']:
                 return JsonResponse({'error': 'Cart is empty'}, status=400)
 
-            # Calculer le prix total du panier et le convertir en float
-            total_price = float(sum(item.get_total_price() for item in cart_items))
+            total_price = float(summary['total'])
             print(f"Total price calculation took {time.time() - start_time} seconds")
 
-            user_id = cart.user.id if cart.user else 0
+            user_id = cart.user_id or 0
             ref = f"REF{cart.id}{user_id}T{str(total_price).replace('.', 'P')}"
 
             paymentData = {
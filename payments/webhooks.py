@@ -4,7 +4,7 @@ import stripe
 from django.http import HttpResponse
 from django.views.decorators.csrf import csrf_exempt
 from dotenv import load_dotenv
-from orders.models import Order
+from orders.services import mark_orders_paid
 
 load_dotenv()
 stripe.api_key = os.getenv("STRIPE_SECRET_KEY")
@@ -30,7 +30,7 @@ def handle_payment_notification(request):
         session = event['data']['object']
         reference = session['id']
         print(f"Session completed for reference: {reference}")
-        order = Order.objects.filter(reference=reference).update(status='pending', is_paid=True)
+        order = mark_orders_paid(reference)
         
         print(f"Order : {order}")
     elif event['type'] == 'payment_intent.succeeded':
@@ -38,7 +38,7 @@ def handle_payment_notification(request):
         reference = intent['id']
         print(f"Session completed for reference: {reference}")
         
-        order = Order.objects.filter(reference=reference).update(status='pending', is_paid=True)
+        order = mark_orders_paid(reference)
         print(f"Order : {order}")
      
     return HttpResponse(status=200)
\ No newline at end of file
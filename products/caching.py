@@ -0,0 +1,122 @@
+# caching.py
+"""
+Cache versionné par tags.
+
+Chaque tag ("catalog", "product:12", "category:3"...) possède un numéro de
+version stocké dans le cache. La clé d'une entrée inclut les versions de ses
+tags : incrémenter une version rend toutes les entrées dépendantes
+inaccessibles en O(1), sans parcourir les clés. Les entrées orphelines
+expirent d'elles-mêmes avec leur TTL.
+"""
+import hashlib
+import time
+
+from django.core.cache import cache
+from django.db import transaction
+from django.http import HttpResponse
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, quote_etag
+from rest_framework.renderers import JSONRenderer
+
+CATALOG = "catalog"
+CATALOG_CACHE_TTL = 60 * 60 * 24
+
+VERSION_PREFIX = "tagver"
+
+
+def product_tag(product_id):
+    return f"product:{product_id}"
+
+
+def category_tag(category_id):
+    return f"category:{category_id}"
+
+
+def _version_key(tag):
+    return f"{VERSION_PREFIX}:{tag}"
+
+
+def _new_version():
+    # Basé sur l'horloge : une version perdue (éviction) n'est jamais réutilisée
+    return int(time.time() * 1000)
+
+
+def get_versions(tags):
+    """Retourne {tag: version} en un seul aller-retour vers le cache."""
+    keys = {_version_key(tag): tag for tag in tags}
+    found = cache.get_many(list(keys))
+    for key in keys.keys() - found.keys():
+        cache.add(key, _new_version(), timeout=None)
+        found[key] = cache.get(key) or 0
+    return {tag: found[key] for key, tag in keys.items()}
+
+
+def versioned_key(name, tags):
+    versions = get_versions(tags)
+    return f"{name}:" + ".".join(f"{versions[tag]}" for tag in tags)
+
+
+def bump(*tags):
+    """Invalide toutes les entrées dépendant des tags donnés."""
+    for tag in tags:
+        key = _version_key(tag)
+        try:
+            cache.incr(key)
+        except ValueError:
+            cache.set(key, _new_version(), timeout=None)
+
+
+def bump_on_commit(*tags):
+    """Invalide après le commit, pour ne pas remettre en cache l'état précédent."""
+    transaction.on_commit(lambda: bump(*tags))
+
+
+def cached(name, tags, builder, timeout=CATALOG_CACHE_TTL):
+    """Retourne l'entrée `name` pour les versions courantes de `tags`, ou la construit."""
+    key = versioned_key(name, tags)
+    data = cache.get(key)
+    if data is None:
+        data = builder()
+        cache.set(key, data, timeout=timeout)
+    return data
+
+
+def _last_modified(name, etag):
+    """
+    Date de dernière modification du corps de `name`, mémorisée hors version :
+    inchangée si le corps reconstruit est identique, sinon strictement
+    postérieure à la précédente, pour que deux corps différents construits
+    dans la même seconde n'aient jamais le même Last-Modified.
+    """
+    key = f"last_modified:{name}"
+    previous = cache.get(key)
+    if previous and previous["etag"] == etag:
+        return previous["last_modified"]
+    last_modified = int(time.time())
+    if previous:
+        last_modified = max(last_modified, previous["last_modified"] + 1)
+    cache.set(key, {"etag": etag, "last_modified": last_modified}, timeout=None)
+    return last_modified
+
+
+def cached_response(request, name, tags, builder, timeout=CATALOG_CACHE_TTL):
+    """
+    Réponse JSON mise en cache sous forme d'octets déjà rendus, avec ETag
+    (empreinte du corps) et Last-Modified (date du dernier changement du
+    corps, voir _last_modified). Un client à jour reçoit un 304 sans
+    sérialisation ni rendu.
+    """
+    key = versioned_key(name, tags)
+    entry = cache.get(key)
+    if entry is None:
+        body = JSONRenderer().render(builder())
+        etag = quote_etag(hashlib.md5(body).hexdigest())
+        entry = {"body": body, "etag": etag, "last_modified": _last_modified(name, etag)}
+        cache.set(key, entry, timeout=timeout)
+
+    response = get_conditional_response(request, etag=entry["etag"], last_modified=entry["last_modified"])
+    if response is None:
+        response = HttpResponse(entry["body"], content_type="application/json")
+    response.headers["ETag"] = entry["etag"]
+    response.headers["Last-Modified"] = http_date(entry["last_modified"])
+    return response
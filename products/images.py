@@ -0,0 +1,113 @@
+# images.py
+"""
+Génération des dérivés d'images produit (miniatures, WebP).
+
+Les dérivés sont écrits à un chemin déterministe (products/variants/<id>/<nom>.<ext>)
+et `variants_source` mémorise l'original à partir duquel ils ont été produits :
+relancer la génération sur une image à jour ne fait rien.
+"""
+import logging
+from io import BytesIO
+
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from orders.models import OrderItem
+from PIL import Image, ImageOps
+
+from .caching import CATALOG, bump, product_tag
+from .models import IMAGE_VARIANTS, PRIMARY_IMAGE_ORDERING, Product, ProductImage
+
+logger = logging.getLogger(__name__)
+
+EXTENSIONS = {"JPEG": "jpg", "WEBP": "webp"}
+
+
+def variant_path(image, name, image_format):
+    return f"products/variants/{image.pk}/{name}.{EXTENSIONS[image_format]}"
+
+
+def referenced_by_orders(paths):
+    """Chemins de `paths` encore affichés par des commandes (OrderItem.thumbnail) : à conserver."""
+    return set(OrderItem.objects.filter(thumbnail__in=list(paths)).values_list("thumbnail", flat=True).distinct())
+
+
+def needs_variants(image):
+    return bool(image.image) and (
+        image.variants_source != image.image.name or set(image.variants) != set(IMAGE_VARIANTS)
+    )
+
+
+def _render(source, size, image_format):
+    picture = source.copy()
+    picture.thumbnail(size, Image.LANCZOS)
+    if image_format == "JPEG" and picture.mode not in ("RGB", "L"):
+        picture = picture.convert("RGB")
+    buffer = BytesIO()
+    picture.save(buffer, format=image_format, quality=82, optimize=True)
+    return buffer.getvalue()
+
+
+def sync_primary_image(product_id):
+    """
+    Recopie sur le produit le chemin de son image principale et de sa
+    miniature (l'original tant que les dérivés n'existent pas).
+    Retourne True si le produit a été modifié.
+    """
+    image = (
+        ProductImage.objects.filter(product_id=product_id)
+        .order_by(*PRIMARY_IMAGE_ORDERING)
+        .only("image", "variants")
+        .first()
+    )
+    primary_image = image.image.name if image else ""
+    primary_thumbnail = image.variants.get("thumbnail_webp", primary_image) if image else ""
+    return bool(
+        Product.objects.filter(pk=product_id)
+        .exclude(primary_image=primary_image, primary_thumbnail=primary_thumbnail)
+        .update(primary_image=primary_image, primary_thumbnail=primary_thumbnail)
+    )
+
+
+def generate_variants(image, force=False):
+    """Crée les dérivés manquants d'une image. Retourne True si quelque chose a été écrit."""
+    if not force and not needs_variants(image):
+        return False
+
+    with image.image.open("rb") as original:
+        source = ImageOps.exif_transpose(Image.open(original))
+        source.load()
+
+    variants = {}
+    kept = referenced_by_orders(image.variants.values())
+    for name, (width, height, image_format) in IMAGE_VARIANTS.items():
+        path = variant_path(image, name, image_format)
+        # Un dérivé affiché par une commande n'est pas écrasé : le stockage choisit un autre nom
+        if default_storage.exists(path) and path not in kept:
+            default_storage.delete(path)
+        variants[name] = default_storage.save(path, ContentFile(_render(source, (width, height), image_format)))
+
+    # update() : pas de signal post_save, donc pas de nouvelle génération
+    ProductImage.objects.filter(pk=image.pk).update(variants=variants, variants_source=image.image.name)
+    image.variants, image.variants_source = variants, image.image.name
+    sync_primary_image(image.product_id)
+    bump(CATALOG, product_tag(image.product_id))
+    return True
+
+
+def generate_variants_for(image_ids, force=False):
+    """Traite un lot d'images ; une image illisible n'interrompt pas le lot."""
+    generated = 0
+    for image in ProductImage.objects.filter(pk__in=image_ids):
+        try:
+            generated += generate_variants(image, force=force)
+        except (OSError, ValueError):
+            logger.exception("Impossible de générer les dérivés de l'image %s", image.pk)
+    return generated
+
+
+def pending_image_ids(force=False):
+    """Identifiants des images dont les dérivés sont absents ou périmés."""
+    images = ProductImage.objects.only("id", "image", "variants", "variants_source").order_by("id")
+    for image in images.iterator(chunk_size=1000):
+        if force or needs_variants(image):
+            yield image.pk
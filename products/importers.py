@@ -0,0 +1,172 @@
+# importers.py
+"""
+Import en masse du catalogue fournisseur (CSV ou JSONL).
+
+Le fichier est lu en flux et traité par lots : chaque lot est validé, puis
+écrit dans sa propre transaction par deux upserts (produits sur `sku`,
+caractéristiques sur (produit, nom)). La mémoire utilisée dépend de la taille
+des lots, pas de celle du fichier.
+
+Colonnes : sku, name, description, price, stock, weight, length, width,
+height, category (nom de la catégorie), specifications (objet JSON
+{nom: valeur} ; en CSV, sérialisé dans la cellule). Les colonnes
+facultatives absentes ne modifient pas les produits existants.
+"""
+import csv
+import json
+from collections import defaultdict
+from decimal import Decimal
+from itertools import islice
+
+from django.db import transaction
+from rest_framework import serializers
+
+from .caching import CATALOG, bump_on_commit, category_tag, product_tag
+from .models import Category, Product, ProductSpecification
+
+FORMATS = ("csv", "jsonl")
+DEFAULT_CHUNK_SIZE = 1000
+# Les erreurs au-delà de ce nombre sont comptées mais pas détaillées
+MAX_REPORTED_ERRORS = 100
+
+REQUIRED_FIELDS = ["name", "price", "weight"]
+# Colonnes facultatives : absentes du fichier (ou vides), elles ne sont pas
+# écrasées sur les produits existants et prennent la valeur par défaut à la création
+OPTIONAL_FIELDS = ["description", "stock", "length", "width", "height"]
+DEFAULTS = {"description": ""}
+
+
+class ProductImportRowSerializer(serializers.Serializer):
+    sku = serializers.CharField(max_length=100)
+    name = serializers.CharField(max_length=255)
+    description = serializers.CharField(allow_blank=True, required=False)
+    price = serializers.DecimalField(max_digits=10, decimal_places=2, min_value=Decimal("0"))
+    stock = serializers.IntegerField(min_value=0, required=False)
+    weight = serializers.DecimalField(max_digits=10, decimal_places=2)
+    length = serializers.DecimalField(max_digits=10, decimal_places=2, required=False, allow_null=True)
+    width = serializers.DecimalField(max_digits=10, decimal_places=2, required=False, allow_null=True)
+    height = serializers.DecimalField(max_digits=10, decimal_places=2, required=False, allow_null=True)
+    category = serializers.CharField(max_length=255)
+    specifications = serializers.DictField(child=serializers.CharField(max_length=255), required=False, default=dict)
+
+    def to_internal_value(self, data):
+        # Cellules CSV : chaînes vides = valeur absente, specifications en JSON
+        data = {key: value for key, value in data.items() if value not in ("", None)}
+        if isinstance(data.get("specifications"), str):
+            try:
+                data["specifications"] = json.loads(data["specifications"])
+            except json.JSONDecodeError:
+                raise serializers.ValidationError({"specifications": "Invalid JSON format for specifications."})
+        return super().to_internal_value(data)
+
+    def validate_category(self, value):
+        category_id = self.context["categories"].get(value.lower())
+        if category_id is None:
+            raise serializers.ValidationError(f"Unknown category '{value}'.")
+        return category_id
+
+
+def iter_rows(stream, file_format):
+    """Itère sur (numéro de ligne, dict) d'un flux texte CSV ou JSONL."""
+    if file_format == "csv":
+        reader = csv.DictReader(stream)
+        for row in reader:
+            yield reader.line_num, row
+    elif file_format == "jsonl":
+        for line_number, line in enumerate(stream, start=1):
+            if not line.strip():
+                continue
+            try:
+                row = json.loads(line)
+            except json.JSONDecodeError:
+                row = None
+            yield line_number, row if isinstance(row, dict) else {"__invalid__": line}
+    else:
+        raise ValueError(f"Format inconnu : {file_format} ({', '.join(FORMATS)})")
+
+
+def _chunks(iterable, size):
+    iterator = iter(iterable)
+    while chunk := list(islice(iterator, size)):
+        yield chunk
+
+
+def _validate(chunk, categories, report):
+    rows = {}
+    for line_number, row in chunk:
+        if "__invalid__" in row:
+            errors = {"non_field_errors": ["Invalid JSON line."]}
+        else:
+            serializer = ProductImportRowSerializer(data=row, context={"categories": categories})
+            if serializer.is_valid():
+                # Un sku répété dans le lot : la dernière ligne l'emporte
+                rows[serializer.validated_data["sku"]] = serializer.validated_data
+                continue
+            errors = serializer.errors
+        report["failed"] += 1
+        if len(report["errors"]) < MAX_REPORTED_ERRORS:
+            report["errors"].append({"line": line_number, "errors": errors})
+    return rows
+
+
+def _write(rows, report):
+    skus = list(rows)
+    with transaction.atomic():
+        existing = {
+            sku: (product_id, category_id)
+            for sku, product_id, category_id in Product.objects.filter(sku__in=skus).values_list("sku", "id", "category_id")
+        }
+        # Un upsert par ensemble de colonnes présentes (en pratique un seul par fichier)
+        groups = defaultdict(list)
+        for sku, row in rows.items():
+            groups[tuple(field for field in OPTIONAL_FIELDS if field in row)].append((sku, row))
+        for present, group in groups.items():
+            fields = REQUIRED_FIELDS + list(present)
+            Product.objects.bulk_create(
+                [
+                    Product(sku=sku, category_id=row["category"], **{**DEFAULTS, **{field: row[field] for field in fields}})
+                    for sku, row in group
+                ],
+                update_conflicts=True,
+                unique_fields=["sku"],
+                update_fields=fields + ["category", "updated_at"],
+            )
+        product_ids = dict(Product.objects.filter(sku__in=skus).values_list("sku", "id"))
+        ProductSpecification.objects.bulk_create(
+            [
+                ProductSpecification(product_id=product_ids[sku], name=name, value=value)
+                for sku, row in rows.items()
+                for name, value in row["specifications"].items()
+            ],
+            update_conflicts=True,
+            unique_fields=["product", "name"],
+            update_fields=["value"],
+        )
+        # bulk_create n'envoie pas de signaux : invalidation explicite (voir products.signals)
+        tags = {CATALOG}
+        tags.update(product_tag(product_id) for product_id, _ in existing.values())
+        tags.update(category_tag(category_id) for _, category_id in existing.values())
+        tags.update(category_tag(row["category"]) for row in rows.values())
+        bump_on_commit(*tags)
+
+    report["created"] += len(rows) - len(existing)
+    report["updated"] += len(existing)
+
+
+def import_products(stream, file_format, chunk_size=DEFAULT_CHUNK_SIZE, progress=None):
+    """
+    Importe un flux CSV/JSONL de produits. Chaque lot est validé puis écrit dans
+    sa propre transaction ; `progress(report)` est appelé après chaque lot.
+    Retourne le rapport {rows, created, updated, failed, errors}.
+    """
+    categories = {name.lower(): pk for pk, name in Category.objects.values_list("id", "name")}
+    report = {"rows": 0, "created": 0, "updated": 0, "failed": 0, "errors": []}
+
+    for chunk in _chunks(iter_rows(stream, file_format), chunk_size):
+        report["rows"] += len(chunk)
+        rows = _validate(chunk, categories, report)
+        if rows:
+            _write(rows, report)
+        if progress:
+            progress(report)
+    return report
@@ -0,0 +1,36 @@
+import time
+
+import numpy as np
+from django.core.management.base import BaseCommand
+
+from products.recommendations import DEFAULT_TOP_K, build_neighbours
+
+
+class Command(BaseCommand):
+    help = "Mesure le temps de calcul des recommandations sur des commandes synthétiques (sans base de données)."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--items", type=int, default=1_000_000, help="Nombre de lignes de commande")
+        parser.add_argument("--products", type=int, default=20_000)
+        parser.add_argument("--basket-size", type=float, default=3.0, help="Taille moyenne des paniers")
+        parser.add_argument("--top-k", type=int, default=DEFAULT_TOP_K)
+        parser.add_argument("--seed", type=int, default=0)
+
+    def handle(self, *args, **options):
+        rng = np.random.default_rng(options["seed"])
+        items = options["items"]
+
+        # Paniers de taille géométrique, popularité des produits en loi de Zipf
+        sizes = rng.geometric(1 / options["basket_size"], size=items)
+        sizes = sizes[np.cumsum(sizes) <= items]
+        order_ids = np.repeat(np.arange(len(sizes)), sizes)
+        product_ids = (rng.zipf(1.3, size=len(order_ids)) - 1) % options["products"]
+
+        started = time.perf_counter()
+        source, _, _, _ = build_neighbours(order_ids, product_ids, top_k=options["top_k"])
+        elapsed = time.perf_counter() - started
+
+        self.stdout.write(
+            f"{len(order_ids)} lignes, {len(sizes)} commandes, {len(np.unique(source))} produits avec voisins, "
+            f"{len(source)} paires top-{options['top_k']} : {elapsed:.2f}s"
+        )
@@ -0,0 +1,38 @@
+from django.core.management.base import BaseCommand
+
+from products.images import generate_variants_for, pending_image_ids
+from products.tasks import generate_image_variants_task
+
+
+class Command(BaseCommand):
+    help = "Génère les miniatures et variantes WebP des images produit qui n'en ont pas encore."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=50)
+        parser.add_argument("--force", action="store_true", help="Régénérer même les dérivés à jour")
+        parser.add_argument("--sync", action="store_true", help="Traiter sur place au lieu de passer par Celery")
+
+    def handle(self, *args, **options):
+        batch_size, force = options["batch_size"], options["force"]
+        batches = generated = 0
+        batch = []
+        for image_id in pending_image_ids(force=force):
+            batch.append(image_id)
+            if len(batch) == batch_size:
+                generated += self._process(batch, force, options["sync"])
+                batches += 1
+                batch = []
+        if batch:
+            generated += self._process(batch, force, options["sync"])
+            batches += 1
+
+        if options["sync"]:
+            self.stdout.write(self.style.SUCCESS(f"{generated} image(s) traitée(s) en {batches} lot(s)."))
+        else:
+            self.stdout.write(self.style.SUCCESS(f"{batches} lot(s) envoyé(s) à Celery."))
+
+    def _process(self, batch, force, sync):
+        if sync:
+            return generate_variants_for(batch, force=force)
+        generate_image_variants_task.delay(batch, force=force)
+        return 0
@@ -0,0 +1,35 @@
+from pathlib import Path
+
+from django.core.management.base import BaseCommand, CommandError
+
+from products.importers import DEFAULT_CHUNK_SIZE, FORMATS, import_products
+
+
+class Command(BaseCommand):
+    help = "Importe un catalogue produits (CSV ou JSONL) par lots, avec upsert sur le sku."
+
+    def add_arguments(self, parser):
+        parser.add_argument("path")
+        parser.add_argument("--format", dest="file_format", choices=FORMATS, help="Déduit de l'extension par défaut")
+        parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE)
+
+    def handle(self, *args, **options):
+        path = Path(options["path"])
+        file_format = options["file_format"] or path.suffix.lstrip(".").lower()
+        if file_format not in FORMATS:
+            raise CommandError(f"Format inconnu : {file_format} ({', '.join(FORMATS)})")
+
+        def progress(report):
+            self.stdout.write(
+                f"{report['rows']} ligne(s) lue(s) : {report['created']} créé(s), "
+                f"{report['updated']} mis à jour, {report['failed']} en erreur"
+            )
+
+        with path.open(encoding="utf-8-sig", newline="") as stream:
+            report = import_products(stream, file_format, chunk_size=options["chunk_size"], progress=progress)
+
+        for error in report["errors"]:
+            self.stderr.write(f"Ligne {error['line']} : {error['errors']}")
+        self.stdout.write(self.style.SUCCESS(
+            f"Import terminé : {report['created']} créé(s), {report['updated']} mis à jour, {report['failed']} en erreur."
+        ))
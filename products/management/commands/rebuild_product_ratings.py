@@ -0,0 +1,18 @@
+from django.core.management.base import BaseCommand
+
+from products.ratings import rebuild_rating_summaries
+
+
+class Command(BaseCommand):
+    help = "Recalcule les agrégats des avis (moyenne, nombre, histogramme) de chaque produit."
+
+    def add_arguments(self, parser):
+        parser.add_argument("product_ids", nargs="*", type=int, help="Limiter aux produits indiqués")
+        parser.add_argument("--batch-size", type=int, default=1000)
+
+    def handle(self, *args, **options):
+        fixed = rebuild_rating_summaries(
+            product_ids=options["product_ids"] or None,
+            batch_size=options["batch_size"],
+        )
+        self.stdout.write(self.style.SUCCESS(f"{fixed} produit(s) mis à jour."))
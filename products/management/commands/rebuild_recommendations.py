@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from products.recommendations import DEFAULT_TOP_K, rebuild_recommendations
+
+
+class Command(BaseCommand):
+    help = "Recalcule les recommandations « achetés ensemble » depuis l'historique des commandes payées."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--top-k", type=int, default=DEFAULT_TOP_K)
+
+    def handle(self, *args, **options):
+        count = rebuild_recommendations(top_k=options["top_k"])
+        self.stdout.write(self.style.SUCCESS(f"{count} recommandation(s) enregistrée(s)."))
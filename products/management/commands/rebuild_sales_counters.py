@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from products.sales import rebuild_sales_counters
+
+
+class Command(BaseCommand):
+    help = "Recalcule les compteurs de ventes (cumul et par jour) depuis les commandes payées."
+
+    def handle(self, *args, **options):
+        count = rebuild_sales_counters()
+        self.stdout.write(self.style.SUCCESS(f"Compteurs recalculés pour {count} produit(s)."))
@@ -0,0 +1,73 @@
+# Generated by Django 5.0.4 on 2026-10-18 09:38
+
+from django.db import migrations, models
+from django.db.models import Count
+
+
+def backfill_rating_summary(apps, schema_editor):
+    Product = apps.get_model("products", "Product")
+    ProductReview = apps.get_model("products", "ProductReview")
+
+    summaries = {}
+    rows = ProductReview.objects.values("product_id", "rating").annotate(total=Count("id"))
+    for row in rows:
+        summary = summaries.setdefault(row["product_id"], {"rating_count": 0, "rating_sum": 0})
+        summary["rating_count"] += row["total"]
+        summary["rating_sum"] += row["rating"] * row["total"]
+        if 1 <= row["rating"] <= 5:
+            field = f"rating_{row['rating']}"
+            summary[field] = summary.get(field, 0) + row["total"]
+
+    for product_id, summary in summaries.items():
+        Product.objects.filter(pk=product_id).update(**summary)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("products", "0002_initial"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="product",
+            name="rating_1",
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name="product",
+            name="rating_2",
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name="product",
+            name="rating_3",
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name="product",
+            name="rating_4",
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name="product",
+            name="rating_5",
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name="product",
+            name="rating_count",
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name="product",
+            name="rating_sum",
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AlterField(
+            model_name="productreview",
+            name="rating",
+            field=models.PositiveIntegerField(default=5),
+        ),
+        migrations.RunPython(backfill_rating_summary, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.0.4 on 2026-10-18 09:45
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("products", "0007_product_recommendations"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="productimage",
+            name="variants",
+            field=models.JSONField(blank=True, default=dict),
+        ),
+        migrations.AddField(
+            model_name="productimage",
+            name="variants_source",
+            field=models.CharField(blank=True, default="", max_length=255),
+        ),
+    ]
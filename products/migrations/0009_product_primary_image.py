@@ -0,0 +1,39 @@
+# Generated by Django 5.0.4 on 2026-10-18 10:05
+
+from django.db import migrations, models
+
+
+def fill_primary_images(apps, schema_editor):
+    Product = apps.get_model("products", "Product")
+    ProductImage = apps.get_model("products", "ProductImage")
+    seen = set()
+    images = ProductImage.objects.order_by("product_id", "-is_primary", "id").only("product_id", "image", "variants")
+    for image in images.iterator(chunk_size=1000):
+        if image.product_id in seen:
+            continue
+        seen.add(image.product_id)
+        Product.objects.filter(pk=image.product_id).update(
+            primary_image=image.image.name,
+            primary_thumbnail=image.variants.get("thumbnail_webp", image.image.name),
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("products", "0008_productimage_variants"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="product",
+            name="primary_image",
+            field=models.CharField(blank=True, default="", max_length=255),
+        ),
+        migrations.AddField(
+            model_name="product",
+            name="primary_thumbnail",
+            field=models.CharField(blank=True, default="", max_length=255),
+        ),
+        migrations.RunPython(fill_primary_images, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,27 @@
+# Generated by Django 5.0.4 on 2026-10-18 10:35
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("products", "0010_product_rating_not_editable"),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="product",
+            name="primary_image",
+            field=models.CharField(
+                blank=True, default="", editable=False, max_length=255
+            ),
+        ),
+        migrations.AlterField(
+            model_name="product",
+            name="primary_thumbnail",
+            field=models.CharField(
+                blank=True, default="", editable=False, max_length=255
+            ),
+        ),
+    ]
@@ -1,6 +1,17 @@
 from django.conf import settings
 from django.db import models
-from django.db.models import Avg, Count
+
+RATING_STARS = range(1, 6)
+
+# nom -> (largeur max, hauteur max, format)
+IMAGE_VARIANTS = {
+    "thumbnail": (200, 200, "JPEG"),
+    "thumbnail_webp": (200, 200, "WEBP"),
+    "medium_webp": (800, 800, "WEBP"),
+}
+
+# Image affichée pour un produit : l'image principale, sinon la plus ancienne
+PRIMARY_IMAGE_ORDERING = ("-is_primary", "id")
 
 
 class Category(models.Model):
@@ -28,12 +39,48 @@ class Product(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    # Agrégats des avis, maintenus de manière incrémentale par products.signals ;
+    # non modifiables (admin, API) : un formulaire réécrirait des valeurs périmées
+    rating_count = models.PositiveIntegerField(default=0, editable=False)
+    rating_sum = models.PositiveIntegerField(default=0, editable=False)
+    rating_1 = models.PositiveIntegerField(default=0, editable=False)
+    rating_2 = models.PositiveIntegerField(default=0, editable=False)
+    rating_3 = models.PositiveIntegerField(default=0, editable=False)
+    rating_4 = models.PositiveIntegerField(default=0, editable=False)
+    rating_5 = models.PositiveIntegerField(default=0, editable=False)
+
+    # Chemins de l'image principale et de sa miniature, maintenus par products.images.sync_primary_image
+    primary_image = models.CharField(max_length=255, blank=True, default="", editable=False)
+    primary_thumbnail = models.CharField(max_length=255, blank=True, default="", editable=False)
+
+    class Meta:
+        indexes = [
+            # Index composites utilisés par la pagination keyset du catalogue
+            models.Index(fields=["created_at", "id"], name="product_created_id_idx"),
+            models.Index(fields=["price", "id"], name="product_price_id_idx"),
+        ]
+
+    # Maintenus par des UPDATE (products.ratings, products.images) : save() sur une instance
+    # chargée auparavant (admin, API) ne doit pas les réécrire avec des valeurs périmées
+    DENORMALIZED_FIELDS = {
+        "rating_count", "rating_sum", "rating_1", "rating_2", "rating_3", "rating_4", "rating_5",
+        "primary_image", "primary_thumbnail",
+    }
+
     def __str__(self):
         return self.name
 
     def __str__(self):
         return self.name
 
+    def save(self, *args, **kwargs):
+        if not self._state.adding and kwargs.get("update_fields") is None and not kwargs.get("force_insert"):
+            kwargs["update_fields"] = [
+                field.name for field in self._meta.concrete_fields
+                if not field.primary_key and field.name not in self.DENORMALIZED_FIELDS
+            ]
+        super().save(*args, **kwargs)
+
     def is_in_stock(self):
         return self.stock > 0
 
@@ -45,11 +92,25 @@ class Product(models.Model):
     
     @property
     def average_rating(self):
-        return self.reviews.aggregate(Avg('rating'))['rating__avg'] or 3
+        if not self.rating_count:
+            return 3
+        return self.rating_sum / self.rating_count
 
     @property
     def review_count(self):
-        return self.reviews.aggregate(Count('id'))['id__count'] or 10
+        return self.rating_count or 10
+
+    @property
+    def rating_histogram(self):
+        return {star: getattr(self, f"rating_{star}") for star in RATING_STARS}
+
+    @property
+    def primary_image_url(self):
+        return f"{settings.MEDIA_URL}{self.primary_image}" if self.primary_image else None
+
+    @property
+    def primary_thumbnail_url(self):
+        return f"{settings.MEDIA_URL}{self.primary_thumbnail}" if self.primary_thumbnail else None
 
 
 class ProductImage(models.Model):
@@ -59,11 +120,20 @@ class ProductImage(models.Model):
     is_primary = models.BooleanField(default=False)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
+    # Dérivés redimensionnés {nom: chemin}, générés par products.images
+    variants = models.JSONField(default=dict, blank=True)
+    variants_source = models.CharField(max_length=255, blank=True, default="")
 
 
     def __str__(self):
         return f"{self.product.name}"
 
+    def variant_urls(self):
+        """URLs des dérivés disponibles, l'original servant de repli tant qu'ils ne sont pas générés."""
+        original = f"{settings.MEDIA_URL}{self.image.name}"
+        urls = {name: f"{settings.MEDIA_URL}{path}" for name, path in self.variants.items()}
+        return {name: urls.get(name, original) for name in IMAGE_VARIANTS}
+
 
 
 class ProductReview(models.Model):
@@ -102,3 +172,43 @@ class ProductSpecification(models.Model):
 
     def __str__(self):
         return f"{self.product.name} - {self.name}: {self.value}"
+
+
+class ProductSalesCounter(models.Model):
+    """Ventes cumulées d'un produit (commandes payées), maintenues par products.sales."""
+    product = models.OneToOneField("Product", on_delete=models.CASCADE, related_name="sales_counter")
+    units_sold = models.PositiveIntegerField(default=0, db_index=True)
+    revenue = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.product_id}: {self.units_sold}"
+
+
+class ProductDailySales(models.Model):
+    """Ventes d'un produit par jour, pour les classements sur 7 / 30 jours."""
+    product = models.ForeignKey("Product", on_delete=models.CASCADE, related_name="daily_sales")
+    day = models.DateField(db_index=True)
+    units_sold = models.PositiveIntegerField(default=0)
+    revenue = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+
+    class Meta:
+        unique_together = ("product", "day")
+
+    def __str__(self):
+        return f"{self.product_id} @ {self.day}: {self.units_sold}"
+
+
+class ProductRecommendation(models.Model):
+    """Voisins d'un produit (achats conjoints), calculés hors ligne par products.recommendations."""
+    product = models.ForeignKey("Product", on_delete=models.CASCADE, related_name="recommendations")
+    recommended = models.ForeignKey("Product", on_delete=models.CASCADE, related_name="recommended_for")
+    score = models.FloatField()
+    rank = models.PositiveSmallIntegerField()
+
+    class Meta:
+        unique_together = ("product", "rank")
+        ordering = ["product", "rank"]
+
+    def __str__(self):
+        return f"{self.product_id} -> {self.recommended_id} ({self.score:.3f})"
@@ -0,0 +1,78 @@
+# pagination.py
+import base64
+import json
+
+from django.core import exceptions
+from django.db.models import Q
+from rest_framework.exceptions import ValidationError
+
+
+class KeysetPagination:
+    """
+    Pagination par curseur (keyset) : la page suivante est filtrée sur le
+    couple (champ de tri, id) du dernier élément au lieu d'un OFFSET, ce qui
+    garde un coût constant quelle que soit la profondeur de la page.
+    """
+    page_size = 24
+    max_page_size = 100
+    default_ordering = '-created_at'
+    # ordering -> (champ, ordre décroissant)
+    orderings = {
+        '-created_at': ('created_at', True),
+        'created_at': ('created_at', False),
+        'price': ('price', False),
+        '-price': ('price', True),
+    }
+
+    def __init__(self, request):
+        params = request.query_params
+        self.ordering = params.get('ordering') or self.default_ordering
+        if self.ordering not in self.orderings:
+            raise ValidationError({"ordering": f"Valeurs possibles : {', '.join(self.orderings)}."})
+        self.field, self.descending = self.orderings[self.ordering]
+
+        try:
+            self.size = min(max(int(params.get('page_size', self.page_size)), 1), self.max_page_size)
+        except ValueError:
+            raise ValidationError({"page_size": "Taille de page invalide."})
+
+        self.cursor = params.get('cursor') or None
+        self.position = self.decode_cursor(self.cursor) if self.cursor else None
+
+    @property
+    def cache_key(self):
+        return f"{self.ordering}:{self.size}:{self.cursor or ''}"
+
+    def decode_cursor(self, cursor):
+        try:
+            value, pk = json.loads(base64.urlsafe_b64decode(cursor.encode()).decode())
+            return value, int(pk)
+        except (ValueError, TypeError):
+            raise ValidationError({"cursor": "Curseur invalide."})
+
+    def encode_cursor(self, obj):
+        value = getattr(obj, self.field)
+        value = value.isoformat() if hasattr(value, 'isoformat') else str(value)
+        return base64.urlsafe_b64encode(json.dumps([value, obj.pk]).encode()).decode()
+
+    def paginate_queryset(self, queryset):
+        """Retourne (éléments de la page, curseur de la page suivante ou None)."""
+        prefix = '-' if self.descending else ''
+        queryset = queryset.order_by(f'{prefix}{self.field}', f'{prefix}id')
+
+        if self.position is not None:
+            value, pk = self.position
+            try:
+                value = queryset.model._meta.get_field(self.field).to_python(value)
+            except exceptions.ValidationError:
+                raise ValidationError({"cursor": "Curseur invalide."})
+            lookup = 'lt' if self.descending else 'gt'
+            queryset = queryset.filter(
+                Q(**{f'{self.field}__{lookup}': value})
+                | Q(**{self.field: value, f'id__{lookup}': pk})
+            )
+
+        # Un élément de plus que la taille de page suffit à savoir s'il reste une page suivante
+        items = list(queryset[:self.size + 1])
+        next_cursor = self.encode_cursor(items[self.size - 1]) if len(items) > self.size else None
+        return items[:self.size], next_cursor
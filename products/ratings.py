@@ -0,0 +1,73 @@
+# ratings.py
+from collections import defaultdict
+
+from django.db import transaction
+from django.db.models import Count, F
+
+from .models import RATING_STARS, Product, ProductReview
+
+RATING_FIELDS = ["rating_count", "rating_sum"] + [f"rating_{star}" for star in RATING_STARS]
+
+
+def _delta_updates(rating, sign):
+    updates = {
+        "rating_count": F("rating_count") + sign,
+        "rating_sum": F("rating_sum") + sign * rating,
+    }
+    if rating in RATING_STARS:
+        updates[f"rating_{rating}"] = F(f"rating_{rating}") + sign
+    return updates
+
+
+def add_review_rating(product_id, rating):
+    """Ajoute une note aux agrégats du produit (une seule requête UPDATE)."""
+    Product.objects.filter(pk=product_id).update(**_delta_updates(rating, 1))
+
+
+def remove_review_rating(product_id, rating):
+    """Retire une note des agrégats du produit (une seule requête UPDATE)."""
+    Product.objects.filter(pk=product_id).update(**_delta_updates(rating, -1))
+
+
+def rebuild_rating_summaries(product_ids=None, batch_size=1000):
+    """
+    Recalcule les agrégats des avis à partir de la table ProductReview.
+    Retourne le nombre de produits dont les agrégats ont été corrigés.
+    """
+    reviews = ProductReview.objects.all()
+    products = Product.objects.only("id", *RATING_FIELDS).order_by("id")
+    if product_ids is not None:
+        reviews = reviews.filter(product_id__in=product_ids)
+        products = products.filter(id__in=product_ids)
+
+    # Une seule requête groupée pour toutes les notes
+    summaries = defaultdict(lambda: dict.fromkeys(RATING_FIELDS, 0))
+    for row in reviews.values("product_id", "rating").annotate(total=Count("id")):
+        summary = summaries[row["product_id"]]
+        summary["rating_count"] += row["total"]
+        summary["rating_sum"] += row["rating"] * row["total"]
+        if row["rating"] in RATING_STARS:
+            summary[f"rating_{row['rating']}"] += row["total"]
+
+    fixed = 0
+    batch = []
+    empty = dict.fromkeys(RATING_FIELDS, 0)
+    for product in products.iterator(chunk_size=batch_size):
+        expected = summaries.get(product.id, empty)
+        if all(getattr(product, field) == value for field, value in expected.items()):
+            continue
+        for field, value in expected.items():
+            setattr(product, field, value)
+        batch.append(product)
+        if len(batch) >= batch_size:
+            fixed += _flush(batch)
+            batch = []
+    fixed += _flush(batch)
+    return fixed
+
+
+def _flush(batch):
+    if batch:
+        with transaction.atomic():
+            Product.objects.bulk_update(batch, RATING_FIELDS)
+    return len(batch)
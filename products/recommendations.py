@@ -0,0 +1,146 @@
+# recommendations.py
+"""
+Recommandations « achetés ensemble », calculées hors ligne.
+
+La matrice d'incidence commande × produit est construite en COO avec NumPy,
+puis la matrice de co-occurrence C = AᵀA est obtenue en générant les paires
+de chaque panier de manière vectorisée. Le score est la similarité cosinus
+C[i, j] / sqrt(n_i * n_j), où n_i est le nombre de commandes contenant i.
+Les top-k voisins de chaque produit sont stockés dans ProductRecommendation.
+"""
+import logging
+import time
+
+import numpy as np
+from django.db import transaction
+from django.db.models import Sum
+from orders.models import OrderItem
+
+from .caching import bump_on_commit
+from .models import Product, ProductRecommendation
+
+logger = logging.getLogger(__name__)
+
+RECOMMENDATIONS = "recommendations"
+DEFAULT_TOP_K = 10
+# Les très gros paniers (grossistes, imports) coûtent O(n²) paires pour peu d'information
+MAX_BASKET_SIZE = 50
+
+
+def build_neighbours(order_ids, product_ids, top_k=DEFAULT_TOP_K, max_basket_size=MAX_BASKET_SIZE):
+    """
+    Calcule les top-k voisins de chaque produit à partir des lignes de commande.
+
+    `order_ids` et `product_ids` sont deux séquences alignées (une entrée par
+    OrderItem). Retourne les tableaux (produit, voisin, score, rang).
+    """
+    order_ids = np.asarray(order_ids, dtype=np.int64)
+    product_ids = np.asarray(product_ids, dtype=np.int64)
+    empty = np.array([], dtype=np.int64)
+    if not len(order_ids):
+        return empty, empty, np.array([], dtype=np.float64), empty
+
+    products, cols = np.unique(product_ids, return_inverse=True)
+    _, rows = np.unique(order_ids, return_inverse=True)
+    n_products = len(products)
+
+    # Incidence binaire en COO, triée par commande (un produit compte une fois par commande)
+    cells = np.unique(rows * n_products + cols)
+    rows, cols = cells // n_products, cells % n_products
+
+    # Nombre de commandes contenant chaque produit (diagonale de AᵀA)
+    frequency = np.bincount(cols, minlength=n_products)
+
+    basket_sizes = np.bincount(rows)
+    sizes = basket_sizes[rows]
+    keep = (sizes >= 2) & (sizes <= max_basket_size)
+    rows, cols, sizes = rows[keep], cols[keep], sizes[keep]
+
+    # Chaque entrée est appariée avec toutes les entrées de son panier
+    row_starts = np.searchsorted(rows, rows)
+    left = np.repeat(cols, sizes)
+    offsets = np.arange(len(left)) - np.repeat(np.cumsum(sizes) - sizes, sizes)
+    right = cols[np.repeat(row_starts, sizes) + offsets]
+    distinct = left != right
+
+    pairs, co_counts = np.unique(left[distinct] * n_products + right[distinct], return_counts=True)
+    source, target = pairs // n_products, pairs % n_products
+    scores = co_counts / np.sqrt(frequency[source] * frequency[target])
+
+    # Top-k par produit : tri par produit puis score décroissant
+    order = np.lexsort((-scores, source))
+    source, target, scores = source[order], target[order], scores[order]
+    ranks = np.arange(len(source)) - np.searchsorted(source, source)
+    top = ranks < top_k
+    return products[source[top]], products[target[top]], scores[top], ranks[top]
+
+
+def rebuild_recommendations(top_k=DEFAULT_TOP_K, batch_size=5000):
+    """Recalcule et remplace toutes les recommandations. Retourne le nombre de paires stockées."""
+    started = time.monotonic()
+    lines = np.array(
+        list(OrderItem.objects.filter(order__is_paid=True).values_list("order_id", "product_id").iterator(chunk_size=10000)),
+        dtype=np.int64,
+    ).reshape(-1, 2)
+    source, target, scores, ranks = build_neighbours(lines[:, 0], lines[:, 1], top_k=top_k)
+
+    with transaction.atomic():
+        ProductRecommendation.objects.all().delete()
+        ProductRecommendation.objects.bulk_create(
+            (
+                ProductRecommendation(product_id=p, recommended_id=r, score=s, rank=k)
+                for p, r, s, k in zip(source.tolist(), target.tolist(), scores.tolist(), ranks.tolist())
+            ),
+            batch_size=batch_size,
+        )
+    bump_on_commit(RECOMMENDATIONS)
+    logger.info(
+        "Recommandations recalculées : %s lignes, %s paires en %.1fs",
+        len(lines), len(source), time.monotonic() - started,
+    )
+    return len(source)
+
+
+def recommend_for(product_ids, limit=4):
+    """
+    Produits achetés avec `product_ids` (une requête sur les voisins précalculés),
+    complétés par des produits des mêmes catégories si l'historique est insuffisant.
+    """
+    product_ids = list(product_ids)
+    queryset = Product.objects.select_related("category").prefetch_related("images")
+    products = list(
+        queryset.filter(recommended_for__product_id__in=product_ids)
+        .exclude(id__in=product_ids)
+        .annotate(co_purchase_score=Sum("recommended_for__score"))
+        .order_by("-co_purchase_score", "id")[:limit]
+    )
+    if len(products) < limit:
+        excluded = product_ids + [product.id for product in products]
+        products += list(
+            queryset.filter(category__product__id__in=product_ids)
+            .exclude(id__in=excluded)
+            .distinct()[:limit - len(products)]
+        )
+    return products
+
+
+def recommend_for_categories(category_ids, limit=12):
+    """
+    Produits le plus souvent achetés avec des produits de `category_ids`,
+    complétés par des produits de ces catégories. Ne dépend que de l'ensemble
+    des catégories : le résultat se met en cache pour tous les paniers similaires.
+    """
+    category_ids = list(category_ids)
+    queryset = Product.objects.select_related("category").prefetch_related("images")
+    products = list(
+        queryset.filter(recommended_for__product__category_id__in=category_ids)
+        .annotate(co_purchase_score=Sum("recommended_for__score"))
+        .order_by("-co_purchase_score", "id")[:limit]
+    )
+    if len(products) < limit:
+        products += list(
+            queryset.filter(category_id__in=category_ids)
+            .exclude(id__in=[product.id for product in products])
+            .order_by("-rating_count", "id")[:limit - len(products)]
+        )
+    return products
@@ -0,0 +1,129 @@
+# sales.py
+"""
+Classement des meilleures ventes, maintenu de manière incrémentale.
+
+Les ventes sont comptabilisées quand une commande passe à payée
+(orders.services.mark_orders_paid) : un compteur cumulé par produit
+(ProductSalesCounter, index sur units_sold) et un compteur par jour
+(ProductDailySales) pour les fenêtres glissantes. Lire le top N revient à
+parcourir l'index, sans GROUP BY sur OrderItem.
+"""
+from datetime import timedelta
+from decimal import Decimal
+
+from django.db import transaction
+from django.db.models import Case, DecimalField, F, IntegerField, Sum, Value, When
+from django.db.models.functions import Coalesce, TruncDate
+from django.utils import timezone
+from orders.models import OrderItem
+
+from .caching import bump_on_commit
+from .models import Product, ProductDailySales, ProductSalesCounter
+
+SALES = "sales"
+WINDOWS = {"7d": 7, "30d": 30}
+
+
+def _increments(lines, field, output_field):
+    return F(field) + Case(
+        *[When(product_id=product_id, then=Value(line[field])) for product_id, line in lines.items()],
+        default=Value(0),
+        output_field=output_field,
+    )
+
+
+def _apply(queryset, lines):
+    queryset.filter(product_id__in=lines).update(
+        units_sold=_increments(lines, "units_sold", IntegerField()),
+        revenue=_increments(lines, "revenue", DecimalField(max_digits=14, decimal_places=2)),
+    )
+
+
+def record_order_sales(order_ids, day=None):
+    """
+    Ajoute les lignes des commandes `order_ids` aux compteurs de ventes.
+    À appeler une seule fois par commande, dans la transaction qui la marque payée.
+    """
+    day = day or timezone.localdate()
+    rows = (
+        OrderItem.objects.filter(order_id__in=order_ids)
+        .values("product_id")
+        .annotate(units_sold=Sum("quantity"), revenue=Sum(F("quantity") * F("price")))
+    )
+    lines = {
+        row["product_id"]: {"units_sold": row["units_sold"], "revenue": row["revenue"] or Decimal("0")}
+        for row in rows
+    }
+    if not lines:
+        return
+
+    with transaction.atomic():
+        # Crée les lignes manquantes puis incrémente tout en un UPDATE par table
+        ProductSalesCounter.objects.bulk_create(
+            [ProductSalesCounter(product_id=product_id) for product_id in lines], ignore_conflicts=True
+        )
+        ProductDailySales.objects.bulk_create(
+            [ProductDailySales(product_id=product_id, day=day) for product_id in lines], ignore_conflicts=True
+        )
+        _apply(ProductSalesCounter.objects.all(), lines)
+        _apply(ProductDailySales.objects.filter(day=day), lines)
+    bump_on_commit(SALES)
+
+
+def top_selling(limit, window=None):
+    """
+    Retourne [{"product_id", "units_sold", "revenue"}] des `limit` meilleures ventes,
+    depuis toujours ou sur une fenêtre ("7d", "30d").
+    """
+    if window is None:
+        rows = ProductSalesCounter.objects.filter(units_sold__gt=0).order_by("-units_sold", "product_id")
+        return list(rows.values("product_id", "units_sold", "revenue")[:limit])
+
+    since = timezone.localdate() - timedelta(days=WINDOWS[window] - 1)
+    rows = (
+        ProductDailySales.objects.filter(day__gte=since)
+        .values("product_id")
+        .annotate(units_sold=Sum("units_sold"), revenue=Sum("revenue"))
+        .order_by("-units_sold", "product_id")
+    )
+    return list(rows[:limit])
+
+
+def top_selling_products(limit, window=None):
+    """Produits du classement, complétés par d'autres produits s'il y en a moins de `limit`."""
+    ranks = {row["product_id"]: rank for rank, row in enumerate(top_selling(limit, window))}
+    queryset = Product.objects.select_related("category").prefetch_related("images")
+    products = sorted(queryset.filter(id__in=ranks), key=lambda product: ranks[product.id])
+    if len(products) < limit:
+        products += list(queryset.exclude(id__in=ranks).order_by("-created_at")[:limit - len(products)])
+    return products
+
+
+def rebuild_sales_counters():
+    """Recalcule tous les compteurs depuis les commandes payées. Retourne le nombre de produits."""
+    rows = (
+        OrderItem.objects.filter(order__is_paid=True)
+        # Même jour que record_order_sales : celui du paiement (date de création
+        # pour les commandes payées avant l'ajout de Order.paid_at)
+        .annotate(day=TruncDate(Coalesce("order__paid_at", "order__created_at")))
+        .values("product_id", "day")
+        .annotate(units_sold=Sum("quantity"), revenue=Sum(F("quantity") * F("price")))
+    )
+    totals = {}
+    daily = []
+    for row in rows.iterator(chunk_size=2000):
+        daily.append(ProductDailySales(
+            product_id=row["product_id"], day=row["day"],
+            units_sold=row["units_sold"], revenue=row["revenue"] or 0,
+        ))
+        total = totals.setdefault(row["product_id"], ProductSalesCounter(product_id=row["product_id"], revenue=0))
+        total.units_sold += row["units_sold"]
+        total.revenue += row["revenue"] or 0
+
+    with transaction.atomic():
+        ProductSalesCounter.objects.all().delete()
+        ProductDailySales.objects.all().delete()
+        ProductSalesCounter.objects.bulk_create(totals.values(), batch_size=1000)
+        ProductDailySales.objects.bulk_create(daily, batch_size=1000)
+    bump_on_commit(SALES)
+    return len(totals)
@@ -0,0 +1,175 @@
+# search.py
+"""
+Recherche plein texte sur les produits.
+
+- SQLite : table virtuelle FTS5 à contenu externe (products_product_fts),
+  synchronisée par des triggers sur products_product, classement bm25.
+- PostgreSQL : colonne tsvector générée (search_vector) indexée en GIN,
+  classement ts_rank.
+- Autres moteurs : repli sur name/description__icontains.
+
+Les triggers et colonnes étant gérés par la base, l'index reste à jour pour
+les save() comme pour les bulk_create()/update().
+"""
+import logging
+import re
+
+from django.db import DatabaseError, connections
+from django.db.models import Case, Count, IntegerField, Q, Value, When
+
+logger = logging.getLogger(__name__)
+
+PRODUCT_TABLE = "products_product"
+FTS_TABLE = "products_product_fts"
+
+SQLITE_SCHEMA = [
+    f"""CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5(
+        name, description,
+        content='{PRODUCT_TABLE}', content_rowid='id',
+        tokenize='unicode61 remove_diacritics 2'
+    )""",
+    f"""CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_ai AFTER INSERT ON {PRODUCT_TABLE} BEGIN
+        INSERT INTO {FTS_TABLE}(rowid, name, description) VALUES (new.id, new.name, new.description);
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_ad AFTER DELETE ON {PRODUCT_TABLE} BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, name, description) VALUES ('delete', old.id, old.name, old.description);
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_au AFTER UPDATE OF name, description ON {PRODUCT_TABLE} BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, name, description) VALUES ('delete', old.id, old.name, old.description);
+        INSERT INTO {FTS_TABLE}(rowid, name, description) VALUES (new.id, new.name, new.description);
+    END""",
+]
+
+POSTGRES_SCHEMA = [
+    f"""ALTER TABLE {PRODUCT_TABLE} ADD COLUMN IF NOT EXISTS search_vector tsvector
+        GENERATED ALWAYS AS (
+            setweight(to_tsvector('simple', coalesce(name, '')), 'A')
+            || setweight(to_tsvector('simple', coalesce(description, '')), 'B')
+        ) STORED""",
+    f"CREATE INDEX IF NOT EXISTS {PRODUCT_TABLE}_search_idx ON {PRODUCT_TABLE} USING GIN (search_vector)",
+]
+
+SQLITE_TRIGGERS = {f"{FTS_TABLE}_ai", f"{FTS_TABLE}_ad", f"{FTS_TABLE}_au"}
+
+_fts_ready = {}
+
+
+def install_search_index(connection):
+    """
+    Crée (ou recrée) l'index plein texte. Idempotent : appelé après chaque
+    migrate, car SQLite supprime les triggers lorsque Django reconstruit la
+    table products_product (la migration 0005 garde sa propre copie du schéma).
+    """
+    _fts_ready.pop(connection.alias, None)
+    with connection.cursor() as cursor:
+        if connection.vendor == "sqlite":
+            cursor.execute("SELECT name FROM sqlite_master WHERE type = 'trigger' AND tbl_name = %s", [PRODUCT_TABLE])
+            missing = SQLITE_TRIGGERS - {row[0] for row in cursor.fetchall()}
+            if not missing:
+                return
+            try:
+                for statement in SQLITE_SCHEMA:
+                    cursor.execute(statement)
+            except DatabaseError:
+                logger.warning("FTS5 indisponible, la recherche utilisera LIKE.", exc_info=True)
+                return
+            # Resynchronise l'index avec le contenu actuel de la table
+            cursor.execute(f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('rebuild')")
+        elif connection.vendor == "postgresql":
+            for statement in POSTGRES_SCHEMA:
+                cursor.execute(statement)
+
+
+def _has_search_index(connection):
+    if connection.alias not in _fts_ready:
+        if connection.vendor == "sqlite":
+            with connection.cursor() as cursor:
+                cursor.execute("SELECT 1 FROM sqlite_master WHERE name = %s", [FTS_TABLE])
+                _fts_ready[connection.alias] = cursor.fetchone() is not None
+        else:
+            _fts_ready[connection.alias] = connection.vendor == "postgresql"
+    return _fts_ready[connection.alias]
+
+
+def _terms(query):
+    return re.findall(r"\w+", query)
+
+
+def search_products(queryset, query):
+    """
+    Restreint `queryset` aux produits correspondant à `query`, triés par
+    pertinence (attribut `search_rank`, plus petit = plus pertinent).
+    """
+    terms = _terms(query)
+    if not terms:
+        return queryset.none()
+
+    connection = connections[queryset.db]
+    if not _has_search_index(connection):
+        return queryset.filter(Q(name__icontains=query) | Q(description__icontains=query))
+
+    if connection.vendor == "sqlite":
+        # Chaque terme est cité et traité comme préfixe : "casq"* "audio"*
+        match = " ".join(f'"{term}"*' for term in terms)
+        return queryset.extra(
+            tables=[FTS_TABLE],
+            where=[f"{FTS_TABLE}.rowid = {PRODUCT_TABLE}.id", f"{FTS_TABLE} MATCH %s"],
+            params=[match],
+            select={"search_rank": f"bm25({FTS_TABLE}, 10.0, 1.0)"},
+            order_by=["search_rank", "-id"],
+        )
+
+    tsquery = " & ".join(f"{term}:*" for term in terms)
+    return queryset.extra(
+        where=[f"{PRODUCT_TABLE}.search_vector @@ to_tsquery('simple', %s)"],
+        params=[tsquery],
+        select={"search_rank": f"-ts_rank({PRODUCT_TABLE}.search_vector, to_tsquery('simple', %s))"},
+        select_params=[tsquery],
+        order_by=["search_rank", "-id"],
+    )
+
+
+# Tranches de prix des facettes : [min, max[ ; None = sans borne supérieure
+PRICE_BUCKETS = [(0, 25), (25, 50), (50, 100), (100, 250), (250, 500), (500, None)]
+
+
+def facet_counts(queryset):
+    """
+    Compte les produits de `queryset` par catégorie et par tranche de prix,
+    en une seule requête groupée sur (catégorie, tranche).
+    """
+    bucket = Case(
+        *[
+            When(Q(price__gte=low) & (Q(price__lt=high) if high is not None else Q()), then=Value(index))
+            for index, (low, high) in enumerate(PRICE_BUCKETS)
+        ],
+        default=Value(None),
+        output_field=IntegerField(),
+    )
+    rows = (
+        queryset.order_by()
+        .annotate(price_bucket=bucket)
+        .values("category_id", "category__name", "category__fr_name", "price_bucket")
+        .annotate(count=Count("id"))
+    )
+
+    categories = {}
+    prices = [0] * len(PRICE_BUCKETS)
+    for row in rows:
+        category = categories.setdefault(row["category_id"], {
+            "id": row["category_id"],
+            "name": row["category__name"],
+            "fr_name": row["category__fr_name"],
+            "count": 0,
+        })
+        category["count"] += row["count"]
+        if row["price_bucket"] is not None:
+            prices[row["price_bucket"]] += row["count"]
+
+    return {
+        "categories": sorted(categories.values(), key=lambda category: (-category["count"], category["name"])),
+        "price": [
+            {"min": low, "max": high, "count": count}
+            for (low, high), count in zip(PRICE_BUCKETS, prices)
+        ],
+    }
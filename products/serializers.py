@@ -5,6 +5,7 @@ from django.contrib.auth import get_user_model
 from rest_framework import serializers
 from rest_framework.exceptions import ValidationError
 
+from .caching import CATALOG, bump_on_commit, product_tag
 from .models import *
 
 
@@ -15,16 +16,22 @@ class CategorySerializer(serializers.ModelSerializer):
         
 class ProductImageSerializer(serializers.ModelSerializer):
     image = serializers.SerializerMethodField()
+    variants = serializers.SerializerMethodField()
 
     class Meta:
         model = ProductImage
-        fields = ['image',]
+        fields = ['image', 'variants']
 
     def get_image(self, obj):
         if isinstance(obj, ProductImage):
             return f"{settings.MEDIA_URL}{obj.image.name}"
         return None
 
+    def get_variants(self, obj):
+        if isinstance(obj, ProductImage):
+            return obj.variant_urls()
+        return None
+
 class ProductSerializerAll(serializers.ModelSerializer):
     images = ProductImageSerializer(many=True, read_only=True)
     category = CategorySerializer(read_only=True)
@@ -94,6 +101,7 @@ class ProductWithSpecSerializer(serializers.ModelSerializer):
     category = CategorySerializer(read_only=True)
     average_rating = serializers.FloatField( read_only=True)
     review_count = serializers.IntegerField( read_only=True)
+    rating_histogram = serializers.DictField(child=serializers.IntegerField(), read_only=True)
     specifications = ProductSpecificationSerializer(many=True, read_only=True)
     reviews = ProductReviewSerializer(many=True, read_only=True)
 
@@ -101,7 +109,7 @@ class ProductWithSpecSerializer(serializers.ModelSerializer):
         model = Product
         fields = ['id', 'name', 'description', 'price', 'stock', 'weight', 
                   'length', 'width', 'height', 'sku', 'category', 
-                  'images', 'specifications', 'average_rating', 'review_count',"reviews"]
+                  'images', 'specifications', 'average_rating', 'review_count', 'rating_histogram', "reviews"]
 
 class ProductSerializer(serializers.ModelSerializer):
     images = serializers.ListField(
@@ -115,6 +123,10 @@ class ProductSerializer(serializers.ModelSerializer):
     class Meta:
         model = Product
         fields = '__all__'    
+        read_only_fields = [
+            'rating_count', 'rating_sum', 'rating_1', 'rating_2', 'rating_3', 'rating_4', 'rating_5',
+            'primary_image', 'primary_thumbnail',
+        ]
 
     def create(self, validated_data):
         images_data = validated_data.pop('images', [])
@@ -128,8 +140,15 @@ class ProductSerializer(serializers.ModelSerializer):
         for image in images_data:
             ProductImage.objects.create(product=product, image=image)
 
-        for spec in specifications_data:
-            for s in spec:
-               ProductSpecification.objects.create(product=product,**s)
+        ProductSpecification.objects.bulk_create(
+            ProductSpecification(product=product, **s) for spec in specifications_data for s in spec
+        )
+        # bulk_create n'envoie pas post_save : invalidation du produit (voir products.signals)
+        bump_on_commit(CATALOG, product_tag(product.pk))
+
+        return product
+
 
-        return product
\ No newline at end of file
+class StockAdjustmentSerializer(serializers.Serializer):
+    product = serializers.IntegerField()
+    delta = serializers.IntegerField()
@@ -0,0 +1,123 @@
+import logging
+
+from django.core.files.storage import default_storage
+from django.db import connections, transaction
+from django.db.models.signals import post_delete, post_init, post_migrate, post_save
+from django.dispatch import receiver
+from kombu.exceptions import OperationalError
+
+from .caching import CATALOG, bump_on_commit, category_tag, product_tag
+from .images import needs_variants, referenced_by_orders, sync_primary_image
+from .models import Category, Product, ProductImage, ProductReview, ProductSpecification
+from .ratings import add_review_rating, remove_review_rating
+from .search import PRODUCT_TABLE, install_search_index
+from .tasks import generate_image_variants_task
+
+logger = logging.getLogger(__name__)
+
+
+# Mémorise la note telle qu'elle est en base pour détecter les modifications
+@receiver(post_init, sender=ProductReview)
+def remember_review_rating(sender, instance, **kwargs):
+    instance._stored_rating = (instance.__dict__.get("product_id"), instance.__dict__.get("rating"))
+
+
+@receiver(post_save, sender=ProductReview)
+def update_rating_on_save(sender, instance, created, **kwargs):
+    new_rating = (instance.product_id, instance.rating)
+    old_rating = None if created else getattr(instance, "_stored_rating", None)
+
+    if old_rating != new_rating:
+        if old_rating and old_rating[0] is not None and old_rating[1] is not None:
+            remove_review_rating(*old_rating)
+        add_review_rating(*new_rating)
+
+    instance._stored_rating = new_rating
+
+
+@receiver(post_delete, sender=ProductReview)
+def update_rating_on_delete(sender, instance, **kwargs):
+    product_id, rating = getattr(instance, "_stored_rating", (instance.product_id, instance.rating))
+    if product_id is not None and rating is not None:
+        remove_review_rating(product_id, rating)
+
+
+# Invalidation des caches du catalogue (voir products.caching)
+@receiver(post_init, sender=Product)
+def remember_product_category(sender, instance, **kwargs):
+    instance._stored_category_id = instance.__dict__.get("category_id")
+
+
+@receiver(post_save, sender=Product)
+@receiver(post_delete, sender=Product)
+def invalidate_product_caches(sender, instance, **kwargs):
+    tags = {CATALOG, product_tag(instance.pk), category_tag(instance.category_id)}
+    stored_category_id = getattr(instance, "_stored_category_id", None)
+    if stored_category_id is not None:
+        tags.add(category_tag(stored_category_id))
+    instance._stored_category_id = instance.category_id
+    bump_on_commit(*tags)
+
+
+@receiver(post_save, sender=ProductImage)
+@receiver(post_delete, sender=ProductImage)
+@receiver(post_save, sender=ProductSpecification)
+@receiver(post_delete, sender=ProductSpecification)
+@receiver(post_save, sender=ProductReview)
+@receiver(post_delete, sender=ProductReview)
+def invalidate_product_relation_caches(sender, instance, **kwargs):
+    bump_on_commit(CATALOG, product_tag(instance.product_id))
+
+
+@receiver(post_save, sender=Category)
+@receiver(post_delete, sender=Category)
+def invalidate_category_caches(sender, instance, **kwargs):
+    bump_on_commit(CATALOG, category_tag(instance.pk))
+
+
+# SQLite supprime les triggers FTS quand une migration reconstruit la table products_product
+@receiver(post_migrate)
+def ensure_search_index(sender, using, **kwargs):
+    if sender.name != "products":
+        return
+    connection = connections[using]
+    if PRODUCT_TABLE in connection.introspection.table_names():
+        install_search_index(connection)
+
+
+# Dérivés d'images (miniatures, WebP) générés en tâche de fond après l'upload
+def _enqueue_image_variants(image_id):
+    try:
+        generate_image_variants_task.delay([image_id])
+    except OperationalError:
+        # L'image reste servie en taille originale ; generate_image_variants rattrapera
+        logger.warning("Broker indisponible, dérivés de l'image %s non planifiés", image_id)
+
+
+@receiver(post_save, sender=ProductImage)
+def schedule_image_variants(sender, instance, **kwargs):
+    if needs_variants(instance):
+        transaction.on_commit(lambda: _enqueue_image_variants(instance.pk))
+
+
+@receiver(post_delete, sender=ProductImage)
+def delete_image_variants(sender, instance, **kwargs):
+    # Les miniatures figées sur des commandes (OrderItem.thumbnail) sont conservées
+    kept = referenced_by_orders(instance.variants.values())
+    for path in instance.variants.values():
+        if path not in kept:
+            default_storage.delete(path)
+
+
+# Image principale dénormalisée sur le produit (Product.primary_image)
+@receiver(post_save, sender=ProductImage)
+def sync_primary_image_on_save(sender, instance, **kwargs):
+    if instance.is_primary:
+        # Une seule image principale par produit
+        ProductImage.objects.filter(product_id=instance.product_id, is_primary=True).exclude(pk=instance.pk).update(is_primary=False)
+    sync_primary_image(instance.product_id)
+
+
+@receiver(post_delete, sender=ProductImage)
+def sync_primary_image_on_delete(sender, instance, **kwargs):
+    sync_primary_image(instance.product_id)
@@ -0,0 +1,72 @@
+# stock.py
+"""
+Mouvements de stock.
+
+Toutes les variations passent par un seul UPDATE conditionnel :
+stock = stock + delta, uniquement si stock + delta >= 0. La base applique
+la condition et l'incrément sur la ligne verrouillée : deux commandes
+simultanées ne peuvent pas vendre la même unité, sans lecture préalable
+ni select_for_update.
+"""
+from django.db import transaction
+from django.db.models import Case, F, IntegerField, Value, When
+
+from .caching import CATALOG, bump_on_commit, product_tag
+from .models import Product
+
+
+class InsufficientStock(Exception):
+    """Levée quand au moins un produit ne peut pas couvrir sa variation ; rien n'est appliqué."""
+
+    def __init__(self, shortages):
+        # {product_id: stock disponible} (0 pour un produit inexistant)
+        self.shortages = shortages
+        super().__init__(f"Stock insuffisant pour les produits {sorted(shortages)}")
+
+
+def _per_product(values):
+    return Case(
+        *[When(pk=product_id, then=Value(value)) for product_id, value in values.items()],
+        output_field=IntegerField(),
+    )
+
+
+def adjust_stock(deltas, bump_catalog=False):
+    """
+    Applique {product_id: delta} en une requête, tout ou rien.
+    Lève InsufficientStock si un décrément rendrait le stock négatif.
+    """
+    deltas = {int(product_id): int(delta) for product_id, delta in deltas.items() if delta}
+    if not deltas:
+        return
+
+    with transaction.atomic():
+        updated = (
+            Product.objects.filter(pk__in=deltas, stock__gte=_per_product({pk: -delta for pk, delta in deltas.items()}))
+            .update(stock=F("stock") + _per_product(deltas))
+        )
+        if updated != len(deltas):
+            transaction.set_rollback(True)
+
+    if updated != len(deltas):
+        available = dict(Product.objects.filter(pk__in=deltas).values_list("id", "stock"))
+        raise InsufficientStock({
+            product_id: available.get(product_id, 0)
+            for product_id, delta in deltas.items()
+            if available.get(product_id, 0) + delta < 0 or product_id not in available
+        })
+
+    # Les pages produit affichent le stock ; les listes ne sont invalidées
+    # que pour les ajustements manuels, pas à chaque commande
+    tags = [product_tag(product_id) for product_id in deltas]
+    bump_on_commit(*tags, *([CATALOG] if bump_catalog else []))
+
+
+def reserve_stock(quantities):
+    """Retire {product_id: quantité} du stock, ou lève InsufficientStock."""
+    adjust_stock({product_id: -quantity for product_id, quantity in quantities.items()})
+
+
+def release_stock(quantities):
+    """Remet {product_id: quantité} en stock (commande annulée)."""
+    adjust_stock(quantities)
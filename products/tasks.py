@@ -0,0 +1,14 @@
+from celery import shared_task
+
+from .images import generate_variants_for
+from .recommendations import rebuild_recommendations
+
+
+@shared_task
+def rebuild_recommendations_task():
+    return rebuild_recommendations()
+
+
+@shared_task
+def generate_image_variants_task(image_ids, force=False):
+    return generate_variants_for(image_ids, force=force)
@@ -0,0 +1,23 @@
+# totals.py
+"""
+Totaux calculés par la base (paniers et commandes).
+
+Une ligne vaut quantité × prix : le prix courant du produit pour un panier
+(cart.models), le prix unitaire figé à la commande pour une commande
+(orders.models).
+"""
+from decimal import Decimal
+
+from django.db.models import DecimalField, F, Sum, Value
+from django.db.models.functions import Coalesce
+
+AMOUNT = DecimalField(max_digits=12, decimal_places=2)
+
+
+def sum_of_lines(price, prefix=""):
+    """Somme quantité × `price` des lignes atteintes par `prefix`, 0 sans ligne."""
+    return Coalesce(
+        Sum(F(f"{prefix}quantity") * F(f"{prefix}{price}"), output_field=AMOUNT),
+        Value(Decimal("0")),
+        output_field=AMOUNT,
+    )
@@ -5,8 +5,11 @@ from .views import *
 
 urlpatterns = [
     path('', ProductListView.as_view(), name='product-list'),
+    path('catalog/', ProductCatalogView.as_view(), name='product-catalog'),
     path('list/', ProductAdminListView.as_view(), name='product-list-admin'),
     path('create/', create_product, name='create_product'),
+    path('import/', ProductImportView.as_view(), name='product-import'),
+    path('stock/', StockAdjustmentView.as_view(), name='product-stock'),
     path('categories/', CategoryListView.as_view(), name='category-list'),
     path('<int:id>/', ProductDetailView.as_view(), name='product-detail'),
     path('<int:product_id>/review/', AddProductReviewView.as_view(), name='add-product-review'),
@@ -1,16 +1,23 @@
 # views.py
-from django.core.cache import cache
-from django.db.models import Q, Sum
+import io
+
+from django.db.models import Count
+from django.http import Http404
 from django.shortcuts import get_object_or_404
-from django.utils.decorators import method_decorator
-from django.views.decorators.cache import cache_page
 from rest_framework import generics, status
 from rest_framework.decorators import api_view
 from rest_framework.permissions import AllowAny, IsAdminUser, IsAuthenticated
 from rest_framework.response import Response
 from rest_framework.views import APIView
 
+from .caching import CATALOG, CATALOG_CACHE_TTL, cached, cached_response, category_tag, product_tag
+from .importers import FORMATS, import_products
 from .models import Product
+from .pagination import KeysetPagination
+from .recommendations import RECOMMENDATIONS, recommend_for
+from .sales import SALES, WINDOWS, top_selling_products
+from .search import facet_counts, search_products
+from .stock import InsufficientStock, adjust_stock
 from .serializers import *
 from .serializers import ProductSerializer
 
@@ -33,66 +40,82 @@ class ProductDeleteAPIView(APIView):
         )
 
 
-@method_decorator(cache_page(60 * 60 * 3), name='dispatch') 
 class TopSellingProductsView(APIView):
     permission_classes = [AllowAny]
 
     def get(self, request):
-        # Vérifier si les résultats sont déjà en cache
-        cache_key = 'top_selling_products'
-        top_products = cache.get(cache_key)
+        # ?window=7d|30d pour un classement sur une période glissante
+        window = request.query_params.get('window')
+        if window is not None and window not in WINDOWS:
+            return Response({"window": f"Valeurs possibles : {', '.join(WINDOWS)}."}, status=status.HTTP_400_BAD_REQUEST)
 
-        if not top_products:
-            # Si les produits ne sont pas dans le cache, les récupérer depuis la base de données
-            top_products = (
-                Product.objects
-                .annotate(total_sold=Sum('orderitem__quantity'))
-                .order_by('-total_sold')[:8]
-            )
-            # Sérialiser les résultats
-            serializer = ProductSerializerAll(top_products, many=True)
+        def build():
+            return ProductSerializerAll(top_selling_products(8, window), many=True).data
 
-            # Mettre en cache les résultats pendant 5 minutes
-            cache.set(cache_key, serializer.data, timeout=60 * 60 * 3)
-        else:
-            # Si les produits sont dans le cache, les renvoyer tels quels
-             return Response(top_products)
-
-        # Retourner la réponse
-        return Response(serializer.data)
+        # Invalidé par le catalogue et par chaque commande payée (products.sales)
+        data = cached(f'top_selling_products:{window or "all"}', [CATALOG, SALES], build, timeout=60 * 60 * 3)
+        return Response(data)
     
 
 class RecommendedProductsView(APIView):
     permission_classes = [AllowAny]
     def get(self, request):
-        cache_key = 'recommended_products'
-        
-        top_products = cache.get(cache_key)
-        if not top_products:
+        def build():
             top_products = (
                 Product.objects
+                .select_related('category')
+                .prefetch_related('images')
                 .annotate(total_reviews=Count('reviews'))  # Compter le nombre d'avis
                 .order_by('-total_reviews')[:4]  # Trier par le nombre d'avis, puis prendre les 4 premiers
             )
-            serializer = ProductSerializerAll(top_products, many=True)
-            # Mettre les résultats dans le cache pendant 5 minutes
-            cache.set(cache_key, serializer.data, timeout=60 * 60 * 3)
-        else:
-            # Si les produits sont déjà en cache, les utiliser directement
-            return Response(top_products)
+            return ProductSerializerAll(top_products, many=True).data
 
-        return Response(serializer.data)
+        return Response(cached('recommended_products', [CATALOG], build))
 
 
-@method_decorator(cache_page(60 * 60), name='dispatch') 
 class ProductListView(generics.ListAPIView):
     permission_classes = [AllowAny]
-    queryset = Product.objects.all()
+    queryset = Product.objects.select_related('category').prefetch_related('images')
     serializer_class = ProductSerializerAll
-    
+
+    def list(self, request, *args, **kwargs):
+        def build():
+            return self.get_serializer(self.get_queryset(), many=True).data
+
+        # Invalidé par toute écriture sur le catalogue (voir products.signals)
+        return cached_response(request, 'product_list', [CATALOG], build)
+
+
+class ProductCatalogView(APIView):
+    """
+    Catalogue paginé par curseur (?ordering=-created_at|created_at|price|-price,
+    ?page_size=, ?cursor=). Chaque page coûte deux requêtes (produits + images)
+    et est mise en cache séparément.
+    """
+    permission_classes = [AllowAny]
+
+    def get(self, request):
+        paginator = KeysetPagination(request)
+
+        def build():
+            queryset = Product.objects.select_related('category').prefetch_related('images')
+            products, next_cursor = paginator.paginate_queryset(queryset)
+            return {
+                'next_cursor': next_cursor,
+                'results': ProductSerializerAll(products, many=True).data,
+            }
+
+        data = cached(f"catalog_page:{paginator.cache_key}", [CATALOG], build)
+        return Response(data, status=status.HTTP_200_OK)
+
 
 
 class ProductSearchView(APIView):
+    """
+    Recherche de produits. Avec ?facets=1, la réponse devient
+    {"results": [...], "facets": {"categories": [...], "price": [...]}}
+    où les facettes comptent les produits correspondant au texte recherché.
+    """
     permission_classes = [AllowAny]
 
     def get(self, request):
@@ -100,19 +123,22 @@ class ProductSearchView(APIView):
         category = request.query_params.get('category')  # Filtre par catégorie
         min_price = request.query_params.get('min_price')  # Filtre par prix minimum
         max_price = request.query_params.get('max_price')  # Filtre par prix maximum
+        with_facets = request.query_params.get('facets') in ('1', 'true')
 
-        # Générer une clé de cache dynamique basée sur les paramètres de la requête
-        cache_key = f"search:{query}:{category}:{min_price}:{max_price}"
-        products = cache.get(cache_key)
+        # Appliquer la pagination (optionnelle)
+        page_size = int(request.query_params.get('page_size', 10))  # Par défaut, 10 produits par page
+        page = int(request.query_params.get('page', 1))  # Numéro de page, par défaut 1
 
-        if not products:
-            # Filtrer les produits de manière conditionnelle
+        def matching_products():
             products_queryset = Product.objects.all()
-
             if query:
-                products_queryset = products_queryset.filter(
-                    Q(name__icontains=query) | Q(description__icontains=query)
-                )
+                # Index plein texte (FTS5 / tsvector), résultats triés par pertinence
+                products_queryset = search_products(products_queryset, query)
+            return products_queryset
+
+        def build():
+            # Filtrer les produits de manière conditionnelle
+            products_queryset = matching_products().select_related('category').prefetch_related('images')
 
             if category:
                 products_queryset = products_queryset.filter(category__name__iexact=category)
@@ -123,38 +149,79 @@ class ProductSearchView(APIView):
             if max_price:
                 products_queryset = products_queryset.filter(price__lte=max_price)
 
-            # Utiliser select_related ou prefetch_related si nécessaire pour optimiser les relations
-            # Exemple : pour une relation ForeignKey ou ManyToMany
-            # products_queryset = products_queryset.select_related('category')
-
-            # Appliquer la pagination (optionnelle)
-            page_size = int(request.query_params.get('page_size', 10))  # Par défaut, 10 produits par page
-            page = int(request.query_params.get('page', 1))  # Numéro de page, par défaut 1
             start = (page - 1) * page_size
             end = page * page_size
 
-            # Appliquer le cache des résultats de la requête
-            products = products_queryset[start:end]
-
             # Sérialiser les produits
-            serializer = ProductSerializerAll(products, many=True)
+            return ProductSerializerAll(products_queryset[start:end], many=True).data
+
+        # Générer une clé de cache dynamique basée sur les paramètres de la requête
+        cache_key = f"search:{query}:{category}:{min_price}:{max_price}:{page}:{page_size}"
+        products = cached(cache_key, [CATALOG], build, timeout=CACHE_TTL)
+        if not with_facets:
+            return Response(products, status=status.HTTP_200_OK)
+
+        # Facettes du texte seul, partagées par toutes les pages et tous les filtres ;
+        # celles de la recherche vide servent d'index pour la page catalogue
+        facets = cached(
+            f"search_facets:{query}", [CATALOG], lambda: facet_counts(matching_products()),
+            timeout=CACHE_TTL if query else CATALOG_CACHE_TTL,
+        )
+        return Response({"results": products, "facets": facets}, status=status.HTTP_200_OK)
 
-            # Mettre en cache les résultats de la recherche pendant 5 minutes
-            cache.set(cache_key, serializer.data, timeout=CACHE_TTL)
-        else:
-            # Si les résultats sont en cache, les renvoyer directement
-            serializer = ProductSerializerAll(products, many=True)
+class ProductImportView(APIView):
+    """
+    Import en masse d'un catalogue fournisseur (fichier `file`, CSV ou JSONL).
+    Le format est déduit de l'extension ou du champ `file_format`.
+    """
+    permission_classes = [IsAdminUser]
+
+    def post(self, request):
+        upload = request.FILES.get('file')
+        if upload is None:
+            return Response({"file": "This field is required."}, status=status.HTTP_400_BAD_REQUEST)
+        file_format = request.data.get('file_format') or upload.name.rsplit('.', 1)[-1].lower()
+        if file_format not in FORMATS:
+            return Response({"file_format": f"Valeurs possibles : {', '.join(FORMATS)}."}, status=status.HTTP_400_BAD_REQUEST)
+
+        # Le fichier reçu est lu en flux, sans être chargé en mémoire
+        stream = io.TextIOWrapper(upload.file, encoding='utf-8-sig', newline='')
+        report = import_products(stream, file_format)
+        return Response(report, status=status.HTTP_200_OK)
+
+
+class StockAdjustmentView(APIView):
+    """
+    Ajustements de stock en masse : [{"product": id, "delta": -3}, ...].
+    Tout ou rien : un seul décrément impossible annule l'ensemble (409).
+    """
+    permission_classes = [IsAdminUser]
+
+    def post(self, request):
+        serializer = StockAdjustmentSerializer(data=request.data, many=True)
+        serializer.is_valid(raise_exception=True)
+
+        deltas = {}
+        for adjustment in serializer.validated_data:
+            deltas[adjustment['product']] = deltas.get(adjustment['product'], 0) + adjustment['delta']
+
+        try:
+            adjust_stock(deltas, bump_catalog=True)
+        except InsufficientStock as exc:
+            return Response({"error": "Stock insuffisant.", "shortages": exc.shortages}, status=status.HTTP_409_CONFLICT)
+
+        stock = dict(Product.objects.filter(pk__in=deltas).values_list('id', 'stock'))
+        return Response({"stock": stock}, status=status.HTTP_200_OK)
 
-        return Response(serializer.data, status=status.HTTP_200_OK)
 
-@method_decorator(cache_page(60 * 10), name='dispatch') 
 class ProductAdminListView(APIView):
     permission_classes = [IsAdminUser]
 
     def get(self, request):
-        products = Product.objects.all()
-        serializer = ProductSerializer(products, many=True)
-        return Response(serializer.data)
+        def build():
+            return ProductSerializer(Product.objects.all(), many=True).data
+
+        return Response(cached('product_admin_list', [CATALOG], build))
     
 class CategoryCreateUpdateView(APIView):
     permission_classes = [IsAdminUser]
@@ -219,57 +286,48 @@ def create_product(request):
     print(serializer.errors)  # For debugging purposes
     return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
-@method_decorator(cache_page(60 * 15), name='dispatch') 
 class CategoryListView(APIView):
     permission_classes = [AllowAny]
     def get(self, request):
-        categories = Category.objects.all()
-        serializer = CategorySerializer(categories, many=True)
-        return Response(serializer.data, status=status.HTTP_200_OK)
-    
-
-from django.core.cache import cache
+        def build():
+            return CategorySerializer(Category.objects.all(), many=True).data
 
+        return cached_response(request, 'category_list', [CATALOG], build)
+    
 
-@method_decorator(cache_page(60 * 15), name='dispatch') 
 class ProductDetailView(generics.RetrieveAPIView):
     permission_classes = [AllowAny]
-    queryset = Product.objects.all()
+    queryset = Product.objects.select_related('category').prefetch_related('images', 'specifications', 'reviews__user')
     serializer_class = ProductWithSpecSerializer
     lookup_field = 'id'
 
-    def get_cache_key(self, product_id):
-        return f'product_detail_{product_id}'
-
     def retrieve(self, request, *args, **kwargs):
-        # Récupérer le produit actuel
-        product = self.get_object()
-        cache_key = self.get_cache_key(product.id)
-
-        # Vérifier si les données sont déjà en cache
-        cached_data = cache.get(cache_key)
-        if cached_data:
-            return Response(cached_data)
-
-        # Récupérer les produits similaires basés sur la catégorie
-        similar_products = Product.objects.filter(category=product.category).exclude(id=product.id)[:4]
-
-        # Sérialiser les produits similaires
-        similar_serializer = ProductSerializerAll(similar_products, many=True)
-
-        # Sérialiser le produit
-        serializer = self.get_serializer(product)
-
-        # Construire la réponse
-        response_data = {
-            'product': serializer.data,
-            'similar_products': similar_serializer.data
-        }
-
-        # Mettre en cache la réponse pour le produit
-        cache.set(cache_key, response_data, timeout=60 * 15)
-
-        return Response(response_data)
+        product_id = self.kwargs['id']
+        # Catégorie et voisins précalculés, en une requête : étiquettes de l'entrée
+        rows = list(Product.objects.filter(id=product_id).values_list('category_id', 'recommendations__recommended_id'))
+        if not rows:
+            raise Http404
+        category_id = rows[0][0]
+        neighbour_ids = {neighbour_id for _, neighbour_id in rows if neighbour_id is not None}
+
+        def build():
+            # Récupérer le produit actuel
+            product = self.get_object()
+
+            # Produits souvent achetés avec celui-ci, sinon de la même catégorie
+            similar_products = recommend_for([product.id], limit=4)
+
+            return {
+                'product': self.get_serializer(product).data,
+                'similar_products': ProductSerializerAll(similar_products, many=True).data
+            }
+
+        # Invalidé par les écritures sur le produit, ses images, specs et avis,
+        # sur un produit de la même catégorie ou sur un voisin recommandé (d'une
+        # autre catégorie), ou par le recalcul des recommandations
+        tags = [product_tag(product_id), category_tag(category_id), RECOMMENDATIONS]
+        tags += [product_tag(neighbour_id) for neighbour_id in sorted(neighbour_ids)]
+        return cached_response(request, f'product_detail_{product_id}', tags, build)
 
         
         
@@ -293,12 +351,8 @@ class ProductReviewCreateView(generics.CreateAPIView):
         if ProductReview.objects.filter(user=user, product=product).exists():
             raise ValidationError("You have already reviewed this product.")
         
-        # Sauvegarder l'avis
+        # Sauvegarder l'avis (le cache du produit est invalidé par products.signals)
         serializer.save(user=user)
 
-        # Invalider la cache de la vue ProductDetailView
-        cache_key = f'product_detail_{product.id}'
-        cache.delete(cache_key)  # Invalider la cache existante
-
         # Retourner une réponse de succès
         return Response({'message': 'Review added successfully.'}, status=status.HTTP_201_CREATED)
\ No newline at end of file
@@ -1,5 +1,7 @@
 import logging
+import time
 
+from django.conf import settings
 from django.http import JsonResponse
 
 logger = logging.getLogger(__name__)
@@ -15,3 +17,35 @@ class GlobalExceptionMiddleware:
             logger.error(f"Unhandled exception: {e}", exc_info=True)
             return JsonResponse({"error": "Une erreur serveur est survenue. Merci de réessayer."}, status=500)
         return response
+
+
+class SessionRefreshMiddleware:
+    """
+    Remplace SESSION_SAVE_EVERY_REQUEST : une session n'est réécrite (et son
+    expiration prolongée) que lorsqu'il lui reste moins de
+    SESSION_REFRESH_WINDOW secondes à vivre, ou quand elle a été modifiée.
+    Doit être placé après SessionMiddleware.
+    """
+    KEY = "_refreshed_at"
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        response = self.get_response(request)
+        session = getattr(request, "session", None)
+        if session is None or not session.session_key:
+            return response
+
+        now = int(time.time())
+        if session.modified:
+            session[self.KEY] = now
+            return response
+
+        refreshed_at = session.get(self.KEY)
+        # Clé inconnue ou session expirée : rien à prolonger
+        if not session.session_key:
+            return response
+        if refreshed_at is None or refreshed_at + settings.SESSION_COOKIE_AGE - now < settings.SESSION_REFRESH_WINDOW:
+            session[self.KEY] = now
+        return response
@@ -4,6 +4,7 @@ import ssl
 from datetime import timedelta
 from pathlib import Path
 
+from celery.schedules import crontab
 from decouple import config
 
 BASE_DIR = Path(__file__).resolve().parent.parent
@@ -55,6 +56,7 @@ MIDDLEWARE = [
     'corsheaders.middleware.CorsMiddleware', 
     "django.middleware.security.SecurityMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
+    'security.middleware.SessionRefreshMiddleware',
     "django.middleware.common.CommonMiddleware",
     "django.middleware.csrf.CsrfViewMiddleware",
     "django.contrib.auth.middleware.AuthenticationMiddleware",
@@ -168,9 +170,19 @@ STATIC_ROOT = os.path.join(BASE_DIR, 'static')
 
 DEFAULT_AUTO_FIELD = "django.db.models.BigAutoField"
 
-SESSION_ENGINE = "django.contrib.sessions.backends.db"
+# Sessions : "db" (table django_session) ou "redis" (cache "sessions", même Redis que Celery)
+SESSION_STORE = config('SESSION_STORE', default='db')
+if SESSION_STORE == 'redis':
+    SESSION_ENGINE = "django.contrib.sessions.backends.cache"
+    SESSION_CACHE_ALIAS = "sessions"
+else:
+    SESSION_ENGINE = "django.contrib.sessions.backends.db"
 SESSION_COOKIE_AGE = 1209600
-SESSION_SAVE_EVERY_REQUEST = True
+# Pas d'écriture à chaque requête : l'expiration est prolongée par
+# security.middleware.SessionRefreshMiddleware quand il reste moins de
+# SESSION_REFRESH_WINDOW secondes
+SESSION_SAVE_EVERY_REQUEST = False
+SESSION_REFRESH_WINDOW = config('SESSION_REFRESH_WINDOW', default=SESSION_COOKIE_AGE // 4, cast=int)
 SESSION_COOKIE_NAME = "sessionid"
 SESSION_COOKIE_HTTPONLY = True
 SESSION_COOKIE_SECURE = True
@@ -249,6 +261,33 @@ CELERY_BROKER_TRANSPORT_OPTIONS = {
 
 CELERYD_POOL_RESTARTS = True
 
+# Tâches périodiques (celery -A src beat)
+CELERY_BEAT_SCHEDULE = {
+    'rebuild-product-recommendations': {
+        'task': 'products.tasks.rebuild_recommendations_task',
+        'schedule': crontab(hour=3, minute=0),
+    },
+    'persist-dirty-carts': {
+        'task': 'cart.tasks.persist_dirty_carts_task',
+        'schedule': 60.0,
+    },
+    'reap-expired-carts': {
+        'task': 'cart.tasks.reap_expired_carts_task',
+        'schedule': crontab(minute=30),
+    },
+    'relay-order-outbox': {
+        'task': 'orders.tasks.relay_outbox_task',
+        'schedule': 5.0,
+    },
+    'purge-order-outbox': {
+        'task': 'orders.tasks.purge_outbox_task',
+        'schedule': crontab(hour=4, minute=0),
+    },
+}
+
+# Stockage des paniers vivants : "db" (Cart / CartItem) ou "redis" (voir cart.store)
+CART_STORE = config('CART_STORE', default='db')
+
 CACHES = {
     'default': {
     'BACKEND': 'django_redis.cache.RedisCache',
@@ -262,7 +301,19 @@ CACHES = {
         },
         'TIMEOUT': 300, 
         'KEY_PREFIX': 'myapp',  
-    }
+    },
+    # Sessions (SESSION_STORE = "redis") : pas d'IGNORE_EXCEPTIONS, une
+    # session non enregistrée doit remonter en erreur plutôt que se perdre
+    'sessions': {
+        'BACKEND': 'django_redis.cache.RedisCache',
+        'LOCATION': CeleryAccess,
+        'OPTIONS': {
+            'CLIENT_CLASS': 'django_redis.client.DefaultClient',
+            'SOCKET_CONNECT_TIMEOUT': 5,
+            'SOCKET_TIMEOUT': 5,
+        },
+        'KEY_PREFIX': 'session',
+    },
 }
 
 
@@ -0,0 +1,85 @@
+from datetime import timedelta
+
+import pytest
+from cart.models import Cart, CartItem
+from cart.reaper import reap_expired_carts
+from cart.store import CartOwner, DatabaseCartStore, write_cart
+from django.contrib.auth import get_user_model
+from django.contrib.sessions.models import Session
+from django.utils import timezone
+from products.models import Category, Product
+
+pytestmark = pytest.mark.django_db
+
+
+def make_session(key, days):
+    return Session.objects.create(session_key=key, session_data="", expire_date=timezone.now() + timedelta(days=days))
+
+
+def test_reaper_deletes_expired_sessions_and_abandoned_carts_in_batches():
+    category = Category.objects.create(name="Bazar", fr_name="Bazar")
+    product = Product.objects.create(name="Vase", description="...", price=9, weight=1, sku="V-1", category=category)
+    user = get_user_model().objects.create_user(username="keeper", email="keeper@test.com", password="pw")
+
+    expired = [make_session(f"expired{i}", days=-1) for i in range(3)]
+    live = make_session("live", days=7)
+    for session in expired + [live]:
+        cart = Cart.objects.create(session_key=session.session_key)
+        CartItem.objects.create(cart=cart, product=product, quantity=1)
+    orphan = Cart.objects.create()
+    CartItem.objects.create(cart=orphan, product=product, quantity=2)
+    user_cart = Cart.objects.create(user=user, session_key=expired[0].session_key)
+
+    report = reap_expired_carts(batch_size=2)
+
+    assert report == {"sessions": 3, "carts": 4, "cart_items": 4}
+    assert list(Session.objects.values_list("session_key", flat=True)) == ["live"]
+    assert set(Cart.objects.values_list("id", flat=True)) == {user_cart.id, Cart.objects.get(session_key="live").id}
+
+
+def test_reaper_deletes_inactive_anonymous_carts_without_session_row(settings):
+    # Sessions Redis : aucune ligne django_session, seule l'inactivité du panier compte
+    settings.SESSION_STORE = "redis"
+    stale = Cart.objects.create(session_key="redis-stale")
+    active = Cart.objects.create(session_key="redis-active")
+    Cart.objects.filter(pk=stale.pk).update(updated_at=timezone.now() - timedelta(days=30))
+
+    report = reap_expired_carts()
+
+    assert report == {"sessions": 0, "carts": 1, "cart_items": 0}
+    assert list(Cart.objects.values_list("id", flat=True)) == [active.id]
+
+
+def test_database_sessions_keep_untouched_carts_alive_until_they_end():
+    make_session("returning", days=7)
+    untouched = Cart.objects.create(session_key="returning")
+    gone = Cart.objects.create(session_key="logged-out")
+    Cart.objects.filter(pk__in=[untouched.pk, gone.pk]).update(updated_at=timezone.now() - timedelta(days=30))
+
+    assert reap_expired_carts()["carts"] == 1
+    assert list(Cart.objects.values_list("id", flat=True)) == [untouched.id]
+
+
+def test_every_cart_mutation_keeps_an_anonymous_cart_alive(settings):
+    settings.SESSION_STORE = "redis"
+    category = Category.objects.create(name="Outils", fr_name="Outils")
+    products = [
+        Product.objects.create(name=f"Pince {i}", description="...", price=5, weight=1, sku=f"PI-{i}", category=category)
+        for i in range(3)
+    ]
+    store, owner = DatabaseCartStore(), CartOwner(None, "editing")
+    cart = Cart.objects.create(session_key="editing")
+    CartItem.objects.bulk_create(CartItem(cart=cart, product=product, quantity=2) for product in products)
+    old = timezone.now() - timedelta(days=30)
+
+    mutations = [
+        lambda: store.decrease(owner, products[0].id),
+        lambda: store.remove(owner, products[1].id),
+        lambda: write_cart(owner, {products[2].id: 1}),  # recopie d'un panier Redis (persist_dirty)
+    ]
+    for mutate in mutations:
+        Cart.objects.filter(pk=cart.pk).update(updated_at=old)
+        mutate()
+        assert Cart.objects.get(pk=cart.pk).updated_at > old
+
+    assert reap_expired_carts()["carts"] == 0
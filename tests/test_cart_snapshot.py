@@ -0,0 +1,67 @@
+import pytest
+from cart.models import Cart, CartItem
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from products.models import Category, Product, ProductImage
+from rest_framework.test import APIClient
+
+pytestmark = pytest.mark.django_db
+
+
+@pytest.fixture
+def client_and_cart():
+    user = get_user_model().objects.create_user(username="basket", email="basket@test.com", password="pw")
+    client = APIClient()
+    client.force_authenticate(user)
+    return client, Cart.objects.create(user=user)
+
+
+def fill_cart(cart, count):
+    category = Category.objects.create(name=f"Rayon {count}", fr_name=f"Rayon {count}")
+    for i in range(count):
+        product = Product.objects.create(
+            name=f"P{i}", description="...", price=3, weight=1, sku=f"R{count}-{i}", category=category
+        )
+        ProductImage.objects.create(product=product, image=f"products/p{i}.jpg")
+        CartItem.objects.create(cart=cart, product=product, quantity=2)
+
+
+def count_queries(client):
+    with CaptureQueriesContext(connection) as queries:
+        response = client.get("/api/cart/")
+    assert response.status_code == 200
+    return len(queries), response.data
+
+
+def test_cart_snapshot_query_count_does_not_grow_with_cart_size(client_and_cart):
+    client, cart = client_and_cart
+
+    fill_cart(cart, 1)
+    small, _ = count_queries(client)
+    fill_cart(cart, 20)
+    large, data = count_queries(client)
+
+    # Panier, produits (image principale dénormalisée), identifiant ; les recommandations sont servies à part
+    assert large == small == 3
+    assert len(data["items"]) == 21
+    assert data["items"][0]["thumbnail_url"].endswith("products/p0.jpg")
+    assert data["cart_id"] == cart.id
+
+
+def test_cart_recommendations_are_cached_per_category_set(client_and_cart, settings, django_assert_num_queries):
+    settings.CACHES = {"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}}
+    client, cart = client_and_cart
+    fill_cart(cart, 2)
+    category = cart.items.first().product.category
+    others = [
+        Product.objects.create(name=f"O{i}", description="...", price=3, weight=1, sku=f"O{i}", category=category)
+        for i in range(5)
+    ]
+
+    first = client.get("/api/cart/recommendations/").data["recommended_products"]
+    assert [product["id"] for product in first] == [product.id for product in others[:4]]
+
+    # Panier et catégories seulement : les candidats viennent du cache
+    with django_assert_num_queries(2):
+        assert client.get("/api/cart/recommendations/").data["recommended_products"] == first
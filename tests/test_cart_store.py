@@ -0,0 +1,173 @@
+import pytest
+from cart.models import Cart, CartItem
+from cart.snapshot import build_cart_snapshot
+from cart.store import CartOwner, DatabaseCartStore, RedisCartStore, merge_carts, persist_cart
+from django.contrib.auth import get_user_model
+from django.db.models import QuerySet
+from django.urls import reverse
+from products.models import Category, Product
+from redis.exceptions import ConnectionError
+from rest_framework.test import APIClient
+
+pytestmark = pytest.mark.django_db
+
+
+@pytest.fixture
+def products():
+    category = Category.objects.create(name="Cuisine", fr_name="Cuisine")
+    return [
+        Product.objects.create(name=f"P{i}", description="...", price=5, weight=1, sku=f"K{i}", category=category)
+        for i in range(2)
+    ]
+
+
+@pytest.fixture
+def user():
+    return get_user_model().objects.create_user(username="cook", email="cook@test.com", password="pw")
+
+
+def test_cart_mutations_through_the_database_store(user, products):
+    client = APIClient()
+    client.force_authenticate(user)
+
+    client.post("/api/cart/add/", {"product_id": products[0].id, "quantity": 2})
+    client.post("/api/cart/add/", {"product_id": products[0].id, "quantity": 1})
+    client.post("/api/cart/add/", {"product_id": products[1].id})
+    assert dict(CartItem.objects.values_list("product_id", "quantity")) == {products[0].id: 3, products[1].id: 1}
+
+    assert client.post("/api/cart/decrease/", {"product_id": products[1].id}).data["message"].endswith("supprimé du panier.")
+    assert client.post("/api/cart/decrease/", {"product_id": products[1].id}).status_code == 404
+    assert client.post("/api/cart/remove/item/", {"product_id": products[0].id}).status_code == 200
+    assert Cart.objects.filter(user=user).count() == 1 and not CartItem.objects.exists()
+
+
+def test_concurrent_add_of_a_new_product_increments_the_inserted_line(user, products, monkeypatch):
+    update = QuerySet.update
+
+    def racing_update(queryset, **kwargs):
+        if queryset.model is CartItem and not CartItem.objects.exists():
+            # Un second « ajouter » insère la ligne entre la mise à jour et l'INSERT
+            CartItem.objects.create(cart=Cart.objects.get(user=user), product=products[0], quantity=1)
+            return 0
+        return update(queryset, **kwargs)
+
+    monkeypatch.setattr(QuerySet, "update", racing_update)
+    DatabaseCartStore().add(CartOwner(user.id, None), products[0].id, 2)
+
+    assert list(CartItem.objects.values_list("product_id", "quantity")) == [(products[0].id, 3)]
+
+
+@pytest.fixture
+def redis_store():
+    store = RedisCartStore()
+    try:
+        store.client.ping()
+    except ConnectionError:
+        pytest.skip("Redis indisponible")
+    yield store
+    store.client.delete("cart:user:999999", store.DIRTY_KEY)
+
+
+def test_redis_store_writes_behind_to_the_database(redis_store, products, user, django_assert_num_queries):
+    owner = CartOwner(user.id, None)
+    redis_store.add(owner, products[0].id, 2)
+
+    # Le panier est chargé une fois depuis la base, puis modifié sans SQL
+    with django_assert_num_queries(0):
+        redis_store.add(owner, products[0].id, 1)
+        redis_store.add(owner, products[1].id, 1)
+        assert redis_store.decrease(owner, products[1].id) == 0
+    assert not Cart.objects.exists()
+
+    assert redis_store.persist_dirty() == 1
+    assert dict(CartItem.objects.values_list("product_id", "quantity")) == {products[0].id: 3}
+    redis_store.clear(owner)
+
+
+def test_payment_reads_the_live_redis_cart(redis_store, products, user, settings):
+    settings.CART_STORE = "redis"
+    owner = CartOwner(user.id, None)
+    redis_store.add(owner, products[0].id, 2)
+
+    # Le premier instantané recopie le panier pour exposer son identifiant
+    cart_id = build_cart_snapshot(owner)["cart_id"]
+    assert cart_id is not None
+
+    redis_store.add(owner, products[1].id, 1)
+    assert persist_cart(cart_id).get_total_price() == 15
+    redis_store.clear(owner)
+
+
+def test_batch_endpoint_applies_all_operations_in_few_queries(user, products, django_assert_max_num_queries):
+    category = products[0].category
+    lines = [
+        Product.objects.create(name=f"L{i}", description="...", price=2, weight=1, sku=f"L{i}", category=category)
+        for i in range(30)
+    ]
+    cart = Cart.objects.create(user=user)
+    CartItem.objects.create(cart=cart, product=products[0], quantity=4)
+    CartItem.objects.create(cart=cart, product=products[1], quantity=1)
+    client = APIClient()
+    client.force_authenticate(user)
+
+    operations = [{"op": "set", "product_id": line.id, "quantity": 2} for line in lines]
+    operations += [
+        {"op": "increment", "product_id": products[0].id, "quantity": 3},
+        {"op": "increment", "product_id": products[0].id, "quantity": -1},
+        {"op": "remove", "product_id": products[1].id},
+    ]
+    with django_assert_max_num_queries(12):
+        response = client.post("/api/cart/batch/", {"operations": operations}, format="json")
+
+    assert response.status_code == 200
+    quantities = {item["product_id"]: item["quantity"] for item in response.data["items"]}
+    assert quantities == {products[0].id: 6, **{line.id: 2 for line in lines}}
+
+    unknown = client.post("/api/cart/batch/", {"operations": [{"op": "set", "product_id": 0, "quantity": 1}]}, format="json")
+    assert unknown.status_code == 400
+
+
+def test_login_merges_the_session_cart_summing_and_clamping_to_stock(user, products, django_assert_max_num_queries):
+    Product.objects.filter(pk=products[0].pk).update(stock=4)
+    Product.objects.filter(pk=products[1].pk).update(stock=10)
+    user_cart = Cart.objects.create(user=user)
+    CartItem.objects.create(cart=user_cart, product=products[0], quantity=3)
+
+    client = APIClient()
+    client.post("/api/cart/add/", {"product_id": products[0].id, "quantity": 2})
+    client.post("/api/cart/add/", {"product_id": products[1].id, "quantity": 5})
+    session_cart = Cart.objects.get(user=None)
+
+    with django_assert_max_num_queries(20):
+        response = client.post(reverse("login"), {"email": "cook@test.com", "password": "pw"})
+    assert response.status_code == 200
+
+    assert dict(user_cart.items.values_list("product_id", "quantity")) == {products[0].id: 4, products[1].id: 5}
+    assert not Cart.objects.filter(pk=session_cart.pk).exists()
+
+
+def test_merge_clamps_existing_user_lines_and_drops_out_of_stock_products(user, products):
+    Product.objects.filter(pk=products[0].pk).update(stock=0)
+    Product.objects.filter(pk=products[1].pk).update(stock=2)
+    user_cart = Cart.objects.create(user=user)
+    CartItem.objects.create(cart=user_cart, product=products[0], quantity=3)
+    CartItem.objects.create(cart=user_cart, product=products[1], quantity=5)
+    session_cart = Cart.objects.create(session_key="merging")
+    CartItem.objects.create(cart=session_cart, product=products[0], quantity=1)
+
+    assert merge_carts(session_cart, user.id) == user_cart
+
+    assert dict(user_cart.items.values_list("product_id", "quantity")) == {products[1].id: 2}
+
+
+def test_merge_without_user_cart_reattaches_and_clamps_the_session_cart(user, products):
+    Product.objects.filter(pk=products[0].pk).update(stock=0)
+    Product.objects.filter(pk=products[1].pk).update(stock=2)
+    session_cart = Cart.objects.create(session_key="merging")
+    CartItem.objects.create(cart=session_cart, product=products[0], quantity=1)
+    CartItem.objects.create(cart=session_cart, product=products[1], quantity=5)
+
+    cart = merge_carts(session_cart, user.id)
+
+    assert cart.pk == session_cart.pk and Cart.objects.get(pk=cart.pk).user_id == user.id
+    assert dict(cart.items.values_list("product_id", "quantity")) == {products[1].id: 2}
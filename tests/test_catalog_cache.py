@@ -0,0 +1,118 @@
+import pytest
+from django.urls import reverse
+from products.caching import CATALOG, bump, cached, product_tag
+from products.models import Category, Product, ProductImage, ProductRecommendation
+from products.tasks import generate_image_variants_task
+from rest_framework.test import APIClient
+
+pytestmark = pytest.mark.django_db
+
+
+@pytest.fixture(autouse=True)
+def locmem_cache(settings):
+    settings.CACHES = {"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}}
+
+
+@pytest.fixture(autouse=True)
+def no_broker(monkeypatch):
+    monkeypatch.setattr(generate_image_variants_task, "delay", lambda *args, **kwargs: None)
+
+
+@pytest.fixture
+def product():
+    category = Category.objects.create(name="Jardin", fr_name="Jardin")
+    return Product.objects.create(
+        name="Tondeuse", description="...", price=199, weight=12, sku="T-1", category=category
+    )
+
+
+def test_bumping_a_tag_invalidates_dependent_entries():
+    calls = []
+
+    def build():
+        calls.append(1)
+        return len(calls)
+
+    assert cached("entry", [CATALOG, product_tag(1)], build) == 1
+    assert cached("entry", [CATALOG, product_tag(1)], build) == 1
+
+    bump(product_tag(2))
+    assert cached("entry", [CATALOG, product_tag(1)], build) == 1
+
+    bump(product_tag(1))
+    assert cached("entry", [CATALOG, product_tag(1)], build) == 2
+
+
+def test_catalog_writes_invalidate_list_and_detail(
+    product, django_assert_num_queries, django_capture_on_commit_callbacks
+):
+    client = APIClient()
+    detail_url = reverse("product-detail", args=[product.id])
+
+    assert client.get(reverse("product-list")).json()[0]["name"] == "Tondeuse"
+    assert client.get(detail_url).json()["product"]["name"] == "Tondeuse"
+    with django_assert_num_queries(0):
+        client.get(reverse("product-list"))
+
+    product.name = "Tondeuse électrique"
+    with django_capture_on_commit_callbacks(execute=True):
+        product.save()
+    assert client.get(reverse("product-list")).json()[0]["name"] == "Tondeuse électrique"
+    assert client.get(detail_url).json()["product"]["name"] == "Tondeuse électrique"
+
+    with django_capture_on_commit_callbacks(execute=True):
+        ProductImage.objects.create(product=product, image="products/tondeuse.jpg")
+    assert len(client.get(detail_url).json()["product"]["images"]) == 1
+
+
+def test_detail_follows_changes_to_recommended_products_of_other_categories(
+    product, django_capture_on_commit_callbacks
+):
+    other = Category.objects.create(name="Outils", fr_name="Outils")
+    gloves = Product.objects.create(name="Gants", description="...", price=15, weight=1, sku="G-1", category=other)
+    ProductRecommendation.objects.create(product=product, recommended=gloves, score=1.0, rank=0)
+    client = APIClient()
+    detail_url = reverse("product-detail", args=[product.id])
+
+    assert [similar["price"] for similar in client.get(detail_url).json()["similar_products"]] == ["15.00"]
+
+    gloves.price = 12
+    with django_capture_on_commit_callbacks(execute=True):
+        gloves.save()
+    assert [similar["price"] for similar in client.get(detail_url).json()["similar_products"]] == ["12.00"]
+
+
+def test_conditional_get_returns_304_until_the_product_changes(
+    product, django_assert_num_queries, django_capture_on_commit_callbacks
+):
+    client = APIClient()
+    detail_url = reverse("product-detail", args=[product.id])
+
+    first = client.get(detail_url)
+    assert first.status_code == 200
+    etag = first.headers["ETag"]
+
+    # Seule la catégorie du produit est lue ; rien n'est sérialisé
+    with django_assert_num_queries(1):
+        assert client.get(detail_url, HTTP_IF_NONE_MATCH=etag).status_code == 304
+    not_modified = client.get(detail_url, HTTP_IF_MODIFIED_SINCE=first.headers["Last-Modified"])
+    assert not_modified.status_code == 304
+
+    with django_capture_on_commit_callbacks(execute=True):
+        ProductImage.objects.create(product=product, image="products/tondeuse.jpg")
+    changed = client.get(detail_url, HTTP_IF_NONE_MATCH=etag)
+    assert changed.status_code == 200
+    assert changed.headers["ETag"] != etag
+
+
+def test_changed_body_never_reuses_last_modified_within_the_same_second(product):
+    client = APIClient()
+    detail_url = reverse("product-detail", args=[product.id])
+    first = client.get(detail_url)
+
+    Product.objects.filter(pk=product.pk).update(name="Tondeuse 2")
+    bump(product_tag(product.pk))
+    changed = client.get(detail_url, HTTP_IF_MODIFIED_SINCE=first.headers["Last-Modified"])
+
+    assert changed.status_code == 200
+    assert changed.headers["Last-Modified"] != first.headers["Last-Modified"]
@@ -0,0 +1,64 @@
+from io import BytesIO
+
+import pytest
+from django.contrib.auth import get_user_model
+from django.core.files.storage import default_storage
+from django.core.files.uploadedfile import SimpleUploadedFile
+from orders.models import Order, OrderItem
+from PIL import Image
+from products.images import generate_variants, generate_variants_for
+from products.models import Category, Product, ProductImage
+
+pytestmark = pytest.mark.django_db
+
+
+@pytest.fixture(autouse=True)
+def media_root(settings, tmp_path):
+    settings.MEDIA_ROOT = tmp_path
+
+
+@pytest.fixture
+def image():
+    buffer = BytesIO()
+    Image.new("RGB", (1600, 1200), "red").save(buffer, format="PNG")
+    category = Category.objects.create(name="Déco", fr_name="Déco")
+    product = Product.objects.create(name="Vase", description="...", price=30, weight=1, sku="V-1", category=category)
+    return ProductImage.objects.create(
+        product=product, image=SimpleUploadedFile("vase.png", buffer.getvalue(), content_type="image/png")
+    )
+
+
+def test_variants_are_resized_and_exposed(image):
+    assert image.variant_urls()["thumbnail_webp"].endswith("vase.png")
+
+    assert generate_variants(image) is True
+    image.refresh_from_db()
+    with image.image.storage.open(image.variants["medium_webp"]) as variant:
+        picture = Image.open(variant)
+        assert picture.format == "WEBP"
+        assert picture.size == (800, 600)
+    assert image.variant_urls()["thumbnail"].endswith("thumbnail.jpg")
+
+
+def test_generation_is_idempotent(image):
+    assert generate_variants_for([image.pk]) == 1
+    assert generate_variants_for([image.pk]) == 0
+    assert generate_variants_for([image.pk], force=True) == 1
+
+
+def test_variants_shown_on_orders_survive_regeneration_and_deletion(image):
+    generate_variants(image)
+    thumbnail, medium = image.variants["thumbnail_webp"], image.variants["medium_webp"]
+    order = Order.objects.create(
+        user=get_user_model().objects.create_user(username="collector", email="collector@test.com", password="pw"),
+        total_price=30,
+    )
+    OrderItem.objects.create(order=order, product=image.product, quantity=1, price=30, product_name="Vase", thumbnail=thumbnail)
+
+    generate_variants(image, force=True)
+    assert image.variants["thumbnail_webp"] != thumbnail
+    assert image.variants["medium_webp"] == medium
+
+    image.delete()
+    assert default_storage.exists(thumbnail)
+    assert not default_storage.exists(medium)
@@ -0,0 +1,62 @@
+import csv
+import io
+import json
+from decimal import Decimal
+
+import pytest
+from django.contrib.auth import get_user_model
+from django.urls import reverse
+from orders.models import Order, OrderItem
+from products.models import Category, Product
+from rest_framework.test import APIClient
+
+pytestmark = pytest.mark.django_db
+
+
+@pytest.fixture
+def admin_client():
+    client = APIClient()
+    client.force_authenticate(get_user_model().objects.create_superuser(username="boss", email="boss@test.com", password="pw"))
+    return client
+
+
+@pytest.fixture
+def orders():
+    user = get_user_model().objects.create_user(username="payer", email="payer@test.com", password="pw")
+    category = Category.objects.create(name="Cuisine", fr_name="Cuisine")
+    product = Product.objects.create(name="Poêle", description="...", price=Decimal("30.00"), weight=1, sku="PO-1", category=category)
+    paid = []
+    for i in range(5):
+        order = Order.objects.create(user=user, total_price=Decimal("60.00"), is_paid=i != 4)
+        OrderItem.objects.create(order=order, product=product, quantity=2, price=product.price)
+        if order.is_paid:
+            paid.append(order.id)
+    return paid
+
+
+def consume(response):
+    assert response.streaming
+    return b"".join(response.streaming_content).decode()
+
+
+def test_ndjson_export_streams_paid_orders_in_chunks(admin_client, orders, django_assert_max_num_queries):
+    response = admin_client.get(reverse("order-list"), {"export": "ndjson"})
+
+    assert response["Content-Type"] == "application/x-ndjson"
+    # Lots de 500 : commandes (avec le total des lignes), lignes, adresses, une fois par lot
+    with django_assert_max_num_queries(4):
+        lines = [json.loads(line) for line in consume(response).splitlines()]
+    assert [line["id"] for line in lines] == orders
+    assert lines[0]["items"][0]["price"] == "30.00" and lines[0]["items_total"] == "60.00"
+
+
+def test_csv_export_has_one_row_per_order_line(admin_client, orders):
+    rows = list(csv.DictReader(io.StringIO(consume(admin_client.get(reverse("order-list"), {"export": "csv"})))))
+
+    assert [int(row["order_id"]) for row in rows] == orders
+    assert rows[0]["username"] == "payer" and rows[0]["quantity"] == "2"
+    assert Decimal(rows[0]["items_total"]) == Decimal("60.00")
+
+
+def test_unknown_export_format_is_rejected(admin_client):
+    assert admin_client.get(reverse("order-list"), {"export": "xml"}).status_code == 400
@@ -0,0 +1,58 @@
+from decimal import Decimal
+
+import pytest
+from django.contrib.auth import get_user_model
+from django.urls import reverse
+from orders.models import Order, OrderItem
+from products.models import Category, Product, ProductImage
+from rest_framework.test import APIClient
+
+pytestmark = pytest.mark.django_db
+
+
+@pytest.fixture
+def heavy_buyer():
+    user = get_user_model().objects.create_user(username="regular", email="regular@test.com", password="pw")
+    category = Category.objects.create(name="Jardin", fr_name="Jardin")
+    products = []
+    for i in range(4):
+        product = Product.objects.create(
+            name=f"Pot {i}", description="...", price=Decimal("5.00"), weight=1, sku=f"P-{i}", category=category,
+        )
+        ProductImage.objects.create(product=product, image=f"products/pot{i}-side.jpg")
+        ProductImage.objects.create(product=product, image=f"products/pot{i}.jpg", is_primary=True)
+        products.append(product)
+    for _ in range(25):
+        order = Order.objects.create(user=user, total_price=Decimal("20.00"))
+        OrderItem.objects.bulk_create(
+            OrderItem(
+                order=order, product=product, quantity=1, price=product.price,
+                product_name=product.name, thumbnail=product.primary_thumbnail,
+            )
+            for product in Product.objects.filter(pk__in=[product.pk for product in products])
+        )
+    return user
+
+
+def test_order_history_pages_load_in_constant_queries(heavy_buyer, django_assert_num_queries):
+    client = APIClient()
+    client.force_authenticate(heavy_buyer)
+
+    seen, cursor = [], None
+    while True:
+        # Commandes, lignes (nom et miniature figés) : ni produits ni images
+        with django_assert_num_queries(2):
+            response = client.get(reverse("user-orders"), {"page_size": 10, **({"cursor": cursor} if cursor else {})})
+        assert response.status_code == 200
+        seen += [order["id"] for order in response.data["results"]]
+        cursor = response.data["next_cursor"]
+        if cursor is None:
+            break
+
+    assert len(seen) == len(set(seen)) == 25
+    item = response.data["results"][0]["items"][0]
+    assert item["product_name"].startswith("Pot") and item["thumbnail_url"].endswith(".jpg")
+    assert "side" not in item["thumbnail_url"]
+    # Forme imbriquée historique, construite depuis les champs figés
+    assert set(item["product"]) == {"id", "name", "first_image"}
+    assert item["product"]["name"] == item["product_name"] and item["product"]["first_image"] == item["thumbnail_url"]
@@ -0,0 +1,80 @@
+from decimal import Decimal
+
+import pytest
+from cart.models import Cart, CartItem
+from django.contrib.auth import get_user_model
+from django.urls import reverse
+from orders import services
+from orders.models import IdempotencyKey, Order, OrderItem
+from products.models import Category, Product
+from rest_framework.test import APIClient
+
+pytestmark = pytest.mark.django_db
+
+
+@pytest.fixture
+def shopper():
+    return get_user_model().objects.create_user(username="buyer", email="buyer@test.com", password="pw")
+
+
+@pytest.fixture
+def client(shopper):
+    client = APIClient()
+    client.force_authenticate(shopper)
+    return client
+
+
+def fill_cart(user, count):
+    category = Category.objects.create(name="Maison", fr_name="Maison")
+    cart = Cart.objects.create(user=user)
+    for i in range(count):
+        product = Product.objects.create(
+            name=f"Lampe {i}", description="...", price=Decimal("12.50"), weight=1, sku=f"L-{i}",
+            category=category, stock=10,
+        )
+        CartItem.objects.create(cart=cart, product=product, quantity=2)
+    return cart
+
+
+def test_order_is_created_with_constant_queries(client, shopper, django_assert_max_num_queries):
+    fill_cart(shopper, 15)
+
+    with django_assert_max_num_queries(15):
+        response = client.post(reverse("create-order"), {"reference": "cs_bulk"}, format="json")
+
+    assert response.status_code == 201
+    order = Order.objects.get(pk=response.data["id"])
+    assert order.total_price == Decimal("375.00")
+    assert set(OrderItem.objects.filter(order=order).values_list("price", "quantity")) == {(Decimal("12.50"), 2)}
+    assert order.get_total_price() == order.total_price
+    assert not Cart.objects.exists()
+
+
+def test_retried_checkout_returns_the_original_order(client, shopper, django_assert_max_num_queries):
+    fill_cart(shopper, 2)
+    headers = {"HTTP_IDEMPOTENCY_KEY": "checkout-42"}
+
+    first = client.post(reverse("create-order"), {"reference": "cs_retry"}, format="json", **headers)
+    with django_assert_max_num_queries(6):
+        retry = client.post(reverse("create-order"), {"reference": "cs_retry"}, format="json", **headers)
+
+    assert first.status_code == 201 and retry.status_code == 200
+    assert retry.data["id"] == first.data["id"]
+    assert Order.objects.count() == 1
+    assert IdempotencyKey.objects.get(key="checkout-42").order_id == first.data["id"]
+    assert list(Product.objects.values_list("stock", flat=True)) == [8, 8]
+
+
+def test_order_total_matches_its_lines_when_a_price_changes_during_checkout(client, shopper, monkeypatch):
+    fill_cart(shopper, 2)
+    reserve_stock = services.reserve_stock
+
+    def reserve_during_price_change(quantities):
+        # Prix modifié par une autre transaction, validée avant le verrouillage des produits
+        Product.objects.update(price=Decimal("20.00"))
+        reserve_stock(quantities)
+
+    monkeypatch.setattr(services, "reserve_stock", reserve_during_price_change)
+    order = Order.objects.get(pk=client.post(reverse("create-order"), {}, format="json").data["id"])
+
+    assert order.total_price == order.get_total_price() == Decimal("80.00")
@@ -0,0 +1,71 @@
+from decimal import Decimal
+
+import pytest
+from django.contrib.auth import get_user_model
+from django.urls import reverse
+from orders.models import Order, OrderItem, OrderStatusHistory
+from products.models import Category, Product
+from rest_framework.test import APIClient
+
+pytestmark = pytest.mark.django_db
+
+
+@pytest.fixture
+def admin():
+    return get_user_model().objects.create_superuser(username="shipping", email="shipping@test.com", password="pw")
+
+
+@pytest.fixture
+def admin_client(admin):
+    client = APIClient()
+    client.force_authenticate(admin)
+    return client
+
+
+def make_orders(count, status="pending"):
+    user, _ = get_user_model().objects.get_or_create(username="customer", defaults={"email": "customer@test.com"})
+    return [Order.objects.create(user=user, total_price=Decimal("10.00"), status=status) for _ in range(count)]
+
+
+def test_bulk_status_change_is_set_based_and_reports_each_order(admin, admin_client, django_assert_max_num_queries):
+    pending = make_orders(50)
+    shipped = make_orders(50, status="shipped")
+    completed = make_orders(1, status="completed")[0]
+    changes = (
+        [{"order": order.id, "status": "shipped"} for order in pending]
+        + [{"order": order.id, "status": "in_transit"} for order in shipped]
+        + [{"order": completed.id, "status": "pending"}, {"order": 999999, "status": "shipped"}]
+    )
+
+    # Lecture, un UPDATE par transition, historique : indépendant du nombre de commandes
+    with django_assert_max_num_queries(8):
+        response = admin_client.post(reverse("bulk-update-order-status"), {"changes": changes}, format="json")
+
+    assert response.status_code == 200
+    results = {result["order"]: result for result in response.data["results"]}
+    assert results[pending[0].id] == {"order": pending[0].id, "result": "updated", "status": "shipped"}
+    assert results[completed.id]["result"] == "invalid_transition"
+    assert results[999999]["result"] == "not_found"
+    assert Order.objects.filter(status="shipped").count() == 50
+    assert Order.objects.filter(status="in_transit").count() == 50
+    assert OrderStatusHistory.objects.filter(changed_by=admin).count() == 100
+
+
+def test_cancelling_an_order_releases_its_stock(admin_client):
+    category = Category.objects.create(name="Sport", fr_name="Sport")
+    product = Product.objects.create(name="Ballon", description="...", price=10, weight=1, sku="B-1", category=category, stock=1)
+    order = make_orders(1)[0]
+    OrderItem.objects.create(order=order, product=product, quantity=3, price=10)
+
+    response = admin_client.patch(reverse("update-order-status", args=[order.id]), {"status": "cancelled"}, format="json")
+    assert response.status_code == 200
+    assert Product.objects.get(pk=product.pk).stock == 4
+
+    response = admin_client.patch(reverse("update-order-status", args=[order.id]), {"status": "shipped"}, format="json")
+    assert response.status_code == 400
+
+
+def test_status_endpoints_require_an_admin():
+    order = make_orders(1)[0]
+    response = APIClient().patch(reverse("update-order-status", args=[order.id]), {"status": "shipped"}, format="json")
+    assert response.status_code == 401
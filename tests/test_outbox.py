@@ -0,0 +1,109 @@
+from datetime import timedelta
+from decimal import Decimal
+
+import pytest
+from django.contrib.auth import get_user_model
+from django.utils import timezone
+from orders.models import Order, OutboxEvent
+from orders.outbox import HANDLERS, MAX_ATTEMPTS, publish, purge_outbox, relay_outbox, retry_delay
+from orders.services import mark_orders_paid
+from orders.status import change_order_statuses
+
+pytestmark = pytest.mark.django_db
+
+
+@pytest.fixture
+def order():
+    user = get_user_model().objects.create_user(username="notified", email="notified@test.com", password="pw")
+    return Order.objects.create(user=user, total_price=Decimal("42.00"), reference="cs_outbox")
+
+
+def test_events_are_written_with_the_order_and_relayed_once(order, mailoutbox):
+    mark_orders_paid("cs_outbox")
+    mark_orders_paid("cs_outbox")  # notification rejouée
+    change_order_statuses({order.id: "shipped"})
+
+    assert list(OutboxEvent.objects.order_by("id").values_list("topic", flat=True)) == ["order.paid", "order.status_changed"]
+    assert mailoutbox == []
+
+    assert relay_outbox() == 2
+    assert relay_outbox() == 0
+    assert [mail.subject for mail in mailoutbox] == [
+        "Confirmation de votre commande cs_outbox",
+        "Votre commande cs_outbox a été expédiée",
+    ]
+    assert not OutboxEvent.objects.filter(processed_at__isnull=True).exists()
+
+
+def test_failed_event_blocks_only_later_events_of_the_same_order(monkeypatch):
+    delivered = []
+
+    def flaky(event):
+        if event.payload.get("fail"):
+            raise RuntimeError("consommateur indisponible")
+        delivered.append((event.aggregate_id, event.payload["step"]))
+
+    monkeypatch.setitem(HANDLERS, "test.event", [flaky])
+    failing = publish("test.event", 1, step=1, fail=True)
+    publish("test.event", 1, step=2)
+    publish("test.event", 2, step=1)
+
+    assert relay_outbox() == 1
+    assert delivered == [(2, 1)]
+    failing.refresh_from_db()
+    assert failing.attempts == 1 and "indisponible" in failing.last_error
+    assert failing.available_at > timezone.now() + retry_delay(1) - timedelta(seconds=5)
+
+    # Retenté seulement après l'attente
+    OutboxEvent.objects.filter(pk=failing.pk).update(payload={"step": 1})
+    assert relay_outbox() == 0
+    OutboxEvent.objects.filter(pk=failing.pk).update(available_at=timezone.now())
+    assert relay_outbox() == 2
+    assert delivered == [(2, 1), (1, 1), (1, 2)]
+
+
+def test_event_is_abandoned_after_max_attempts_and_stops_blocking(monkeypatch):
+    delivered = []
+
+    def flaky(event):
+        if event.payload.get("fail"):
+            raise RuntimeError("adresse refusée")
+        delivered.append(event.payload["step"])
+
+    monkeypatch.setitem(HANDLERS, "test.event", [flaky])
+    failing = publish("test.event", 1, step=1, fail=True)
+    publish("test.event", 1, step=2)
+
+    for _ in range(MAX_ATTEMPTS):
+        assert relay_outbox() == 0
+        OutboxEvent.objects.filter(pk=failing.pk).update(available_at=timezone.now())
+
+    failing.refresh_from_db()
+    assert failing.attempts == MAX_ATTEMPTS and failing.failed_at is not None
+    assert relay_outbox() == 1 and delivered == [2]
+    assert relay_outbox() == 0
+
+
+def test_events_claimed_by_another_relay_are_skipped_with_their_successors(monkeypatch):
+    monkeypatch.setitem(HANDLERS, "test.event", [lambda event: None])
+    claimed = publish("test.event", 1, step=1)
+    publish("test.event", 1, step=2)
+    publish("test.event", 2, step=1)
+    OutboxEvent.objects.filter(pk=claimed.pk).update(available_at=timezone.now() + timedelta(minutes=1))
+
+    assert relay_outbox() == 1
+    assert list(OutboxEvent.objects.filter(processed_at__isnull=False).values_list("aggregate_id", flat=True)) == [2]
+
+
+def test_purge_deletes_only_old_processed_events():
+    now = timezone.now()
+    old = publish("test.event", 1)
+    recent = publish("test.event", 2)
+    pending = publish("test.event", 3)
+    dead = publish("test.event", 4)
+    OutboxEvent.objects.filter(pk=old.pk).update(processed_at=now - timedelta(days=30))
+    OutboxEvent.objects.filter(pk=recent.pk).update(processed_at=now)
+    OutboxEvent.objects.filter(pk=dead.pk).update(failed_at=now - timedelta(days=30))
+
+    assert purge_outbox(batch_size=1) == 1
+    assert set(OutboxEvent.objects.values_list("id", flat=True)) == {recent.pk, pending.pk, dead.pk}
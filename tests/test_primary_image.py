@@ -0,0 +1,73 @@
+from decimal import Decimal
+
+import pytest
+from cart.models import Cart, CartItem
+from django.contrib.auth import get_user_model
+from django.urls import reverse
+from products.images import sync_primary_image
+from products.models import Category, Product, ProductImage
+from products.serializers import ProductSerializer
+from rest_framework.test import APIClient
+
+pytestmark = pytest.mark.django_db
+
+
+@pytest.fixture
+def product():
+    category = Category.objects.create(name="Déco", fr_name="Déco")
+    return Product.objects.create(name="Cadre", description="...", price=Decimal("8.00"), weight=1, sku="CA-1", category=category, stock=5)
+
+
+def primary(product):
+    product.refresh_from_db()
+    return product.primary_image, product.primary_thumbnail
+
+
+def test_primary_image_follows_image_changes(product):
+    first = ProductImage.objects.create(product=product, image="products/cadre.jpg")
+    assert primary(product) == ("products/cadre.jpg", "products/cadre.jpg")
+
+    chosen = ProductImage.objects.create(product=product, image="products/cadre-face.jpg", is_primary=True)
+    assert primary(product)[0] == "products/cadre-face.jpg"
+    assert not ProductImage.objects.get(pk=first.pk).is_primary
+
+    # Miniature générée : products.images.generate_variants resynchronise le produit
+    ProductImage.objects.filter(pk=chosen.pk).update(variants={"thumbnail_webp": "products/variants/1/thumbnail_webp.webp"})
+    assert sync_primary_image(product.pk)
+    assert primary(product)[1] == "products/variants/1/thumbnail_webp.webp"
+    assert product.primary_thumbnail_url.endswith("products/variants/1/thumbnail_webp.webp")
+
+    chosen.delete()
+    assert primary(product) == ("products/cadre.jpg", "products/cadre.jpg")
+    first.delete()
+    assert primary(product) == ("", "")
+
+
+def test_stale_instances_and_clients_cannot_overwrite_the_primary_image(product):
+    stale = Product.objects.get(pk=product.pk)
+    ProductImage.objects.create(product=product, image="products/cadre.jpg")
+
+    stale.name = "Cadre doré"
+    stale.save()
+    assert primary(product) == ("products/cadre.jpg", "products/cadre.jpg")
+
+    serializer = ProductSerializer(product, data={"primary_image": "../secret.jpg"}, partial=True)
+    assert serializer.is_valid() and "primary_image" not in serializer.validated_data
+
+def test_order_details_render_from_the_order_item_snapshot(product, django_assert_num_queries):
+    ProductImage.objects.create(product=product, image="products/cadre.jpg")
+    user = get_user_model().objects.create_user(username="framer", email="framer@test.com", password="pw")
+    CartItem.objects.create(cart=Cart.objects.create(user=user), product=product, quantity=1)
+    client = APIClient()
+    client.force_authenticate(user)
+    order_id = client.post(reverse("create-order"), {}, format="json").data["id"]
+
+    Product.objects.filter(pk=product.pk).update(name="Cadre renommé")
+    ProductImage.objects.filter(product=product).delete()
+
+    # Commande, lignes : ni Product ni ProductImage
+    with django_assert_num_queries(2):
+        response = client.get(reverse("order-details", args=[order_id]))
+    item = response.data["orderedItems"][0]
+    assert item["name"] == "Cadre"
+    assert item["image"].endswith("products/cadre.jpg")
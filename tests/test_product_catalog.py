@@ -0,0 +1,69 @@
+from decimal import Decimal
+
+import pytest
+from django.core.cache import cache
+from django.urls import reverse
+from products.models import Category, Product, ProductImage
+from rest_framework.test import APIClient
+
+pytestmark = pytest.mark.django_db
+
+
+@pytest.fixture(autouse=True)
+def no_cache(monkeypatch):
+    monkeypatch.setattr(cache, "get", lambda *args, **kwargs: None)
+    monkeypatch.setattr(cache, "set", lambda *args, **kwargs: None)
+
+
+@pytest.fixture
+def catalog():
+    category = Category.objects.create(name="Maison", fr_name="Maison")
+    products = []
+    for i in range(7):
+        product = Product.objects.create(
+            name=f"Produit {i}", description="...", price=Decimal(10 + i % 3), weight=1,
+            sku=f"SKU-{i}", category=category,
+        )
+        ProductImage.objects.create(product=product, image=f"products/{i}.jpg")
+        products.append(product)
+    return products
+
+
+def fetch_all(client, **params):
+    ids, cursor = [], None
+    while True:
+        query = dict(params, page_size=3)
+        if cursor:
+            query["cursor"] = cursor
+        response = client.get(reverse("product-catalog"), query)
+        assert response.status_code == 200
+        ids += [product["id"] for product in response.data["results"]]
+        cursor = response.data["next_cursor"]
+        if not cursor:
+            return ids
+
+
+def test_catalog_walks_every_product_once(catalog):
+    client = APIClient()
+    assert fetch_all(client) == [p.id for p in reversed(catalog)]
+
+    by_price = fetch_all(client, ordering="price")
+    expected = sorted(catalog, key=lambda p: (p.price, p.id))
+    assert by_price == [p.id for p in expected]
+
+
+def test_catalog_page_uses_constant_queries(catalog, django_assert_num_queries):
+    client = APIClient()
+    with django_assert_num_queries(2):
+        response = client.get(reverse("product-catalog"), {"page_size": 7})
+    assert len(response.data["results"]) == 7
+    assert response.data["results"][0]["images"]
+
+
+def test_catalog_rejects_invalid_cursor(catalog):
+    response = APIClient().get(reverse("product-catalog"), {"cursor": "pas-un-curseur"})
+    assert response.status_code == 400
+
+def test_most_reviewed_products_are_listed(catalog):
+    response = APIClient().get("/api/product/recommended/")
+    assert response.status_code == 200 and len(response.data) == 4
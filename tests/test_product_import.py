@@ -0,0 +1,71 @@
+import io
+import json
+
+import pytest
+from django.contrib.auth import get_user_model
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.urls import reverse
+from products.importers import import_products
+from products.models import Category, Product, ProductSpecification
+from rest_framework.test import APIClient
+
+pytestmark = pytest.mark.django_db
+
+
+@pytest.fixture
+def category():
+    return Category.objects.create(name="Jardin", fr_name="Jardin")
+
+
+def test_csv_import_upserts_products_and_specifications_in_chunks(category, django_assert_max_num_queries):
+    Product.objects.create(name="Ancien", description="...", price=1, weight=1, sku="SKU-0", category=category)
+    lines = ["sku,name,description,price,stock,weight,category,specifications"]
+    lines += [f'SKU-{i},Produit {i},Desc,{i + 1}.50,3,2,jardin,"{{""Couleur"": ""Vert""}}"' for i in range(25)]
+    lines.append("SKU-X,Sans catégorie,Desc,10,1,1,Cuisine,")
+    chunks = []
+
+    # Requêtes indépendantes du nombre de lignes : 1 (catégories) + 6 par lot de 10
+    with django_assert_max_num_queries(1 + 3 * 6):
+        report = import_products(io.StringIO("\n".join(lines)), "csv", chunk_size=10, progress=chunks.append)
+
+    assert len(chunks) == 3
+    assert (report["rows"], report["created"], report["updated"], report["failed"]) == (26, 24, 1, 1)
+    assert report["errors"][0]["line"] == 27
+    assert Product.objects.get(sku="SKU-0").name == "Produit 0"
+    assert ProductSpecification.objects.filter(name="Couleur", value="Vert").count() == 25
+
+    # Ré-import : mise à jour sans doublon
+    report = import_products(io.StringIO("\n".join(lines[:3])), "csv")
+    assert (report["created"], report["updated"]) == (0, 2)
+    assert ProductSpecification.objects.count() == 25
+
+
+def test_admin_endpoint_imports_jsonl(category):
+    admin = get_user_model().objects.create_superuser(username="importer", email="importer@test.com", password="pw")
+    client = APIClient()
+    client.force_authenticate(admin)
+    rows = [
+        {"sku": "J-1", "name": "Pelle", "price": 12, "weight": 1, "category": "Jardin", "specifications": {"Manche": "Bois"}},
+        {"sku": "J-2", "name": "Râteau", "price": -1, "weight": 1, "category": "Jardin"},
+    ]
+    upload = SimpleUploadedFile("catalogue.jsonl", "\n".join(json.dumps(row) for row in rows).encode())
+
+    response = client.post(reverse("product-import"), {"file": upload}, format="multipart")
+    assert response.status_code == 200
+    assert (response.data["created"], response.data["failed"]) == (1, 1)
+    assert "price" in response.data["errors"][0]["errors"]
+    assert Product.objects.get(sku="J-1").specifications.get().value == "Bois"
+
+
+def test_partial_import_keeps_columns_missing_from_the_file(category):
+    Product.objects.create(
+        name="Ancien", description="Garder", price=1, weight=1, sku="SKU-P", category=category, stock=7, length=3,
+    )
+
+    report = import_products(io.StringIO("sku,name,price,weight,category\nSKU-P,Nouveau,9,2,jardin\nSKU-N,Neuf,4,1,jardin"), "csv")
+
+    assert (report["created"], report["updated"]) == (1, 1)
+    updated = Product.objects.get(sku="SKU-P")
+    assert (updated.name, updated.price, updated.stock, updated.length, updated.description) == ("Nouveau", 9, 7, 3, "Garder")
+    created = Product.objects.get(sku="SKU-N")
+    assert (created.stock, created.description, created.length) == (0, "", None)
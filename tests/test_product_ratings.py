@@ -0,0 +1,77 @@
+import pytest
+from django.contrib.admin import site
+from django.contrib.auth import get_user_model
+from products.models import Category, Product, ProductReview
+from products.ratings import rebuild_rating_summaries
+
+pytestmark = pytest.mark.django_db
+
+
+@pytest.fixture
+def product():
+    category = Category.objects.create(name="Audio", fr_name="Audio")
+    return Product.objects.create(
+        name="Casque", description="Casque audio", price=50, weight=1, sku="SKU-1", category=category
+    )
+
+
+@pytest.fixture
+def users():
+    User = get_user_model()
+    return [User.objects.create_user(username=f"user{i}", email=f"user{i}@test.com", password="pw") for i in range(3)]
+
+
+def test_rating_summary_follows_review_changes(product, users):
+    review = ProductReview.objects.create(product=product, user=users[0], rating=5, title="Top")
+    ProductReview.objects.create(product=product, user=users[1], rating=3, title="Bof")
+    product.refresh_from_db()
+    assert product.review_count == 2
+    assert product.average_rating == 4
+    assert product.rating_histogram == {1: 0, 2: 0, 3: 1, 4: 0, 5: 1}
+
+    review.rating = 1
+    review.save()
+    product.refresh_from_db()
+    assert product.rating_sum == 4
+    assert product.rating_histogram[5] == 0
+    assert product.rating_histogram[1] == 1
+
+    review.delete()
+    product.refresh_from_db()
+    assert product.rating_count == 1
+    assert product.rating_sum == 3
+
+
+def test_rating_summary_is_read_without_queries(product, users, django_assert_num_queries):
+    ProductReview.objects.create(product=product, user=users[0], rating=4, title="Bien")
+    product = Product.objects.get(pk=product.pk)
+    with django_assert_num_queries(0):
+        assert product.average_rating == 4
+        assert product.review_count == 1
+
+
+def test_rebuild_rating_summaries_repairs_drift(product, users):
+    ProductReview.objects.create(product=product, user=users[0], rating=2, title="Moyen")
+    ProductReview.objects.filter(product=product).update(rating=4)  # contourne les signaux
+
+    assert rebuild_rating_summaries() == 1
+    product.refresh_from_db()
+    assert product.rating_sum == 4
+    assert product.rating_histogram == {1: 0, 2: 0, 3: 0, 4: 1, 5: 0}
+    assert rebuild_rating_summaries() == 0
+
+
+def test_product_forms_cannot_write_back_rating_counters(product, users, rf, admin_user):
+    request = rf.get("/")
+    request.user = admin_user
+    form = site._registry[Product].get_form(request, product)(
+        instance=product, data={"name": "Casque", "description": "...", "price": 50, "weight": 1,
+                                "sku": "SKU-1", "category": product.category_id, "stock": 0},
+    )
+    assert not {name for name in form.fields if name.startswith("rating_")}
+
+    ProductReview.objects.create(product=product, user=users[0], rating=5, title="Parfait")
+    assert form.is_valid(), form.errors
+    form.save()
+    product.refresh_from_db()
+    assert product.rating_count == 1 and product.rating_5 == 1
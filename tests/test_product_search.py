@@ -0,0 +1,72 @@
+import pytest
+from django.core.cache import cache
+from django.urls import reverse
+from products.models import Category, Product
+from products.search import facet_counts, search_products
+from rest_framework.test import APIClient
+
+pytestmark = pytest.mark.django_db
+
+
+@pytest.fixture(autouse=True)
+def no_cache(monkeypatch):
+    monkeypatch.setattr(cache, "get", lambda *args, **kwargs: None)
+    monkeypatch.setattr(cache, "set", lambda *args, **kwargs: None)
+
+
+@pytest.fixture
+def category():
+    return Category.objects.create(name="Audio", fr_name="Audio")
+
+
+def make_product(category, sku, name, description, price=20):
+    return Product.objects.create(
+        name=name, description=description, price=price, weight=1, sku=sku, category=category
+    )
+
+
+def test_search_ranks_name_matches_first(category):
+    in_description = make_product(category, "A", "Enceinte", "Se connecte à votre casque")
+    in_name = make_product(category, "B", "Casque sans fil", "Réduction de bruit")
+    make_product(category, "C", "Lampe", "Lumière chaude")
+
+    results = list(search_products(Product.objects.all(), "casque"))
+    assert results == [in_name, in_description]
+
+
+def test_search_index_follows_updates_and_deletes(category):
+    product = make_product(category, "A", "Lampe", "Lumière chaude")
+    assert not search_products(Product.objects.all(), "bureau").exists()
+
+    product.name = "Lampe de bureau"
+    product.save()
+    assert list(search_products(Product.objects.all(), "bureau")) == [product]
+
+    product.delete()
+    assert not search_products(Product.objects.all(), "bureau").exists()
+
+
+def test_search_endpoint_matches_prefixes_and_filters(category):
+    make_product(category, "A", "Casque audio", "Filaire", price=30)
+    make_product(category, "B", "Casque gamer", "Micro intégré", price=90)
+
+    response = APIClient().get(reverse("product-search"), {"q": "cas", "max_price": 50})
+    assert response.status_code == 200
+    assert [product["sku"] for product in response.data] == ["A"]
+
+
+def test_search_facets_use_one_grouped_query(category, django_assert_num_queries):
+    other = Category.objects.create(name="Vidéo", fr_name="Vidéo")
+    make_product(category, "A", "Casque audio", "Filaire", price=30)
+    make_product(category, "B", "Casque gamer", "Micro", price=90)
+    make_product(other, "C", "Casque VR", "Réalité virtuelle", price=400)
+    make_product(other, "D", "Projecteur", "Vidéo", price=600)
+
+    with django_assert_num_queries(1):
+        facets = facet_counts(search_products(Product.objects.all(), "casque"))
+    assert [(c["name"], c["count"]) for c in facets["categories"]] == [("Audio", 2), ("Vidéo", 1)]
+    assert [bucket["count"] for bucket in facets["price"]] == [0, 1, 1, 0, 1, 0]
+
+    response = APIClient().get(reverse("product-search"), {"q": "casque", "facets": "1", "category": "Audio"})
+    assert {product["sku"] for product in response.data["results"]} == {"A", "B"}
+    assert response.data["facets"] == facets
@@ -0,0 +1,43 @@
+import numpy as np
+import pytest
+from django.contrib.auth import get_user_model
+from orders.models import Order, OrderItem
+from products.models import Category, Product
+from products.recommendations import build_neighbours, rebuild_recommendations, recommend_for
+
+
+def test_build_neighbours_scores_cosine_similarity():
+    # commandes : {1, 2}, {1, 2}, {1, 3}, {4}
+    source, target, scores, ranks = build_neighbours(
+        order_ids=[10, 10, 11, 11, 12, 12, 13],
+        product_ids=[1, 2, 1, 2, 1, 3, 4],
+    )
+    neighbours = {(s, t): round(score, 3) for s, t, score in zip(source, target, scores)}
+    assert neighbours[(1, 2)] == round(2 / np.sqrt(3 * 2), 3)
+    assert neighbours[(2, 1)] == neighbours[(1, 2)]
+    assert neighbours[(1, 3)] == round(1 / np.sqrt(3 * 1), 3)
+    assert 4 not in source
+    assert list(target[source == 1]) == [2, 3]
+    assert list(ranks[source == 1]) == [0, 1]
+
+
+def test_build_neighbours_keeps_top_k():
+    source, target, _, _ = build_neighbours([1, 1, 1, 1], [1, 2, 3, 4], top_k=2)
+    assert (source == 1).sum() == 2
+
+
+@pytest.mark.django_db
+def test_recommend_for_prefers_co_purchases():
+    user = get_user_model().objects.create_user(username="u", email="u@test.com", password="pw")
+    audio = Category.objects.create(name="Audio", fr_name="Audio")
+    other = Category.objects.create(name="Autre", fr_name="Autre")
+    casque, cable, enceinte = [
+        Product.objects.create(name=name, description="...", price=10, weight=1, sku=name, category=category)
+        for name, category in [("casque", audio), ("cable", other), ("enceinte", audio)]
+    ]
+    order = Order.objects.create(user=user, total_price=20, is_paid=True)
+    OrderItem.objects.create(order=order, product=casque, quantity=1, price=10)
+    OrderItem.objects.create(order=order, product=cable, quantity=1, price=10)
+
+    assert rebuild_recommendations() == 2
+    assert recommend_for([casque.id], limit=2) == [cable, enceinte]
@@ -0,0 +1,82 @@
+from datetime import timedelta
+
+import pytest
+from django.contrib.auth import get_user_model
+from django.utils import timezone
+from orders.models import Order, OrderItem
+from orders.services import mark_orders_paid
+from products.models import Category, Product
+from products.sales import rebuild_sales_counters, top_selling
+
+pytestmark = pytest.mark.django_db
+
+
+@pytest.fixture
+def products():
+    category = Category.objects.create(name="Sport", fr_name="Sport")
+    return [
+        Product.objects.create(name=f"P{i}", description="...", price=10, weight=1, sku=f"S{i}", category=category)
+        for i in range(3)
+    ]
+
+
+@pytest.fixture
+def user():
+    return get_user_model().objects.create_user(username="buyer", email="buyer@test.com", password="pw")
+
+
+def make_order(user, reference, lines):
+    order = Order.objects.create(user=user, total_price=0, reference=reference)
+    for product, quantity in lines:
+        OrderItem.objects.create(order=order, product=product, quantity=quantity, price=product.price)
+    return order
+
+
+def test_paid_orders_feed_the_leaderboard_once(user, products):
+    make_order(user, "cs_1", [(products[0], 2), (products[1], 5)])
+    make_order(user, "cs_2", [(products[0], 4)])
+
+    mark_orders_paid("cs_1")
+    mark_orders_paid("cs_1")  # notification rejouée
+    mark_orders_paid("cs_2")
+
+    assert [(row["product_id"], row["units_sold"]) for row in top_selling(3)] == [
+        (products[0].id, 6),
+        (products[1].id, 5),
+    ]
+    assert [row["units_sold"] for row in top_selling(3, "7d")] == [6, 5]
+    assert top_selling(3)[0]["revenue"] == 60
+
+
+def test_rebuild_matches_incremental_counters(user, products):
+    make_order(user, "cs_1", [(products[2], 3)])
+    make_order(user, "unpaid", [(products[1], 7)])
+    mark_orders_paid("cs_1")
+    incremental = top_selling(3)
+
+    assert rebuild_sales_counters() == 1
+    assert top_selling(3) == incremental
+
+
+def test_late_notifications_do_not_reopen_shipped_or_cancelled_orders(user, products):
+    paid = make_order(user, "cs_1", [(products[0], 1)])
+    mark_orders_paid("cs_1")
+    Order.objects.filter(pk=paid.pk).update(status="shipped")
+    cancelled = make_order(user, "cs_2", [(products[1], 1)])
+    Order.objects.filter(pk=cancelled.pk).update(status="cancelled")
+
+    assert mark_orders_paid("cs_1") == 0  # notification rejouée
+    assert mark_orders_paid("cs_2") == 1  # paiement arrivé après l'annulation
+
+    assert dict(Order.objects.values_list("reference", "status")) == {"cs_1": "shipped", "cs_2": "cancelled"}
+    assert Order.objects.get(pk=cancelled.pk).is_paid
+
+
+def test_rebuild_buckets_sales_by_payment_day(user, products):
+    order = make_order(user, "cs_late", [(products[0], 2)])
+    Order.objects.filter(pk=order.pk).update(created_at=timezone.now() - timedelta(days=10))
+    mark_orders_paid("cs_late")
+    incremental = top_selling(3, "7d")
+
+    assert rebuild_sales_counters() == 1
+    assert top_selling(3, "7d") == incremental == [{"product_id": products[0].id, "units_sold": 2, "revenue": 20}]
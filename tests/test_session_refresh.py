@@ -0,0 +1,33 @@
+import time
+
+import pytest
+from django.conf import settings
+from django.contrib.sessions.backends.db import SessionStore
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+from security.middleware import SessionRefreshMiddleware
+
+pytestmark = pytest.mark.django_db
+
+
+def session_writes(client):
+    with CaptureQueriesContext(connection) as queries:
+        client.get("/api/cart/")
+    return [query["sql"] for query in queries if "django_session" in query["sql"] and not query["sql"].startswith("SELECT")]
+
+
+def test_session_is_only_rewritten_near_the_end_of_its_lifetime():
+    client = APIClient()
+    client.get("/api/cart/")
+    session_key = client.cookies[settings.SESSION_COOKIE_NAME].value
+    assert SessionStore(session_key).get(SessionRefreshMiddleware.KEY)
+
+    assert session_writes(client) == []
+
+    session = SessionStore(session_key)
+    session[SessionRefreshMiddleware.KEY] = int(time.time()) - settings.SESSION_COOKIE_AGE + 60
+    session.save()
+
+    assert session_writes(client)
+    assert SessionStore(session_key)[SessionRefreshMiddleware.KEY] >= int(time.time()) - 5
@@ -0,0 +1,91 @@
+import threading
+
+import pytest
+from cart.models import Cart, CartItem
+from django.contrib.auth import get_user_model
+from django.db import OperationalError, connection
+from django.urls import reverse
+from orders.models import Order
+from products.models import Category, Product
+from products.stock import InsufficientStock, reserve_stock
+from rest_framework.test import APIClient
+
+pytestmark = pytest.mark.django_db
+
+
+@pytest.fixture
+def category():
+    return Category.objects.create(name="Stock", fr_name="Stock")
+
+
+def make_product(category, sku, stock):
+    return Product.objects.create(name=sku, description="...", price=10, weight=1, sku=sku, category=category, stock=stock)
+
+
+@pytest.mark.django_db(transaction=True)
+def test_parallel_checkouts_never_oversell(category):
+    product = make_product(category, "RARE", stock=50)
+    outcomes = []
+    start = threading.Barrier(200)
+
+    def checkout():
+        start.wait()
+        try:
+            while True:
+                try:
+                    reserve_stock({product.id: 1})
+                    outcomes.append("ok")
+                    return
+                except InsufficientStock:
+                    outcomes.append("sold out")
+                    return
+                except OperationalError:
+                    # SQLite en mémoire partagée : table verrouillée, on retente
+                    continue
+        finally:
+            connection.close()
+
+    threads = [threading.Thread(target=checkout) for _ in range(200)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    product.refresh_from_db()
+    assert product.stock == 0
+    assert outcomes.count("ok") == 50
+    assert outcomes.count("sold out") == 150
+
+
+def test_bulk_adjustment_is_all_or_nothing(category):
+    first, second = make_product(category, "A", stock=5), make_product(category, "B", stock=1)
+    admin = get_user_model().objects.create_superuser(username="stockist", email="stockist@test.com", password="pw")
+    client = APIClient()
+    client.force_authenticate(admin)
+    url = reverse("product-stock")
+
+    response = client.post(url, [{"product": first.id, "delta": -2}, {"product": second.id, "delta": -3}], format="json")
+    assert response.status_code == 409
+    assert response.data["shortages"] == {second.id: 1}
+    assert Product.objects.get(pk=first.pk).stock == 5
+
+    response = client.post(url, [{"product": first.id, "delta": -2}, {"product": second.id, "delta": 4}], format="json")
+    assert response.data["stock"] == {first.id: 3, second.id: 5}
+
+
+def test_order_creation_reserves_stock(category):
+    product = make_product(category, "C", stock=3)
+    user = get_user_model().objects.create_user(username="shopper", email="shopper@test.com", password="pw")
+    client = APIClient()
+    client.force_authenticate(user)
+    cart = Cart.objects.create(user=user)
+    item = CartItem.objects.create(cart=cart, product=product, quantity=4)
+
+    response = client.post(reverse("create-order"), {"reference": "cs_stock"}, format="json")
+    assert response.status_code == 409
+    assert not Order.objects.exists() and Cart.objects.filter(pk=cart.pk).exists()
+
+    item.quantity = 2
+    item.save()
+    assert client.post(reverse("create-order"), {"reference": "cs_stock"}, format="json").status_code == 201
+    assert Product.objects.get(pk=product.pk).stock == 1
@@ -0,0 +1,54 @@
+from decimal import Decimal
+
+import pytest
+from cart.models import Cart, CartItem
+from django.contrib.auth import get_user_model
+from orders.models import Order, OrderItem
+from products.models import Category, Product
+
+pytestmark = pytest.mark.django_db
+
+
+@pytest.fixture
+def products():
+    category = Category.objects.create(name="Papeterie", fr_name="Papeterie")
+    return [
+        Product.objects.create(name=f"Cahier {i}", description="...", price=Decimal("2.50") * (i + 1), weight=1, sku=f"CH-{i}", category=category)
+        for i in range(10)
+    ]
+
+
+@pytest.fixture
+def user():
+    return get_user_model().objects.create_user(username="writer", email="writer@test.com", password="pw")
+
+
+def test_cart_totals_are_single_aggregates(user, products, django_assert_num_queries):
+    cart = Cart.objects.create(user=user)
+    CartItem.objects.bulk_create(CartItem(cart=cart, product=product, quantity=2) for product in products)
+    empty = Cart.objects.create()
+
+    with django_assert_num_queries(1):
+        assert cart.get_total_price() == Decimal("275.00")
+    with django_assert_num_queries(1):
+        assert empty.items.summary() == {"lines": 0, "total": Decimal("0")}
+    with django_assert_num_queries(1):
+        totals = dict(Cart.objects.with_total().values_list("id", "total"))
+    assert totals == {cart.id: Decimal("275.00"), empty.id: Decimal("0")}
+
+
+def test_order_totals_use_the_price_frozen_at_order_time(user, products, django_assert_num_queries):
+    orders = []
+    for count in (1, 3):
+        order = Order.objects.create(user=user, total_price=0)
+        OrderItem.objects.bulk_create(
+            OrderItem(order=order, product=product, quantity=1, price=product.price) for product in products[:count]
+        )
+        orders.append(order)
+    Product.objects.update(price=Decimal("99.00"))
+
+    with django_assert_num_queries(1):
+        assert orders[1].get_total_price() == Decimal("15.00")
+    with django_assert_num_queries(1):
+        totals = dict(Order.objects.with_items_total().values_list("id", "items_total"))
+    assert totals == {orders[0].id: Decimal("2.50"), orders[1].id: Decimal("15.00")}
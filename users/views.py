@@ -1,5 +1,5 @@
 # views.py
-from cart.models import Cart, CartItem
+from cart.utils import merge_session_cart
 from django.conf import settings
 from django.contrib.auth import authenticate, get_user_model
 from django.contrib.auth.hashers import check_password, make_password
@@ -91,17 +91,8 @@ class ClientOrderCreateView(APIView):
                 return Response({"error": "Une erreur s'est produite lors de l'envoi de l'email"}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
             
-            session_key = request.session.session_key
-            
-            if session_key:
-                try:
-                    cart = Cart.objects.filter(session=session_key).first()  
-                    if cart:
-                        cart.user = client
-                        cart.save()
-                except Cart.DoesNotExist:
-
-                    cart = Cart.objects.create(user=client, session=request.session)
+            # Rattacher le panier anonyme au nouveau client
+            merge_session_cart(request.session.session_key, client)
                 
 
             refresh = RefreshToken.for_user(client)
@@ -236,26 +227,8 @@ class LoginView(APIView):
         if user.check_password(password):
             refresh = RefreshToken.for_user(user)
 
-            # Vérification du panier de session
-            session_cart = Cart.objects.filter(session=request.session.session_key).first()
-
-            if session_cart:
-                # Vérifier si l'utilisateur a déjà un panier
-                user_cart = Cart.objects.filter(user=user).first()
-
-                if user_cart:
-                    # Transférer les articles du panier de session vers le panier de l'utilisateur
-                    for item in session_cart.items.all():
-                        CartItem.objects.update_or_create(
-                            cart=user_cart,
-                            product=item.product,
-                            defaults={'quantity': item.quantity}
-                        )
-                    session_cart.delete()
-                else:
-                    # Lier le panier de session directement à l'utilisateur
-                    session_cart.user = user
-                    session_cart.save()
+            # Fusion du panier de session dans celui de l'utilisateur (quantités additionnées)
+            merge_session_cart(request.session.session_key, user)
                 
                 
             # Réponse de connexion avec les informations utilisateur